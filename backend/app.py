@@ -1,7 +1,8 @@
-from flask import Flask
+from flask import Flask, Response, abort, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import secrets
 from datetime import timedelta, datetime
 import time
 from database import db, jwt, login_manager
@@ -13,10 +14,12 @@ def log(msg: str):
     print(f"[{datetime.utcnow().isoformat()}] {msg}", flush=True)
 
 
-def create_app():
+def create_app(test_config=None):
     start = time.time()
     log("create_app() start")
     app = Flask(__name__)
+    from utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
     log("Flask instance created")
 
     # Configuration
@@ -25,12 +28,43 @@ def create_app():
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=1)  # 1 day expiration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///reader_digest.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['RSS_MAX_LIMIT'] = int(os.getenv('RSS_MAX_LIMIT', '200'))
+    # The change feed holds back writes this recent, which may still be committing
+    app.config['SYNC_SETTLE_SECONDS'] = float(os.getenv('SYNC_SETTLE_SECONDS', '2'))
+    # Bearer token required to scrape /metrics; the endpoint is disabled (404) when unset
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    # Opt-in SQL profiling: slow statement log, N+1 detection and per-request query summaries
+    app.config['QUERY_PROFILER'] = os.getenv('QUERY_PROFILER', 'false').lower() in ['true', '1', 'yes']
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', '100'))
+    app.config['N_PLUS_ONE_THRESHOLD'] = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
+    # Admin-requested request profiles (X-Profile: 1) are kept here, newest PROFILE_MAX_FILES only
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', '50'))
+    app.config['AUTO_MIGRATE'] = os.getenv('AUTO_MIGRATE', 'true').lower() in ['true', '1', 'yes']
+    if test_config:
+        app.config.update(test_config)
     log("Configuration loaded")
 
     # Initialize extensions with app
     db.init_app(app)
     jwt.init_app(app)
     login_manager.init_app(app)
+    from services.feed_cache import FeedCache
+    app.extensions['feed_cache'] = FeedCache(
+        ttl=int(os.getenv('RSS_CACHE_TTL', '3600')),
+        max_entries=int(os.getenv('RSS_CACHE_MAX_ENTRIES', '256'))
+    )
+    from services.user_cache import UserCache
+    app.extensions['user_cache'] = UserCache(
+        ttl=int(os.getenv('USER_CACHE_TTL', '60')),
+        max_entries=int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+    )
+    from services.request_metrics import init_request_metrics
+    init_request_metrics(app)
+    from services.query_profiler import init_query_profiler
+    init_query_profiler(app)
+    from services.request_profiler import init_request_profiler
+    init_request_profiler(app)
     log("Extensions initialized")
 
     # Enable CORS
@@ -44,6 +78,8 @@ def create_app():
     from routes.users import users_bp
     from routes.rss import rss_bp
     from routes.export import export_bp
+    from routes.sync import sync_bp
+    from routes.profiles import profiles_bp
     log("Blueprint modules imported")
 
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
@@ -52,6 +88,8 @@ def create_app():
     app.register_blueprint(users_bp, url_prefix='/api/v1/users')
     app.register_blueprint(rss_bp, url_prefix='/rss')
     app.register_blueprint(export_bp, url_prefix='/api/v1')
+    app.register_blueprint(sync_bp, url_prefix='/api/v1/sync')
+    app.register_blueprint(profiles_bp, url_prefix='/api/v1/admin/profiles')
     log("Blueprints registered")
 
     # Add health check route
@@ -60,8 +98,24 @@ def create_app():
         return {'status': 'OK', 'message': 'Flask app is running'}
     log("Health route added")
 
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        supplied = request.headers.get('Authorization', '').encode('utf-8')
+        if not secrets.compare_digest(supplied, f'Bearer {token}'.encode('utf-8')):
+            abort(401)
+        from utils.metrics import REGISTRY
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+    log("Metrics route added")
+
     # Import models to ensure they are registered with SQLAlchemy
-    from models.models import User, Article, Digest  # noqa: F401
+    from models.models import User, Article, Digest, Tag, WeeklyRollup, DigestFragment, Tombstone  # noqa: F401
+    # Registers the session events that keep weekly_rollups, draft digests and tombstones in sync
+    import services.weekly_rollup  # noqa: F401
+    import services.draft_digest  # noqa: F401
+    import services.change_feed  # noqa: F401
     log("Models imported")
 
     # Create tables
@@ -69,6 +123,11 @@ def create_app():
         db.create_all()
         log("Database tables ensured")
 
+        if app.config['AUTO_MIGRATE']:
+            import migrations
+            applied = migrations.upgrade(db.engine, log=log)
+            log(f"Migrations applied: {', '.join(applied)}" if applied else "Migrations up to date")
+
     log(f"create_app() complete in {time.time() - start:.2f}s")
     return app
 
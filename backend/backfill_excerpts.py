@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Recompute the stored excerpts of articles and digests
+
+Usage:
+    python backfill_excerpts.py          # rows without an excerpt
+    python backfill_excerpts.py --all    # every row, e.g. after changing the excerpt rules
+"""
+
+import os
+import sys
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from database import db
+
+def backfill(only_missing=True):
+    """Fill in excerpts in one transaction"""
+    app = create_app()
+
+    with app.app_context():
+        from services.excerpts import backfill_excerpts
+
+        try:
+            scope = "rows without an excerpt" if only_missing else "all rows"
+            print(f"Backfilling excerpts for {scope}...")
+
+            with db.engine.begin() as conn:
+                updated = backfill_excerpts(conn, only_missing=only_missing)
+
+            print(f"Excerpt backfill completed successfully! {updated} row(s) updated.")
+
+        except Exception as e:
+            print(f"Error during excerpt backfill: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = backfill(only_missing='--all' not in sys.argv[1:])
+    sys.exit(0 if success else 1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Backfill the normalized tags / article_tags tables from the JSON Article.tags column
+"""
+
+import os
+import sys
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from database import db
+
+def backfill_tags():
+    """Link every article to the tags in its JSON column (also applied by migration 0008)"""
+    app = create_app()
+
+    with app.app_context():
+        from services.tag_index import backfill_article_tags
+
+        try:
+            print("Syncing article tags...")
+            with db.engine.begin() as connection:
+                added = backfill_article_tags(connection)
+            print(f"Tag backfill completed successfully! {added} links added")
+
+        except Exception as e:
+            print(f"Error during tag backfill: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = backfill_tags()
+    sys.exit(0 if success else 1)
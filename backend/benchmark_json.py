@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of a 100-article API page
+
+Compares the previous path (to_dict() pre-formatting every date with
+isoformat(), encoded by Flask's stdlib provider) with the FastJSONProvider
+(dates passed through and encoded natively, orjson when installed).
+
+Usage:
+    python benchmark_json.py [--articles 100] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import utils.json_provider as json_provider
+from utils.json_provider import FastJSONProvider
+
+def build_page(count):
+    """A page of article dicts shaped like Article.to_dict(), without a database"""
+    now = datetime(2025, 1, 6, 9, 30, 15, 123456)
+    paragraph = "Reading notes and quoted passages from the article. " * 40
+    return [
+        {
+            'id': i,
+            'title': f'Article {i}: a reasonably long headline about something interesting',
+            'url': f'https://example.com/posts/{i}',
+            'content': paragraph,
+            'notes': paragraph[:600],
+            'tags': ['python', 'performance', f'topic-{i % 7}'],
+            'reading_date': date(2025, 1, 6) - timedelta(days=i % 30),
+            'is_public': True,
+            'user_id': 1,
+            'author': 'reader',
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now
+        }
+        for i in range(count)
+    ]
+
+def legacy_to_dict(record):
+    """What to_dict() used to do: format every date in Python before encoding"""
+    formatted = dict(record)
+    for key in ('reading_date', 'created_at', 'updated_at'):
+        formatted[key] = formatted[key].isoformat() if formatted[key] else None
+    return formatted
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API JSON serialization')
+    parser.add_argument('--articles', type=int, default=100, help='Articles per page')
+    parser.add_argument('--repeat', type=int, default=200, help='Pages serialized per measurement')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    page = build_page(args.articles)
+    legacy = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    def before():
+        body = {'articles': [legacy_to_dict(record) for record in page]}
+        return legacy.dumps(body, separators=(',', ':')).encode('utf-8')
+
+    def after():
+        return fast.dumps_bytes({'articles': page})
+
+    cases = [('before: isoformat() + stdlib json', before)]
+    if json_provider.orjson is not None:
+        cases.append(('after: FastJSONProvider (orjson)', after))
+
+    def after_stdlib():
+        with patch.object(json_provider, 'orjson', None):
+            return after()
+
+    cases.append(('after: FastJSONProvider (stdlib fallback)', after_stdlib))
+
+    print(f"Serializing a {args.articles}-article page, best of 5 x {args.repeat} runs")
+    baseline = None
+    for label, func in cases:
+        size = len(func())
+        seconds = min(timeit.repeat(func, number=args.repeat, repeat=5)) / args.repeat
+        baseline = baseline or seconds
+        print(f"  {label:<45} {seconds * 1000:8.3f} ms/page  {baseline / seconds:5.1f}x  ({size} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,8 @@ def user_identity_lookup(user):
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
-    """Load user from JWT identity"""
+    """Load user from JWT identity (served from the per-process user cache when fresh)"""
     identity = jwt_data["sub"]
     # Import here to avoid circular imports
-    from models.models import User
-    return User.query.filter_by(id=identity).first()
+    from services.user_cache import load_user
+    return load_user(identity)
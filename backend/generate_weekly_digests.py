@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Generate draft weekly digests for every active user
+
+Usage:
+    python generate_weekly_digests.py                      # last full week
+    python generate_weekly_digests.py --week 2025-01-06    # week containing that date
+    python generate_weekly_digests.py --workers 8 --shard-size 100
+
+Safe to re-run: users who already have a digest for the week are skipped.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from services.digest_batch import DEFAULT_SHARD_SIZE, generate_weekly_drafts, previous_week_start
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate draft weekly digests for all users')
+    parser.add_argument('--week', help='Any date in the target week (YYYY-MM-DD); defaults to last week')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='Users per shard')
+    args = parser.parse_args()
+
+    try:
+        week_start = datetime.strptime(args.week, '%Y-%m-%d').date() if args.week else previous_week_start()
+    except ValueError:
+        print("Invalid --week date, expected YYYY-MM-DD")
+        return False
+
+    app = create_app()
+    with app.app_context():
+        try:
+            totals = generate_weekly_drafts(week_start, workers=args.workers, shard_size=args.shard_size)
+            print(f"Weekly digest generation completed: {totals['created']} created, "
+                  f"{totals['skipped']} skipped of {totals['users']} pending user(s).")
+        except Exception as e:
+            print(f"Error during weekly digest generation: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Versioned database migrations
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied and pending migrations
+"""
+
+import os
+import sys
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from database import db
+import migrations
+
+def show_status():
+    """Print every known migration with its applied timestamp"""
+    applied = migrations.applied_versions(db.engine)
+    for module in migrations.discover_migrations():
+        applied_at = applied.get(module.VERSION)
+        state = f"applied {applied_at}" if applied_at else "pending"
+        print(f"{module.VERSION}  {module.DESCRIPTION:<50} {state}")
+
+def run_upgrade():
+    """Apply pending migrations"""
+    applied = migrations.upgrade(db.engine)
+    if applied:
+        print(f"Applied {len(applied)} migration(s): {', '.join(applied)}")
+    else:
+        print("Database is up to date.")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+    # Migrations are applied explicitly below rather than during app startup
+    app = create_app({'AUTO_MIGRATE': False})
+
+    with app.app_context():
+        try:
+            if command == 'status':
+                show_status()
+            elif command == 'upgrade':
+                run_upgrade()
+            else:
+                print(__doc__)
+                sys.exit(2)
+        except Exception as e:
+            print(f"Error during migration: {e}")
+            sys.exit(1)
@@ -0,0 +1,24 @@
+"""
+Composite indexes for the hot article and digest query shapes
+"""
+
+VERSION = '0001'
+DESCRIPTION = 'Composite indexes on articles and digests'
+
+# Built concurrently on PostgreSQL so large tables stay writable
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('ix_articles_user_id_reading_date', 'articles', ['user_id', 'reading_date']),
+    ('ix_articles_is_public_reading_date_created_at', 'articles', ['is_public', 'reading_date', 'created_at']),
+    ('ix_articles_is_public_created_at', 'articles', ['is_public', 'created_at']),
+    ('ix_digests_is_public_is_published_week_start', 'digests', ['is_public', 'is_published', 'week_start']),
+    ('ix_digests_user_id_week_start', 'digests', ['user_id', 'week_start']),
+]
+
+def upgrade(connection):
+    concurrently = 'CONCURRENTLY ' if connection.dialect.name == 'postgresql' else ''
+    for name, table, columns in INDEXES:
+        connection.exec_driver_sql(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        )
@@ -0,0 +1,15 @@
+"""
+Per-user weekly rollups, backfilled from existing articles
+"""
+
+VERSION = '0002'
+DESCRIPTION = 'Weekly rollup table for article counts and tag frequencies'
+
+def upgrade(connection):
+    from models.models import WeeklyRollup
+    from services.weekly_rollup import rebuild_weekly_rollups
+
+    WeeklyRollup.__table__.create(connection, checkfirst=True)
+    # Only backfill once; afterwards rows are maintained on every article write
+    if connection.exec_driver_sql("SELECT COUNT(*) FROM weekly_rollups").scalar() == 0:
+        rebuild_weekly_rollups(connection)
@@ -0,0 +1,17 @@
+"""
+Auto-maintained draft digests and per-article rendered fragments
+"""
+
+VERSION = '0003'
+DESCRIPTION = 'Draft digest flag and digest_fragments table'
+
+def upgrade(connection):
+    from sqlalchemy import inspect
+    from models.models import DigestFragment
+
+    columns = {column['name'] for column in inspect(connection).get_columns('digests')}
+    if 'is_auto_draft' not in columns:
+        connection.exec_driver_sql("ALTER TABLE digests ADD COLUMN is_auto_draft BOOLEAN NOT NULL DEFAULT FALSE")
+
+    # Fragments fill in lazily the first time a week's draft is reassembled
+    DigestFragment.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,14 @@
+"""
+Full-text search index over article titles, content and notes
+"""
+
+VERSION = '0004'
+DESCRIPTION = 'Full-text search index on articles (FTS5 / tsvector)'
+
+# The GIN index is built concurrently on PostgreSQL so articles stay writable
+TRANSACTIONAL = False
+
+def upgrade(connection):
+    from services.article_search import create_search_index
+
+    create_search_index(connection)
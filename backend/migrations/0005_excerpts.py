@@ -0,0 +1,18 @@
+"""
+Stored plain-text excerpts for articles and digests, backfilled from content
+"""
+
+VERSION = '0005'
+DESCRIPTION = 'Excerpt columns on articles and digests'
+
+def upgrade(connection):
+    from sqlalchemy import inspect
+    from services.excerpts import backfill_excerpts
+
+    for table in ('articles', 'digests'):
+        columns = {column['name'] for column in inspect(connection).get_columns(table)}
+        if 'excerpt' not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN excerpt TEXT")
+
+    # Only rows without an excerpt are touched, so this is a no-op on a fresh database
+    backfill_excerpts(connection)
@@ -0,0 +1,31 @@
+"""
+Content hashes on articles and digests, used to recognise restored records
+"""
+
+VERSION = '0006'
+DESCRIPTION = 'Content hash columns and indexes on articles and digests'
+
+# Indexes are built concurrently on PostgreSQL so large tables stay writable;
+# every step is safe to repeat if the migration is interrupted
+TRANSACTIONAL = False
+
+TABLES = ('articles', 'digests')
+
+def upgrade(connection):
+    from sqlalchemy import inspect
+    from services.backup_restore import backfill_content_hashes
+
+    for table in TABLES:
+        columns = {column['name'] for column in inspect(connection).get_columns(table)}
+        if 'content_hash' not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN content_hash VARCHAR(64)")
+
+    # Only rows without a hash are touched, so this is a no-op on a fresh database.
+    # Filled before the indexes exist, so the updates do not maintain them row by row.
+    backfill_content_hashes(connection)
+
+    concurrently = 'CONCURRENTLY ' if connection.dialect.name == 'postgresql' else ''
+    for table in TABLES:
+        connection.exec_driver_sql(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS ix_{table}_user_id_content_hash ON {table} (user_id, content_hash)"
+        )
@@ -0,0 +1,31 @@
+"""
+Change feed: (user_id, updated_at) indexes and the tombstones table
+"""
+
+VERSION = '0007'
+DESCRIPTION = 'Change feed indexes and tombstones for deleted articles and digests'
+
+# Built concurrently on PostgreSQL so large tables stay writable
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('ix_articles_user_id_updated_at', 'articles', ['user_id', 'updated_at']),
+    ('ix_digests_user_id_updated_at', 'digests', ['user_id', 'updated_at']),
+]
+
+def upgrade(connection):
+    from models.models import Tombstone
+
+    Tombstone.__table__.create(connection, checkfirst=True)
+
+    # Rows without a timestamp would never show up in the feed
+    for table in ('articles', 'digests'):
+        connection.exec_driver_sql(
+            f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+        )
+
+    concurrently = 'CONCURRENTLY ' if connection.dialect.name == 'postgresql' else ''
+    for name, table, columns in INDEXES:
+        connection.exec_driver_sql(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        )
@@ -0,0 +1,12 @@
+"""
+Fill the normalized tag tables for articles written before they existed
+"""
+
+VERSION = '0008'
+DESCRIPTION = 'Backfill tags and article_tags from the JSON tags column'
+
+def upgrade(connection):
+    from services.tag_index import backfill_article_tags
+
+    # Articles already linked are left as they are, so this is a no-op on a fresh database
+    backfill_article_tags(connection)
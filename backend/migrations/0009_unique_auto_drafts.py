@@ -0,0 +1,35 @@
+"""
+One auto-maintained draft digest per user and week
+"""
+
+VERSION = '0009'
+DESCRIPTION = 'Unique (user_id, week_start) index over auto draft digests'
+
+INDEX = 'uq_digests_user_id_week_start_auto_draft'
+
+def upgrade(connection):
+    from datetime import datetime
+    from sqlalchemy import func, select
+    from models.models import Digest, Tombstone
+
+    digests = Digest.__table__
+    # Extra drafts left by racing batch runs: keep the oldest of each week
+    keep = select(func.min(digests.c.id)).where(digests.c.is_auto_draft.is_(True)).group_by(
+        digests.c.user_id, digests.c.week_start
+    )
+    duplicates = connection.execute(
+        select(digests.c.id, digests.c.user_id)
+        .where(digests.c.is_auto_draft.is_(True), digests.c.id.not_in(keep))
+    ).all()
+    if duplicates:
+        # Deleted like any other digest, so synced clients drop them too
+        now = datetime.utcnow()
+        connection.execute(Tombstone.__table__.insert(), [
+            {'user_id': row.user_id, 'record_type': 'digest', 'record_id': row.id, 'deleted_at': now}
+            for row in duplicates
+        ])
+        connection.execute(digests.delete().where(digests.c.id.in_([row.id for row in duplicates])))
+
+    connection.exec_driver_sql(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {INDEX} ON digests (user_id, week_start) WHERE is_auto_draft"
+    )
@@ -0,0 +1,88 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module in this package named ``NNNN_description.py`` that
+defines ``VERSION``, ``DESCRIPTION`` and ``upgrade(connection)``. Applied
+versions are recorded in the ``schema_migrations`` table, so every migration
+runs exactly once per database. A module may set ``TRANSACTIONAL = False``
+when it must run outside a transaction (e.g. ``CREATE INDEX CONCURRENTLY``
+on PostgreSQL).
+
+Migrations must be safe on a database freshly built by ``db.create_all()``,
+which already contains the current models' tables, columns and indexes.
+"""
+import importlib
+import os
+import pkgutil
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import text
+
+MIGRATIONS_TABLE = 'schema_migrations'
+
+def discover_migrations() -> List:
+    """Return migration modules sorted by version"""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    modules = []
+    for info in pkgutil.iter_modules([package_dir]):
+        if info.name[:4].isdigit():
+            modules.append(importlib.import_module(f'{__name__}.{info.name}'))
+
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+def _ensure_migrations_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            "version VARCHAR(32) PRIMARY KEY, "
+            "description VARCHAR(255) NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL)"
+        ))
+
+def applied_versions(engine) -> Dict[str, datetime]:
+    """Return {version: applied_at} for migrations already recorded"""
+    _ensure_migrations_table(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}")).all()
+    return {row[0]: row[1] for row in rows}
+
+def pending_migrations(engine) -> List:
+    """Return migration modules that have not been applied yet"""
+    applied = applied_versions(engine)
+    return [module for module in discover_migrations() if module.VERSION not in applied]
+
+def _record(conn, module):
+    conn.execute(
+        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (:v, :d, :t)"),
+        {'v': module.VERSION, 'd': module.DESCRIPTION, 't': datetime.utcnow()}
+    )
+
+def upgrade(engine, log=print) -> List[str]:
+    """
+    Apply all pending migrations in version order.
+
+    Transactional migrations run together with their version record in one
+    transaction; non-transactional ones are recorded only after they succeed.
+
+    Returns:
+        List of versions applied
+    """
+    applied = []
+    for module in pending_migrations(engine):
+        log(f"Applying migration {module.VERSION}: {module.DESCRIPTION}")
+        if getattr(module, 'TRANSACTIONAL', True):
+            with engine.begin() as conn:
+                module.upgrade(conn)
+                _record(conn, module)
+        else:
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                module.upgrade(conn)
+            with engine.begin() as conn:
+                _record(conn, module)
+        applied.append(module.VERSION)
+    return applied
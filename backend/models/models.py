@@ -1,8 +1,40 @@
 from database import db
 from datetime import datetime
+import hashlib
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
+from sqlalchemy import event, inspect as sa_inspect
+from utils.excerpt import EXCERPT_LENGTH, make_excerpt
+
+# Association table between articles and normalized tags. The composite primary
+# key serves article -> tags lookups; the reverse index serves tag filters.
+article_tags = db.Table(
+    'article_tags',
+    db.Column('article_id', db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_article_tags_tag_id_article_id', 'tag_id', 'article_id')
+)
+
+def normalize_tag(tag):
+    """Normalize a tag name for storage and lookup"""
+    return str(tag).strip().lower()
+
+def parse_tags(value):
+    """Parse a JSON tags string into a list, tolerating bad data"""
+    try:
+        tags = json.loads(value) if value else []
+    except (json.JSONDecodeError, TypeError):
+        tags = []
+    return tags if isinstance(tags, list) else []
+
+def fingerprint(*values):
+    """SHA-256 hex digest of the given field values, used to recognise a record restored twice"""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(('' if value is None else str(value)).encode('utf-8'))
+        digest.update(b'\x1f')  # Unit separator, so ('ab', 'c') differs from ('a', 'bc')
+    return digest.hexdigest()
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -39,7 +71,7 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
     
     def to_dict(self):
-        """Convert user to dictionary for JSON response"""
+        """Convert user to dictionary for JSON response (dates are serialized by the JSON provider)"""
         return {
             'id': self.id,
             'username': self.username,
@@ -49,12 +81,19 @@ class User(UserMixin, db.Model):
             'is_active': self.is_active,
             'is_admin': self.is_admin,
             'oauth_provider': self.oauth_provider,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        db.Index('ix_articles_user_id_reading_date', 'user_id', 'reading_date'),
+        db.Index('ix_articles_is_public_reading_date_created_at', 'is_public', 'reading_date', 'created_at'),
+        db.Index('ix_articles_is_public_created_at', 'is_public', 'created_at'),
+        db.Index('ix_articles_user_id_content_hash', 'user_id', 'content_hash'),
+        db.Index('ix_articles_user_id_updated_at', 'user_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -72,31 +111,213 @@ class Article(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        """Convert article to dictionary for JSON response"""
-        # Parse tags from JSON string
+    # Normalized tags, kept in sync with the JSON `tags` column by set_tags()
+    tag_entries = db.relationship('Tag', secondary=article_tags, lazy='select')
+    
+    # Plain-text preview of content, kept up to date whenever content is assigned
+    excerpt = db.Column(db.Text, nullable=True)
+    # Leading slice of notes, computed in SQL by project()
+    notes_excerpt = db.query_expression()
+    # Hash of HASH_FIELDS, kept up to date on every flush; matches backup records on restore
+    content_hash = db.Column(db.String(64), nullable=True)
+    
+    # Serializable fields: the full record, what list pages need, and everything selectable via `fields=`
+    DETAIL_FIELDS = ('id', 'title', 'url', 'content', 'notes', 'excerpt', 'tags', 'reading_date', 'is_public',
+                     'user_id', 'author', 'created_at', 'updated_at')
+    SUMMARY_FIELDS = ('id', 'title', 'url', 'excerpt', 'notes_excerpt', 'tags', 'reading_date', 'is_public',
+                      'user_id', 'author', 'created_at', 'updated_at')
+    FIELDS = ('id', 'title', 'url', 'content', 'notes', 'excerpt', 'notes_excerpt', 'tags', 'reading_date',
+              'is_public', 'user_id', 'author', 'created_at', 'updated_at')
+    # What makes two articles the same record, whatever their ids
+    HASH_FIELDS = ('title', 'url', 'content', 'reading_date')
+    
+    @classmethod
+    def hash_values(cls, values):
+        """content_hash of a mapping holding HASH_FIELDS"""
+        return fingerprint(*(values[name] for name in cls.HASH_FIELDS))
+    
+    def get_tags(self):
+        """Return tags parsed from the JSON string"""
+        return parse_tags(self.tags)
+    
+    @staticmethod
+    def clean_tags(tags):
+        """Tag names from an API value: a list, a JSON list string or a single tag"""
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags) if tags else []
+            except json.JSONDecodeError:
+                tags = [tags]
+        return [str(tag).strip() for tag in (tags or []) if str(tag).strip()]
+    
+    def set_tags(self, tags):
+        """Store tags as JSON and sync the normalized tag association"""
+        tags = self.clean_tags(tags)
+        self.tags = json.dumps(tags)
+        self.tag_entries = Tag.get_or_create_many(tags)
+    
+    @classmethod
+    def with_author(cls, query=None):
+        """Eager-load authors in the same SELECT so list serialization issues no per-row User query"""
+        query = query if query is not None else cls.query
+        return query.options(db.joinedload(cls.author))
+    
+    @staticmethod
+    def filter_by_tag(query, tag):
+        """Restrict an article query to articles carrying the given tag (indexed join)"""
+        return query.join(article_tags, article_tags.c.article_id == Article.id)\
+            .join(Tag, Tag.id == article_tags.c.tag_id)\
+            .filter(Tag.name == normalize_tag(tag))
+    
+    @classmethod
+    def project(cls, query, fields):
+        """
+        Load only the columns behind `fields`. Content and notes stay deferred
+        unless requested; the stored excerpt and a SQL slice of notes stand in.
+        """
+        # Sort keys and the author foreign key are always needed
+        columns = {'id', 'user_id', 'reading_date', 'created_at'}
+        expressions = []
+        for name in fields:
+            if name == 'notes_excerpt':
+                expressions.append(db.with_expression(cls.notes_excerpt, db.func.substr(cls.notes, 1, EXCERPT_LENGTH)))
+            elif name != 'author':
+                columns.add(name)
+        return query.options(db.load_only(*[getattr(cls, name) for name in sorted(columns)]), *expressions)
+    
+    def to_dict(self, fields=None):
+        """Convert article to dictionary for JSON response, restricted to `fields` when given"""
+        return {name: self._field_value(name) for name in (fields or self.DETAIL_FIELDS)}
+    
+    def _field_value(self, name):
+        if name == 'tags':
+            # Parse tags from JSON string
+            return self.get_tags()
+        if name == 'author':
+            return self.author.username if self.author else None
+        return getattr(self, name)
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # Normalized (lowercase) name
+    
+    @staticmethod
+    def normalize_names(names):
+        """Unique normalized tag names, in first-seen order"""
+        normalized = {}
+        for name in names:
+            key = normalize_tag(name)[:100]
+            if key:
+                normalized.setdefault(key, None)
+        return list(normalized)
+    
+    @classmethod
+    def get_or_create_many(cls, names):
+        """
+        Return Tag rows for the given names, inserting missing ones in the
+        current transaction. A concurrent request creating the same tag is
+        not an error: its row is used instead.
+        """
+        normalized = cls.normalize_names(names)
+        if not normalized:
+            return []
+        
+        with db.session.no_autoflush:
+            existing = {tag.name: tag for tag in cls.query.filter(cls.name.in_(normalized)).all()}
+            missing = [key for key in normalized if key not in existing]
+            if missing:
+                connection = db.session.connection()
+                if connection.dialect.name == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                connection.execute(
+                    insert(cls.__table__).on_conflict_do_nothing(index_elements=['name']),
+                    [{'name': key} for key in missing]
+                )
+                existing.update((tag.name, tag) for tag in cls.query.filter(cls.name.in_(missing)).all())
+        
+        return [existing[key] for key in normalized]
+
+class WeeklyRollup(db.Model):
+    """Per-user reading totals for one Monday-to-Sunday week, kept up to date by services.weekly_rollup"""
+    __tablename__ = 'weekly_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)  # Monday of the week
+    article_count = db.Column(db.Integer, nullable=False, default=0)
+    day_counts = db.Column(db.Text, nullable=False, default='[0, 0, 0, 0, 0, 0, 0]')  # JSON list, Monday first
+    tag_counts = db.Column(db.Text, nullable=False, default='{}')  # JSON object of normalized tag -> count
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def get_day_counts(self):
+        """Return the seven per-day article counts, Monday first"""
         try:
-            tags = json.loads(self.tags) if self.tags else []
+            counts = json.loads(self.day_counts) if self.day_counts else []
         except (json.JSONDecodeError, TypeError):
-            tags = []
-        
+            counts = []
+        return counts if isinstance(counts, list) and len(counts) == 7 else [0] * 7
+    
+    def get_tag_counts(self):
+        """Return {tag: count} for the week"""
+        try:
+            counts = json.loads(self.tag_counts) if self.tag_counts else {}
+        except (json.JSONDecodeError, TypeError):
+            counts = {}
+        return counts if isinstance(counts, dict) else {}
+    
+    def to_dict(self):
+        """Convert rollup to dictionary for JSON response"""
         return {
-            'id': self.id,
-            'title': self.title,
-            'url': self.url,
-            'content': self.content,
-            'notes': self.notes,
-            'tags': tags,
-            'reading_date': self.reading_date.isoformat() if self.reading_date else None,
-            'is_public': self.is_public,
             'user_id': self.user_id,
-            'author': self.author.username if self.author else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'week_start': self.week_start,
+            'article_count': self.article_count,
+            'day_counts': self.get_day_counts(),
+            'tag_counts': self.get_tag_counts()
         }
 
+class Tombstone(db.Model):
+    """Marks an article or digest deleted at deleted_at, for the change feed (see services.change_feed)"""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_user_id_deleted_at', 'user_id', 'deleted_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    record_type = db.Column(db.String(20), nullable=False)  # 'article' or 'digest'
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class DigestFragment(db.Model):
+    """One article's rendered digest section, reused when its week's draft digest is reassembled"""
+    __tablename__ = 'digest_fragments'
+    __table_args__ = (
+        db.Index('ix_digest_fragments_user_id_week_start', 'user_id', 'week_start'),
+    )
+    
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)  # Monday of the article's reading week
+    # Digest ordering key, copied from the article
+    reading_date = db.Column(db.Date, nullable=False)
+    article_created_at = db.Column(db.DateTime, nullable=True)
+    content = db.Column(db.Text, nullable=False)  # Markdown section without its position number
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Digest(db.Model):
     __tablename__ = 'digests'
+    __table_args__ = (
+        db.Index('ix_digests_is_public_is_published_week_start', 'is_public', 'is_published', 'week_start'),
+        db.Index('ix_digests_user_id_week_start', 'user_id', 'week_start'),
+        db.Index('ix_digests_user_id_content_hash', 'user_id', 'content_hash'),
+        db.Index('ix_digests_user_id_updated_at', 'user_id', 'updated_at'),
+        # At most one auto-maintained draft per user-week
+        db.Index('uq_digests_user_id_week_start_auto_draft', 'user_id', 'week_start', unique=True,
+                 sqlite_where=db.text('is_auto_draft'), postgresql_where=db.text('is_auto_draft')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -106,6 +327,8 @@ class Digest(db.Model):
     week_end = db.Column(db.Date, nullable=False)
     is_published = db.Column(db.Boolean, default=False)
     is_public = db.Column(db.Boolean, default=True)
+    # Unpublished draft kept in sync with the week's articles; cleared once the user edits or publishes it
+    is_auto_draft = db.Column(db.Boolean, nullable=False, default=False)
     
     # User relationship
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -115,20 +338,60 @@ class Digest(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     published_at = db.Column(db.DateTime, nullable=True)
     
-    def to_dict(self):
-        """Convert digest to dictionary for JSON response"""
+    # Plain-text preview of the markdown content, kept up to date whenever content is assigned
+    excerpt = db.Column(db.Text, nullable=True)
+    # Hash of HASH_FIELDS, kept up to date on every flush; matches backup records on restore
+    content_hash = db.Column(db.String(64), nullable=True)
+    
+    DETAIL_FIELDS = ('id', 'title', 'content', 'excerpt', 'summary', 'week_start', 'week_end', 'is_published', 'is_public',
+                     'is_auto_draft', 'user_id', 'author', 'created_at', 'updated_at', 'published_at')
+    SUMMARY_FIELDS = ('id', 'title', 'excerpt', 'summary', 'week_start', 'week_end', 'is_published', 'is_public',
+                      'is_auto_draft', 'user_id', 'author', 'created_at', 'updated_at', 'published_at')
+    FIELDS = ('id', 'title', 'content', 'excerpt', 'summary', 'week_start', 'week_end', 'is_published', 'is_public',
+              'is_auto_draft', 'user_id', 'author', 'created_at', 'updated_at', 'published_at')
+    HASH_FIELDS = ('title', 'content', 'week_start', 'week_end')
+    
+    @classmethod
+    def hash_values(cls, values):
+        """content_hash of a mapping holding HASH_FIELDS"""
+        return fingerprint(*(values[name] for name in cls.HASH_FIELDS))
+    
+    @classmethod
+    def with_author(cls, query=None):
+        """Eager-load authors in the same SELECT so list serialization issues no per-row User query"""
+        query = query if query is not None else cls.query
+        return query.options(db.joinedload(cls.author))
+    
+    @classmethod
+    def project(cls, query, fields):
+        """Load only the columns behind `fields`; content stays deferred unless requested, the stored excerpt stands in"""
+        # Sort keys and the author foreign key are always needed
+        columns = {'id', 'user_id', 'week_start'} | {name for name in fields if name != 'author'}
+        return query.options(db.load_only(*[getattr(cls, name) for name in sorted(columns)]))
+    
+    def to_dict(self, fields=None):
+        """Convert digest to dictionary for JSON response, restricted to `fields` when given"""
         return {
-            'id': self.id,
-            'title': self.title,
-            'content': self.content,
-            'summary': self.summary,
-            'week_start': self.week_start.isoformat() if self.week_start else None,
-            'week_end': self.week_end.isoformat() if self.week_end else None,
-            'is_published': self.is_published,
-            'is_public': self.is_public,
-            'user_id': self.user_id,
-            'author': self.author.username if self.author else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'published_at': self.published_at.isoformat() if self.published_at else None
+            name: (self.author.username if self.author else None) if name == 'author' else getattr(self, name)
+            for name in (fields or self.DETAIL_FIELDS)
         }
+
+# Excerpts are derived on assignment so every ORM write path stores them;
+# bulk Core inserts must pass make_excerpt(content) themselves.
+
+@event.listens_for(Article.content, 'set')
+@event.listens_for(Digest.content, 'set')
+def _update_excerpt(target, value, oldvalue, initiator):
+    target.excerpt = make_excerpt(value)
+
+# Content hashes are recomputed whenever a hashed field changes in a flush;
+# bulk Core inserts must pass Model.hash_values(row) themselves.
+
+@event.listens_for(Article, 'before_insert')
+@event.listens_for(Article, 'before_update')
+@event.listens_for(Digest, 'before_insert')
+@event.listens_for(Digest, 'before_update')
+def _update_content_hash(mapper, connection, target):
+    state = sa_inspect(target)
+    if state.key is None or any(state.attrs[name].history.has_changes() for name in target.HASH_FIELDS):
+        target.content_hash = target.hash_values({name: getattr(target, name) for name in target.HASH_FIELDS})
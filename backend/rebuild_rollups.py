@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Rebuild the weekly_rollups table from articles
+
+Usage:
+    python rebuild_rollups.py              # every user
+    python rebuild_rollups.py <user_id>    # a single user
+"""
+
+import os
+import sys
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from database import db
+
+def rebuild_rollups(user_id=None):
+    """Recompute weekly rollups in one transaction"""
+    app = create_app()
+
+    with app.app_context():
+        from services.weekly_rollup import rebuild_weekly_rollups
+
+        try:
+            scope = f"user {user_id}" if user_id is not None else "all users"
+            print(f"Rebuilding weekly rollups for {scope}...")
+
+            with db.engine.begin() as conn:
+                written = rebuild_weekly_rollups(conn, user_id=user_id)
+
+            print(f"Rollup rebuild completed successfully! {written} week(s) written.")
+
+        except Exception as e:
+            print(f"Error during rollup rebuild: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    success = rebuild_rollups(user_id)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Restore a reader-digest-backup .json.gz archive on the server
+
+Usage:
+    python restore_backup.py BACKUP.json.gz                  # into the account named in the backup
+    python restore_backup.py BACKUP.json.gz --user USERNAME  # into another account
+
+Records already present are updated or left alone, so an interrupted
+restore can simply be run again.
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app import create_app
+from database import db
+
+def _summary(report):
+    return ', '.join(
+        f"{section}: {counts['created']} created, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} skipped, {counts['failed']} failed"
+        for section, counts in report.items() if section != 'errors'
+    )
+
+def restore(path, username=None):
+    """Stream the archive into the database, batch by batch"""
+    app = create_app()
+
+    with app.app_context():
+        from models.models import User
+        from services.backup_restore import open_backup, restore_backup
+
+        try:
+            user_id = None
+            if username:
+                user = User.query.filter_by(username=username).first()
+                if user is None:
+                    print(f"Error: no user named {username!r}")
+                    return False
+                user_id = user.id
+
+            print(f"Restoring {path}...")
+            started = time.monotonic()
+            with open(path, 'rb') as fileobj:
+                report = restore_backup(open_backup(fileobj), user_id=user_id,
+                                        progress=lambda report: print(f"  {_summary(report)}"))
+
+            for error in report['errors']:
+                print(f"  {error['section']}[{error['index']}]: {error['error']}")
+            print(f"Restore completed in {time.monotonic() - started:.1f}s: {_summary(report)}")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error during restore: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    username = None
+    if '--user' in args:
+        position = args.index('--user')
+        username = args[position + 1] if position + 1 < len(args) else None
+        del args[position:position + 2]
+    if len(args) != 1 or ('--user' in sys.argv[1:] and not username):
+        print(__doc__)
+        sys.exit(2)
+
+    success = restore(args[0], username)
+    sys.exit(0 if success else 1)
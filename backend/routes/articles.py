@@ -1,13 +1,22 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from models.models import Article, User
 from database import db
 from datetime import datetime
 import json
 from services.url_preview import url_preview_service
+from services.article_search import search_articles
+from services.article_bulk import (
+    MAX_BULK_ARTICLES, build_article, bulk_create_articles, decode_ndjson, parse_article_data
+)
+from utils.pagination import keyset_paginate
+from utils.fields import parse_fields
 
 articles_bp = Blueprint('articles', __name__)
 
+MAX_SEARCH_PAGE_SIZE = 50
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl')
+
 @articles_bp.route('', methods=['GET'])
 def get_articles():
     """Get all public articles or user's own articles"""
@@ -33,10 +42,14 @@ def get_articles():
         user_articles_param = request.args.get('user_articles', '').lower()
         user_articles = user_articles_param in ['true', '1', 'yes']
         
-        print(f"DEBUG: user_articles_param='{user_articles_param}', user_articles={user_articles}, user_id={user_id}, view_type={view_type}")
+        # Sparse fieldset: the summary projection by default, `fields=all` for full records
+        try:
+            fields = parse_fields(request.args.get('fields'), Article.FIELDS, Article.SUMMARY_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Base query
-        query = Article.query
+        # Base query (authors are joined in so to_dict() does not lazy-load them per row)
+        query = Article.project(Article.with_author(), fields)
         
         # Check if requesting user's own articles - requires authentication
         if view_type == 'own':
@@ -71,10 +84,34 @@ def get_articles():
                 return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         if tag_filter:
-            query = query.filter(Article.tags.contains(tag_filter))
+            query = Article.filter_by_tag(query, tag_filter)
+        
+        # Cursor mode: keyset pagination on (reading_date, created_at, id), no OFFSET scan
+        if 'cursor' in request.args:
+            include_total = request.args.get('include_total', '').lower() in ['true', '1', 'yes']
+            try:
+                page_data = keyset_paginate(
+                    query,
+                    [Article.reading_date, Article.created_at, Article.id],
+                    request.args.get('cursor'),
+                    per_page,
+                    include_total=include_total
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            return jsonify({
+                'articles': [article.to_dict(fields) for article in page_data['items']],
+                'pagination': {
+                    'per_page': page_data['per_page'],
+                    'next_cursor': page_data['next_cursor'],
+                    'has_next': page_data['has_next'],
+                    'total': page_data['total']
+                }
+            }), 200
         
         # Order by reading date (most recent first)
-        query = query.order_by(Article.reading_date.desc(), Article.created_at.desc())
+        query = query.order_by(Article.reading_date.desc(), Article.created_at.desc(), Article.id.desc())
         
         # Paginate
         articles = query.paginate(
@@ -84,7 +121,7 @@ def get_articles():
         )
         
         return jsonify({
-            'articles': [article.to_dict() for article in articles.items],
+            'articles': [article.to_dict(fields) for article in articles.items],
             'pagination': {
                 'page': articles.page,
                 'per_page': articles.per_page,
@@ -98,65 +135,87 @@ def get_articles():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@articles_bp.route('', methods=['POST'])
-@jwt_required()
-def create_article():
-    """Create a new article"""
+@articles_bp.route('/search', methods=['GET'])
+def search():
+    """Full-text search over public articles, plus the user's own when authenticated"""
     try:
-        user_id = get_jwt_identity()
-        data = request.get_json()
+        user_id = None
+        try:
+            from flask_jwt_extended import verify_jwt_in_request
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception as e:
+            pass  # Not authenticated, search public articles only
         
-        print(f"DEBUG: User ID: {user_id}, type: {type(user_id)}")
+        query_text = request.args.get('q', '').strip()
+        if not query_text:
+            return jsonify({'error': 'Search query (q) is required'}), 400
         
-        # Convert user_id to integer if it's a string
-        if isinstance(user_id, str):
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_SEARCH_PAGE_SIZE)
+        own_only = request.args.get('view', 'public') == 'own'
+        
+        if user_id is not None:
             try:
                 user_id = int(user_id)
-                print(f"DEBUG: Converted user_id to int: {user_id}")
-            except ValueError:
-                print(f"DEBUG: Failed to convert user_id to int: {user_id}")
+            except (ValueError, TypeError):
                 return jsonify({'error': 'Invalid user identity'}), 401
+        elif own_only:
+            return jsonify({'error': 'Authentication required for personal articles'}), 401
         
-        print(f"DEBUG: Received data: {data}")
+        # Snippets stand in for the body: the summary projection by default, as on the list endpoint
+        try:
+            fields = parse_fields(request.args.get('fields'), Article.FIELDS, Article.SUMMARY_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Validate required fields
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-            
-        if not data.get('title'):
-            return jsonify({'error': 'Title is required'}), 400
-            
-        if not data.get('content'):
-            return jsonify({'error': 'Content is required'}), 400
+        # One extra row tells whether another page exists without a COUNT over all matches
+        results = search_articles(query_text, user_id=user_id, own_only=own_only,
+                                  limit=per_page + 1, offset=(page - 1) * per_page, fields=fields)
         
-        # Process tags - convert list to JSON string if needed
-        tags = data.get('tags', [])
-        if isinstance(tags, list):
-            tags = json.dumps(tags)
-        elif not tags:
-            tags = json.dumps([])
+        return jsonify({
+            'results': [
+                {
+                    'article': result['article'].to_dict(fields),
+                    'rank': result['rank'],
+                    'title_highlight': result['title_highlight'],
+                    'snippet': result['snippet']
+                }
+                for result in results[:per_page]
+            ],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'has_next': len(results) > per_page,
+                'has_prev': page > 1
+            }
+        }), 200
         
-        # Create new article
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@articles_bp.route('', methods=['POST'])
+@jwt_required()
+def create_article():
+    """Create a new article"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # Convert user_id to integer if it's a string
         try:
-            print(f"DEBUG: Creating article with user_id={user_id}")
-            article = Article()
-            article.title = data['title'].strip()
-            article.url = data.get('url', '').strip() if data.get('url') else None
-            article.content = data['content'].strip()
-            article.notes = data.get('notes', '').strip() if data.get('notes') else None
-            article.tags = tags
-            article.reading_date = datetime.strptime(data.get('reading_date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
-            article.is_public = data.get('is_public', True)
-            article.user_id = user_id
-            
-            print(f"DEBUG: Article object created: {article}")
-            
-            db.session.add(article)
-            db.session.commit()
-            print(f"DEBUG: Article saved successfully")
-        except Exception as create_error:
-            print(f"DEBUG: Error creating article: {create_error}")
-            raise create_error
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid user identity'}), 401
+        
+        # Validate required fields
+        try:
+            fields = parse_article_data(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        article = build_article(user_id, fields)
+        db.session.add(article)
+        db.session.commit()
         
         return jsonify({
             'message': 'Article created successfully',
@@ -167,6 +226,56 @@ def create_article():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@articles_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create():
+    """
+    Create many articles at once from a JSON array (or {"articles": [...]})
+    or an NDJSON body (Content-Type: application/x-ndjson). Every item is
+    validated first; valid ones are inserted in batched transactions and
+    failures are reported per item.
+    """
+    try:
+        try:
+            user_id = int(get_jwt_identity())
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid user identity'}), 401
+        
+        invalid = {}
+        if request.mimetype in NDJSON_MIMETYPES:
+            try:
+                items, invalid = decode_ndjson(request.stream, current_app.json.loads)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 413
+        else:
+            items = request.get_json(silent=True)
+            if isinstance(items, dict):
+                items = items.get('articles')
+            if not isinstance(items, list):
+                return jsonify({'error': 'Expected a JSON array of articles or an NDJSON body'}), 400
+            if len(items) > MAX_BULK_ARTICLES:
+                return jsonify({'error': f'At most {MAX_BULK_ARTICLES} articles per request'}), 413
+        
+        if not items:
+            return jsonify({'error': 'No articles provided'}), 400
+        
+        results = bulk_create_articles(user_id, items, invalid)
+        created = sum(1 for result in results if result['status'] == 'created')
+        failed = len(results) - created
+        
+        # 201 when everything was created, 207 for partial success
+        status = 201 if not failed else (207 if created else 400)
+        return jsonify({
+            'message': f'{created} article(s) created, {failed} failed',
+            'created': created,
+            'failed': failed,
+            'results': results
+        }), status
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @articles_bp.route('/<int:article_id>', methods=['GET'])
 def get_article(article_id):
     """Get a specific article"""
@@ -226,7 +335,7 @@ def update_article(article_id):
         if 'notes' in data:
             article.notes = data['notes']
         if 'tags' in data:
-            article.tags = json.dumps(data['tags']) if isinstance(data['tags'], list) else data['tags']
+            article.set_tags(data['tags'])
         if 'reading_date' in data:
             article.reading_date = datetime.strptime(data['reading_date'], '%Y-%m-%d').date()
         if 'is_public' in data:
@@ -293,3 +402,62 @@ def preview_url():
         
     except Exception as e:
         return jsonify({'error': f'Preview failed: {str(e)}'}), 500
+
+MAX_BATCH_PREVIEW_URLS = 50
+
+@articles_bp.route('/preview-urls', methods=['POST'])
+@jwt_required()
+def preview_urls():
+    """
+    Get URL preview metadata for many URLs, fetched concurrently.
+    
+    Returns one consolidated JSON response in input order, or, with
+    ?stream=true or Accept: application/x-ndjson, one NDJSON line per URL
+    as soon as it completes.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        urls = data.get('urls')
+        
+        if not isinstance(urls, list) or not urls:
+            return jsonify({'error': 'A non-empty list of URLs is required'}), 400
+        
+        if len(urls) > MAX_BATCH_PREVIEW_URLS:
+            return jsonify({'error': f'At most {MAX_BATCH_PREVIEW_URLS} URLs per request'}), 400
+        
+        urls = [str(url).strip() for url in urls]
+        
+        stream = request.args.get('stream', '').lower() in ['true', '1', 'yes'] \
+            or request.accept_mimetypes.best == 'application/x-ndjson'
+        
+        if stream:
+            def generate():
+                for index, preview in url_preview_service.get_previews(urls):
+                    yield json.dumps({'index': index, 'url': urls[index], 'preview': preview}) + '\n'
+            
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        results = [None] * len(urls)
+        for index, preview in url_preview_service.get_previews(urls):
+            results[index] = {'url': urls[index], 'preview': preview}
+        
+        return jsonify({'results': results}), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Preview failed: {str(e)}'}), 500
+
+@articles_bp.route('/preview-cache/stats', methods=['GET'])
+@jwt_required()
+def preview_cache_stats():
+    """Get URL preview cache statistics (admin only)"""
+    try:
+        user = current_user
+        
+        if not user or not user.is_admin:
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        cache = url_preview_service.cache
+        return jsonify({'stats': cache.stats() if cache else None}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, current_user
 from models.models import User
 from database import db
 from werkzeug.security import check_password_hash
@@ -155,8 +155,8 @@ def google_oauth():
 def get_current_user():
     """Get current user information"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
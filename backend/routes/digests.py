@@ -4,10 +4,15 @@ from models.models import Digest, User
 from database import db
 from datetime import datetime, timedelta
 from services.weekly_digest_service import WeeklyDigestService
+from utils.pagination import keyset_paginate
+from utils.fields import parse_fields
 from typing import Optional
 import json
 
 digests_bp = Blueprint('digests', __name__)
+
+MAX_AVAILABLE_WEEKS = 260  # Five years of weekly buckets per request
+
 def _get_current_user_id() -> Optional[int]:
     """Return the current JWT identity coerced to an int when possible."""
     identity = get_jwt_identity()
@@ -37,8 +42,14 @@ def get_digests():
             if view_type == 'own':
                 return jsonify({'error': 'Authentication required to view personal digests'}), 401
         
-        # Base query
-        query = Digest.query
+        # Sparse fieldset: the summary projection by default, `fields=all` for full records
+        try:
+            fields = parse_fields(request.args.get('fields'), Digest.FIELDS, Digest.SUMMARY_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Base query (authors are joined in so to_dict() does not lazy-load them per row)
+        query = Digest.project(Digest.with_author(), fields)
         
         if view_type == 'own':
             if not user_id:
@@ -53,8 +64,32 @@ def get_digests():
         if user_filter:
             query = query.filter_by(user_id=user_filter)
         
+        # Cursor mode: keyset pagination on (week_start, id), no OFFSET scan
+        if 'cursor' in request.args:
+            include_total = request.args.get('include_total', '').lower() in ['true', '1', 'yes']
+            try:
+                page_data = keyset_paginate(
+                    query,
+                    [Digest.week_start, Digest.id],
+                    request.args.get('cursor'),
+                    per_page,
+                    include_total=include_total
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            return jsonify({
+                'digests': [digest.to_dict(fields) for digest in page_data['items']],
+                'pagination': {
+                    'per_page': page_data['per_page'],
+                    'next_cursor': page_data['next_cursor'],
+                    'has_next': page_data['has_next'],
+                    'total': page_data['total']
+                }
+            }), 200
+        
         # Order by week start date (most recent first)
-        query = query.order_by(Digest.week_start.desc())
+        query = query.order_by(Digest.week_start.desc(), Digest.id.desc())
         
         # Paginate
         digests = query.paginate(
@@ -64,7 +99,7 @@ def get_digests():
         )
         
         return jsonify({
-            'digests': [digest.to_dict() for digest in digests.items],
+            'digests': [digest.to_dict(fields) for digest in digests.items],
             'pagination': {
                 'page': digests.page,
                 'per_page': digests.per_page,
@@ -117,6 +152,11 @@ def create_digest():
         if digest.is_published:
             digest.published_at = datetime.utcnow()
         
+        # The saved digest supersedes the week's auto-maintained draft (deleted one by one so it leaves a tombstone)
+        for draft in Digest.query.filter_by(user_id=user_id, week_start=week_start, is_auto_draft=True,
+                                            is_published=False):
+            db.session.delete(draft)
+        
         db.session.add(digest)
         db.session.commit()
         
@@ -188,6 +228,11 @@ def update_digest(digest_id):
         if 'is_public' in data:
             digest.is_public = data['is_public']
         
+        # Once the user edits or publishes a draft it is no longer regenerated from articles
+        if any(field in data for field in ('title', 'content', 'summary', 'week_start', 'week_end')) \
+                or data.get('is_published'):
+            digest.is_auto_draft = False
+        
         # Handle publish/unpublish
         if 'is_published' in data:
             if data['is_published'] and not digest.is_published:
@@ -273,14 +318,22 @@ def get_available_weeks():
         user_id = _get_current_user_id()
         if user_id is None:
             return jsonify({'error': 'Invalid user identity'}), 401
-        limit = request.args.get('limit', 12, type=int)
+        limit = min(max(request.args.get('limit', 12, type=int), 1), MAX_AVAILABLE_WEEKS)
+        before = request.args.get('before')
+        if before:
+            try:
+                before = datetime.strptime(before, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Invalid before date, expected YYYY-MM-DD'}), 400
         
         digest_service = WeeklyDigestService()
-        available_weeks = digest_service.get_available_weeks(user_id, limit)
+        available_weeks = digest_service.get_available_weeks(user_id, limit, before=before)
         
         return jsonify({
             'available_weeks': available_weeks,
-            'total_weeks': len(available_weeks)
+            'total_weeks': len(available_weeks),
+            # Pass back as ?before= to load older weeks
+            'next_before': available_weeks[-1]['week_start'] if len(available_weeks) == limit else None
         }), 200
         
     except Exception as e:
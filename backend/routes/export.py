@@ -1,65 +1,122 @@
-import json
-import gzip
-import io
+import zlib
 from datetime import datetime
-from flask import Blueprint, send_file, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.models import Article, Digest, User
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
+from models.models import Article, Digest
 from database import db
+from services.backup_restore import open_backup, restore_backup
 
 export_bp = Blueprint('export_bp', __name__)
 
+EXPORT_FORMAT_VERSION = "1.0.0"
+EXPORT_BATCH_SIZE = 500  # Rows fetched per round trip from the server-side cursor
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # zlib stream with a gzip header and trailer
+
+def iter_backup_json(user, articles_query, digests_query, dumps=None):
+    """
+    Serialize a backup document incrementally.
+
+    Yields the header, then one JSON object per article and digest as rows
+    arrive from the cursor, so only a single record is held in memory.
+    Records are encoded with the app's JSON provider unless dumps is given.
+    """
+    dumps = dumps or current_app.json.dumps
+    header = {
+        "version": EXPORT_FORMAT_VERSION,
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email
+        }
+    }
+    # Re-open the header object so the record arrays can be appended to it
+    yield dumps(header)[:-1]
+
+    for name, query in (("articles", articles_query), ("digests", digests_query)):
+        yield f', "{name}": ['
+        separator = "\n"
+        for record in query.yield_per(EXPORT_BATCH_SIZE):
+            yield separator + dumps(record.to_dict())
+            separator = ",\n"
+        yield "\n]"
+
+    yield "}\n"
+
+def iter_gzip(chunks, level=6):
+    """Compress text chunks on the fly into a gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if first:
+            # Flush the gzip header and first record right away for a fast first byte
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
+
 @export_bp.route('/admin/export', methods=['GET'])
 @jwt_required()
 def export_user_data():
     """
     Exports all articles and digests for the current user into a compressed JSON file.
+
+    The archive is streamed as a chunked response while rows are read from
+    the database, so memory stays flat regardless of library size.
     """
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user._get_current_object()
 
         if not user:
             return jsonify({"msg": "User not found"}), 404
 
-        # Fetch all data for the user
-        articles = Article.query.filter_by(user_id=user_id).order_by(Article.created_at.desc()).all()
-        digests = Digest.query.filter_by(user_id=user_id).order_by(Digest.created_at.desc()).all()
-
-        # Prepare data for serialization
-        backup_data = {
-            "version": "1.0.0",
-            "exported_at": datetime.utcnow().isoformat() + "Z",
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email
-            },
-            "articles": [article.to_dict() for article in articles],
-            "digests": [digest.to_dict() for digest in digests]
-        }
-
-        # Convert to JSON and compress using gzip
-        json_str = json.dumps(backup_data, indent=2)
-        json_bytes = json_str.encode('utf-8')
-
-        buffer = io.BytesIO()
-        with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
-            f.write(json_bytes)
-        
-        buffer.seek(0)
+        # Stream all data for the user
+        articles_query = Article.with_author().filter_by(user_id=user.id).order_by(Article.created_at.desc())
+        digests_query = Digest.with_author().filter_by(user_id=user.id).order_by(Digest.created_at.desc())
 
         # Create a filename
         timestamp = datetime.utcnow().strftime('%Y-%m-%d')
         filename = f"reader-digest-backup-{user.username}-{timestamp}.json.gz"
 
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/gzip'
+        return Response(
+            stream_with_context(iter_gzip(iter_backup_json(user, articles_query, digests_query))),
+            mimetype='application/gzip',
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'no-store'
+            }
         )
 
     except Exception as e:
         # Log the exception e
-        return jsonify({"msg": "An error occurred during export."}), 500
\ No newline at end of file
+        return jsonify({"msg": "An error occurred during export."}), 500
+
+@export_bp.route('/admin/import', methods=['POST'])
+@jwt_required()
+def import_user_data():
+    """
+    Restores a reader-digest-backup .json.gz into the current user's account.
+
+    The archive is sent as the raw request body (Content-Type:
+    application/gzip) or as the "file" field of a multipart upload. It is
+    decompressed and parsed as it is read and written in batches; records
+    already present are updated or left alone, so repeating a restore is safe.
+    """
+    user = current_user._get_current_object()
+    if not user:
+        return jsonify({"msg": "User not found"}), 404
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    try:
+        report = restore_backup(open_backup(stream), user_id=user.id)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("Backup restore failed")
+        return jsonify({"msg": "An error occurred during import."}), 500
+
+    return jsonify(dict(report, msg="Backup restored")), 200
@@ -0,0 +1,43 @@
+from flask import Blueprint, Response, jsonify, request, send_file
+from flask_jwt_extended import jwt_required, current_user
+from services.request_profiler import list_profiles, profile_path, render_profile
+
+profiles_bp = Blueprint('profiles', __name__)
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+def _admin_required():
+    if not current_user or not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    return None
+
+@profiles_bp.route('', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """List stored request profiles, newest first (admin only)"""
+    denied = _admin_required()
+    if denied:
+        return denied
+    return jsonify({'profiles': list_profiles()}), 200
+
+@profiles_bp.route('/<profile_id>', methods=['GET'])
+@jwt_required()
+def get_profile(profile_id):
+    """Download a stored profile as a pstats file, or as a text report with ?format=text (admin only)"""
+    denied = _admin_required()
+    if denied:
+        return denied
+
+    path = profile_path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in SORT_KEYS:
+            return jsonify({'error': f"sort must be one of: {', '.join(SORT_KEYS)}"}), 400
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        return Response(render_profile(path, sort, limit), mimetype='text/plain')
+
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
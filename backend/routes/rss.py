@@ -1,46 +1,48 @@
-from flask import Blueprint, Response, request, url_for
-from models.models import Article, User
+from flask import Blueprint, Response, current_app, request, stream_with_context, url_for
+from models.models import Article, User, normalize_tag, parse_tags
+from services.feed_cache import get_feed_cache
 from database import db
+from utils.excerpt import make_excerpt
 from datetime import datetime
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+from xml.sax.saxutils import escape, quoteattr
 import html
+import re
 
 rss_bp = Blueprint('rss', __name__)
 
+FEED_CACHE_CONTROL = 'public, max-age=3600'  # Cache for 1 hour
+FEED_BATCH_SIZE = 100  # Rows fetched from the database cursor at a time
+DEFAULT_FEED_LIMIT = 50
+
+def _feed_limit():
+    """Read ?limit=, clamped to 1..RSS_MAX_LIMIT"""
+    limit = request.args.get('limit', DEFAULT_FEED_LIMIT, type=int)
+    return max(1, min(limit, current_app.config.get('RSS_MAX_LIMIT', 200)))
+
 @rss_bp.route('/articles.xml')
 def articles_rss_feed():
     """Generate RSS feed for public articles"""
     try:
         # Get query parameters for filtering
-        limit = request.args.get('limit', 50, type=int)  # Default to 50 articles
+        limit = _feed_limit()
         user_id = request.args.get('user_id', type=int)
         tag = request.args.get('tag')
         
-        # Build query for public articles
-        query = Article.query.filter_by(is_public=True)
-        
-        # Apply filters
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        
-        if tag:
-            query = query.filter(Article.tags.contains(tag))
+        def build_query():
+            # Build query for public articles
+            query = Article.with_author().filter_by(is_public=True)
+            
+            # Apply filters
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+            
+            if tag:
+                query = Article.filter_by_tag(query, tag)
+            
+            # Order by most recent and limit results
+            return query.order_by(Article.created_at.desc()).limit(limit)
         
-        # Order by most recent and limit results
-        articles = query.order_by(Article.created_at.desc()).limit(limit).all()
-        
-        # Generate RSS XML
-        rss_xml = generate_rss_xml(articles, user_id, tag)
-        
-        return Response(
-            rss_xml,
-            mimetype='application/rss+xml',
-            headers={
-                'Content-Type': 'application/rss+xml; charset=utf-8',
-                'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
-            }
-        )
+        return cached_feed_response('articles', user_id, tag, limit, build_query)
         
     except Exception as e:
         print(f"RSS Feed Error: {str(e)}")
@@ -54,26 +56,17 @@ def articles_rss_feed():
 def user_articles_rss_feed(user_id):
     """Generate RSS feed for a specific user's public articles"""
     try:
-        # Build query for specific user's public articles
-        query = Article.query.filter_by(is_public=True, user_id=user_id)
-        
         # Get limit from query params
-        limit = request.args.get('limit', 50, type=int)
+        limit = _feed_limit()
         
-        # Order by most recent and limit results
-        articles = query.order_by(Article.created_at.desc()).limit(limit).all()
+        def build_query():
+            # Build query for specific user's public articles
+            query = Article.with_author().filter_by(is_public=True, user_id=user_id)
+            
+            # Order by most recent and limit results
+            return query.order_by(Article.created_at.desc()).limit(limit)
         
-        # Generate RSS XML
-        rss_xml = generate_rss_xml(articles, user_id, None)
-        
-        return Response(
-            rss_xml,
-            mimetype='application/rss+xml',
-            headers={
-                'Content-Type': 'application/rss+xml; charset=utf-8',
-                'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
-            }
-        )
+        return cached_feed_response('user', user_id, None, limit, build_query)
         
     except Exception as e:
         print(f"User RSS Feed Error: {str(e)}")
@@ -87,26 +80,17 @@ def user_articles_rss_feed(user_id):
 def tag_articles_rss_feed(tag):
     """Generate RSS feed for articles with a specific tag"""
     try:
-        # Build query for articles with specific tag
-        query = Article.query.filter_by(is_public=True).filter(Article.tags.contains(tag))
-        
         # Get limit from query params
-        limit = request.args.get('limit', 50, type=int)
+        limit = _feed_limit()
         
-        # Order by most recent and limit results
-        articles = query.order_by(Article.created_at.desc()).limit(limit).all()
+        def build_query():
+            # Build query for articles with specific tag
+            query = Article.filter_by_tag(Article.with_author().filter_by(is_public=True), tag)
+            
+            # Order by most recent and limit results
+            return query.order_by(Article.created_at.desc()).limit(limit)
         
-        # Generate RSS XML
-        rss_xml = generate_rss_xml(articles, None, tag)
-        
-        return Response(
-            rss_xml,
-            mimetype='application/rss+xml',
-            headers={
-                'Content-Type': 'application/rss+xml; charset=utf-8',
-                'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
-            }
-        )
+        return cached_feed_response('tag', None, tag, limit, build_query)
         
     except Exception as e:
         print(f"Tag RSS Feed Error: {str(e)}")
@@ -116,161 +100,217 @@ def tag_articles_rss_feed(tag):
             status=500
         )
 
-def generate_rss_xml(articles, user_id=None, tag=None):
-    """Generate RSS 2.0 XML for articles"""
+def cached_feed_response(route, user_id, tag, limit, build_query):
+    """
+    Serve a feed from the feed cache, rendering and caching it on a miss.
+    
+    Every 200 carries an ETag and Last-Modified, the first one included.
+    Conditional requests (If-None-Match / If-Modified-Since) that match the
+    entry get a 304, and clients accepting gzip get the pre-compressed body.
+    Without a feed cache the feed is streamed instead.
+    """
+    tag_key = normalize_tag(tag) if tag else None
+    key = (route, request.url_root, user_id, tag_key, limit)
+    self_url = _feed_self_url(user_id, tag_key, limit)
+    
+    cache = get_feed_cache()
+    if cache is None:
+        return stream_feed_response(build_query(), user_id, tag, self_url)
+    
+    entry = cache.get(key)
+    if entry is None:
+        # Writes committed from here on may be missing from this render; set() then skips storing it
+        generation = cache.generation
+        # The cached copy is held whole anyway, so render it before answering
+        body = generate_rss_xml(build_query().yield_per(FEED_BATCH_SIZE), user_id, tag, self_url).encode('utf-8')
+        entry = cache.set(key, body, user_id=user_id, tag=tag_key, generation=generation)
+    
+    headers = {
+        'Cache-Control': FEED_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding'
+    }
+    response = Response(status=200, headers=headers)
+    response.set_etag(entry.etag, weak=True)
+    response.last_modified = entry.last_modified
+    
+    not_modified = request.if_none_match.contains_weak(entry.etag) if request.if_none_match \
+        else (request.if_modified_since is not None and request.if_modified_since >= entry.last_modified)
+    if not_modified:
+        response.status_code = 304
+        return response
     
-    # Create root RSS element
-    rss = ET.Element('rss')
-    rss.set('version', '2.0')
-    rss.set('xmlns:content', 'http://purl.org/rss/1.0/modules/content/')
-    rss.set('xmlns:atom', 'http://www.w3.org/2005/Atom')
+    response.content_type = 'application/rss+xml; charset=utf-8'
+    if 'gzip' in request.accept_encodings:
+        response.set_data(entry.gzip_body)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(entry.body)
+    return response
+
+def _feed_self_url(user_id, tag_key, limit):
+    """
+    The feed's atom:link self URL, built only from the parameters in its
+    cache key, so every request served the same cached body agrees with it.
+    """
+    args = dict(request.view_args or {})
+    if user_id:
+        args['user_id'] = user_id
+    if tag_key:
+        args['tag'] = tag_key
+    if limit != DEFAULT_FEED_LIMIT:
+        args['limit'] = limit
+    return url_for(request.endpoint, _external=True, **args)
+
+def stream_feed_response(query, user_id, tag, self_url):
+    """Stream a feed while the database cursor produces rows"""
+    # Start the query now so database errors surface before streaming begins
+    articles = iter(query.yield_per(FEED_BATCH_SIZE))
+    
+    def generate():
+        for chunk in iter_rss_xml(articles, user_id, tag, self_url):
+            yield chunk.encode('utf-8')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/rss+xml',
+        headers={
+            'Content-Type': 'application/rss+xml; charset=utf-8',
+            'Cache-Control': FEED_CACHE_CONTROL,
+            'Vary': 'Accept-Encoding'
+        }
+    )
+
+# Characters that are not allowed anywhere in an XML 1.0 document
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+def _xml_text(value):
+    return escape(_INVALID_XML_CHARS.sub('', str(value)))
+
+def _xml_element(name, text, indent, attrs=None):
+    """Serialize one leaf element on its own line"""
+    attr_str = ''.join(f' {key}={quoteattr(_INVALID_XML_CHARS.sub("", str(val)))}' for key, val in (attrs or {}).items())
+    if text is None or text == '':
+        return f"{indent}<{name}{attr_str}/>\n"
+    return f"{indent}<{name}{attr_str}>{_xml_text(text)}</{name}>\n"
+
+def iter_rss_xml(articles, user_id=None, tag=None, self_url=None):
+    """
+    Generate RSS 2.0 XML for articles incrementally.
     
-    # Create channel
-    channel = ET.SubElement(rss, 'channel')
+    Yields the channel header, then one chunk per article as `articles` is
+    iterated, then the closing tags, so only one item is held in memory.
+    `self_url` is the atom:link self reference (default: the request URL).
+    """
+    root_url = request.url_root.rstrip('/')
     
     # Channel metadata
     title_text = "Reader Digest - Public Articles"
+    user = None
     if user_id:
         # Get user name for filtered feed
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if user:
             title_text = f"Reader Digest - Articles by {user.first_name or user.username}"
     elif tag:
         title_text = f"Reader Digest - Articles tagged '{tag}'"
     
-    title = ET.SubElement(channel, 'title')
-    title.text = title_text
-    
-    link = ET.SubElement(channel, 'link')
-    link.text = request.url_root.rstrip('/') + '/public/articles'
-    
-    description = ET.SubElement(channel, 'description')
     if user_id:
-        user = User.query.get(user_id)
-        description.text = f"Latest articles shared by {user.first_name or user.username if user else 'Unknown User'} on Reader Digest"
+        description_text = f"Latest articles shared by {user.first_name or user.username if user else 'Unknown User'} on Reader Digest"
     elif tag:
-        description.text = f"Latest articles tagged with '{tag}' on Reader Digest"
+        description_text = f"Latest articles tagged with '{tag}' on Reader Digest"
     else:
-        description.text = "Latest articles shared by the Reader Digest community - discover what others are reading and their thoughts"
-    
-    language = ET.SubElement(channel, 'language')
-    language.text = 'en-us'
-    
-    last_build_date = ET.SubElement(channel, 'lastBuildDate')
-    last_build_date.text = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
-    
-    generator = ET.SubElement(channel, 'generator')
-    generator.text = 'Reader Digest RSS Feed Generator'
+        description_text = "Latest articles shared by the Reader Digest community - discover what others are reading and their thoughts"
     
-    # Add atom:link for self-reference
-    atom_link = ET.SubElement(channel, 'atom:link')
-    atom_link.set('href', request.url)
-    atom_link.set('rel', 'self')
-    atom_link.set('type', 'application/rss+xml')
+    indent = '    '
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:atom="http://www.w3.org/2005/Atom">\n'
+        '  <channel>\n'
+        + _xml_element('title', title_text, indent)
+        + _xml_element('link', root_url + '/public/articles', indent)
+        + _xml_element('description', description_text, indent)
+        + _xml_element('language', 'en-us', indent)
+        + _xml_element('lastBuildDate', datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT'), indent)
+        + _xml_element('generator', 'Reader Digest RSS Feed Generator', indent)
+        # Add atom:link for self-reference
+        + _xml_element('atom:link', None, indent, {'href': self_url or request.url, 'rel': 'self', 'type': 'application/rss+xml'})
+    )
     
     # Add articles as items
     for article in articles:
-        item = ET.SubElement(channel, 'item')
-        
-        # Item title
-        item_title = ET.SubElement(item, 'title')
-        item_title.text = html.escape(article.title)
-        
-        # Item link
-        item_link = ET.SubElement(item, 'link')
-        article_url = request.url_root.rstrip('/') + f'/articles/{article.id}'
-        item_link.text = article_url
-        
-        # Item description (notes + content preview)
-        item_description = ET.SubElement(item, 'description')
-        description_text = ""
-        
-        if article.notes:
-            description_text += f"<p><strong>Notes:</strong> {html.escape(article.notes)}</p>"
-        
-        if article.content:
-            # Truncate content for description
-            content_preview = article.content[:300] + "..." if len(article.content) > 300 else article.content
-            description_text += f"<p><strong>Content:</strong> {html.escape(content_preview)}</p>"
-        
-        if article.url:
-            description_text += f"<p><strong>Original URL:</strong> <a href='{html.escape(article.url)}'>{html.escape(article.url)}</a></p>"
-        
-        # Add tags
-        if article.tags:
-            try:
-                import json
-                tags = json.loads(article.tags) if isinstance(article.tags, str) else article.tags
-                if tags:
-                    tags_text = ", ".join([html.escape(str(tag)) for tag in tags])
-                    description_text += f"<p><strong>Tags:</strong> {tags_text}</p>"
-            except:
-                pass
-        
-        item_description.text = description_text
-        
-        # Full content in content:encoded
-        content_encoded = ET.SubElement(item, 'content:encoded')
-        full_content = ""
-        if article.content:
-            full_content += f"<h3>Content</h3><div>{html.escape(article.content)}</div>"
-        if article.notes:
-            full_content += f"<h3>Notes</h3><div>{html.escape(article.notes)}</div>"
-        if article.url:
-            full_content += f"<h3>Original Article</h3><p><a href='{html.escape(article.url)}'>{html.escape(article.url)}</a></p>"
-        content_encoded.text = full_content
-        
-        # Author
-        item_author = ET.SubElement(item, 'author')
-        author_name = article.author.first_name or article.author.username if article.author else "Unknown"
-        item_author.text = f"noreply@readerdigest.com ({html.escape(author_name)})"
-        
-        # Publication date
-        pub_date = ET.SubElement(item, 'pubDate')
-        pub_date.text = article.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
-        
-        # Unique identifier
-        guid = ET.SubElement(item, 'guid')
-        guid.set('isPermaLink', 'true')
-        guid.text = article_url
-        
-        # Categories (tags)
-        if article.tags:
-            try:
-                import json
-                tags = json.loads(article.tags) if isinstance(article.tags, str) else article.tags
-                if tags:
-                    for tag in tags:
-                        category = ET.SubElement(item, 'category')
-                        category.text = html.escape(str(tag))
-            except:
-                pass
+        yield _rss_item(article, root_url)
     
-    # Convert to pretty XML string
-    xml_str = ET.tostring(rss, encoding='unicode')
-    dom = minidom.parseString(xml_str)
-    return dom.toprettyxml(indent='  ', encoding='utf-8').decode('utf-8')
+    yield '  </channel>\n</rss>\n'
 
-def generate_error_rss():
-    """Generate error RSS feed"""
-    rss = ET.Element('rss')
-    rss.set('version', '2.0')
+def _rss_item(article, root_url):
+    """Serialize a single <item> element"""
+    indent = '      '
+    article_url = root_url + f'/articles/{article.id}'
+    tags = parse_tags(article.tags) if isinstance(article.tags, str) else (article.tags or [])
     
-    channel = ET.SubElement(rss, 'channel')
+    # Item description (notes + content preview)
+    description_text = ""
     
-    title = ET.SubElement(channel, 'title')
-    title.text = "Reader Digest RSS - Error"
+    if article.notes:
+        description_text += f"<p><strong>Notes:</strong> {html.escape(article.notes)}</p>"
     
-    description = ET.SubElement(channel, 'description')
-    description.text = "An error occurred while generating the RSS feed"
+    # Stored plain-text excerpt; rows not yet backfilled fall back to computing it
+    content_preview = article.excerpt or make_excerpt(article.content)
+    if content_preview:
+        description_text += f"<p><strong>Content:</strong> {html.escape(content_preview)}</p>"
     
-    item = ET.SubElement(channel, 'item')
-    item_title = ET.SubElement(item, 'title')
-    item_title.text = "RSS Feed Error"
+    if article.url:
+        description_text += f"<p><strong>Original URL:</strong> <a href='{html.escape(article.url)}'>{html.escape(article.url)}</a></p>"
     
-    item_description = ET.SubElement(item, 'description')
-    item_description.text = "There was an error generating the RSS feed. Please try again later."
+    # Add tags
+    if tags:
+        tags_text = ", ".join([html.escape(str(tag)) for tag in tags])
+        description_text += f"<p><strong>Tags:</strong> {tags_text}</p>"
     
-    xml_str = ET.tostring(rss, encoding='unicode')
-    dom = minidom.parseString(xml_str)
-    return dom.toprettyxml(indent='  ', encoding='utf-8').decode('utf-8')
\ No newline at end of file
+    # Full content in content:encoded
+    full_content = ""
+    if article.content:
+        full_content += f"<h3>Content</h3><div>{html.escape(article.content)}</div>"
+    if article.notes:
+        full_content += f"<h3>Notes</h3><div>{html.escape(article.notes)}</div>"
+    if article.url:
+        full_content += f"<h3>Original Article</h3><p><a href='{html.escape(article.url)}'>{html.escape(article.url)}</a></p>"
+    
+    author_name = article.author.first_name or article.author.username if article.author else "Unknown"
+    
+    parts = [
+        '    <item>\n',
+        _xml_element('title', html.escape(article.title), indent),
+        _xml_element('link', article_url, indent),
+        _xml_element('description', description_text, indent),
+        _xml_element('content:encoded', full_content, indent),
+        _xml_element('author', f"noreply@readerdigest.com ({html.escape(author_name)})", indent),
+        _xml_element('pubDate', article.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT'), indent),
+        # Unique identifier
+        f"{indent}<guid isPermaLink=\"true\">{_xml_text(article_url)}</guid>\n",
+    ]
+    # Categories (tags)
+    for tag in tags:
+        parts.append(_xml_element('category', html.escape(str(tag)), indent))
+    parts.append('    </item>\n')
+    return ''.join(parts)
+
+def generate_rss_xml(articles, user_id=None, tag=None, self_url=None):
+    """Generate RSS 2.0 XML for articles as a single string"""
+    return ''.join(iter_rss_xml(articles, user_id, tag, self_url))
+
+def generate_error_rss():
+    """Generate error RSS feed"""
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0">\n'
+        '  <channel>\n'
+        '    <title>Reader Digest RSS - Error</title>\n'
+        '    <description>An error occurred while generating the RSS feed</description>\n'
+        '    <item>\n'
+        '      <title>RSS Feed Error</title>\n'
+        '      <description>There was an error generating the RSS feed. Please try again later.</description>\n'
+        '    </item>\n'
+        '  </channel>\n'
+        '</rss>\n'
+    )
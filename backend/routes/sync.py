@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.change_feed import DEFAULT_CHANGES_LIMIT, STREAMS, fetch_changes
+from utils.pagination import decode_cursor_payload, encode_cursor
+
+sync_bp = Blueprint('sync', __name__)
+
+def _decode_position(cursor: str):
+    """(changed_at, stream rank, id) from a cursor written by get_changes(); ValueError if it was not"""
+    payload = decode_cursor_payload(cursor)
+    if len(payload) != 3:
+        raise ValueError('Invalid cursor')
+    changed_at, rank, last_id = payload
+    if not isinstance(changed_at, str):
+        raise ValueError('Invalid cursor')
+    try:
+        changed_at = datetime.fromisoformat(changed_at)
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    # bool is an int to isinstance(); a rank past the last stream marks a plain watermark
+    if (type(rank) is not int or rank not in range(len(STREAMS) + 1)
+            or type(last_id) is not int or last_id < 0):
+        raise ValueError('Invalid cursor')
+    return changed_at, rank, last_id
+
+def _parse_position(cursor, since):
+    """(changed_at, stream rank, id) to resume after, from a cursor or an ISO `since` watermark"""
+    if cursor:
+        return _decode_position(cursor)
+    if since:
+        try:
+            watermark = datetime.fromisoformat(since)
+        except ValueError:
+            raise ValueError('Invalid since timestamp. Use ISO 8601')
+        if watermark.tzinfo is not None:
+            watermark = watermark.astimezone(timezone.utc).replace(tzinfo=None)
+        # Past every stream: only changes strictly after the watermark
+        return watermark, len(STREAMS), 0
+    return None
+
+@sync_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """
+    Changes to the current user's articles and digests, oldest first.
+
+    Pass the `next_cursor` of the previous response as `cursor` (or an ISO
+    `since` timestamp) to receive only what changed after it; without either
+    the whole library is returned page by page. Updated records carry their
+    full representation, deleted ones come back as tombstones.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid user identity'}), 401
+
+    try:
+        position = _parse_position(request.args.get('cursor'), request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Timestamps are taken before commit, so the newest ones may still be joined by slower writers
+    until = datetime.utcnow() - timedelta(seconds=current_app.config['SYNC_SETTLE_SECONDS'])
+    feed = fetch_changes(user_id, position, until, request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int))
+
+    changes = []
+    for change in feed['changes']:
+        row = change['row']
+        if change['stream'] == 'tombstone':
+            changes.append({'type': row.record_type, 'id': row.record_id, 'deleted': True,
+                            'changed_at': change['changed_at']})
+        else:
+            changes.append({'type': change['stream'], 'id': row.id, 'deleted': False,
+                            'changed_at': change['changed_at'], 'record': row.to_dict()})
+
+    return jsonify({
+        'changes': changes,
+        'next_cursor': encode_cursor(feed['position']) if feed['position'] is not None else None,
+        'has_more': feed['has_more']
+    }), 200
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from models.models import User
 from database import db
 
@@ -75,8 +75,8 @@ def get_user(user_id):
 def get_profile():
     """Get current user's full profile"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -91,8 +91,8 @@ def get_profile():
 def update_profile():
     """Update current user's profile"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -108,7 +108,7 @@ def update_profile():
             # Check if email is already taken by another user
             existing_user = User.query.filter(
                 User.email == data['email'],
-                User.id != user_id
+                User.id != user.id
             ).first()
             if existing_user:
                 return jsonify({'error': 'Email already in use by another user'}), 400
@@ -130,8 +130,8 @@ def update_profile():
 def change_password():
     """Change user's password"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -161,8 +161,8 @@ def change_password():
 def deactivate_account():
     """Deactivate user's account"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Resolved once per request by the JWT user loader
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
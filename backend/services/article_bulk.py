@@ -0,0 +1,226 @@
+"""
+Bulk Article Creation
+Creates many articles from one request. Every item is validated before
+anything is written; valid items are then inserted in chunked transactions
+with executemany statements instead of one ORM object per article. The
+work the ORM flush hooks would do (weekly rollups, feed cache, draft
+digests) is applied per chunk, and draft digests are reassembled once at
+the end. Failures are reported per item and never abort the rest.
+"""
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+from models.models import Article, Tag, article_tags
+from services.draft_digest import defer_draft_refresh, mark_articles_changed
+from services.feed_cache import invalidate_on_commit
+from services.weekly_rollup import record_inserted_articles
+from utils.excerpt import make_excerpt
+
+MAX_BULK_ARTICLES = 10000  # Items accepted per request
+BULK_BATCH_SIZE = 1000  # Articles per transaction
+
+def _optional_text(data: Dict, key: str) -> Optional[str]:
+    value = data.get(key)
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'{key.capitalize()} must be a string')
+    return value.strip() or None
+
+def parse_article_data(data) -> Dict:
+    """
+    Validate an article payload and return its column values.
+
+    Raises:
+        ValueError: with a message suitable for the API client
+    """
+    if not data:
+        raise ValueError('No data provided')
+    if not isinstance(data, dict):
+        raise ValueError('Article must be a JSON object')
+
+    title = data.get('title')
+    if not title or not isinstance(title, str) or not title.strip():
+        raise ValueError('Title is required')
+    content = data.get('content')
+    if not content or not isinstance(content, str) or not content.strip():
+        raise ValueError('Content is required')
+
+    tags = data.get('tags', [])
+    if tags is not None and not isinstance(tags, (list, str)):
+        raise ValueError('Tags must be a list')
+
+    reading_date = data.get('reading_date')
+    if reading_date:
+        try:
+            reading_date = datetime.strptime(str(reading_date), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Invalid reading_date format. Use YYYY-MM-DD')
+    else:
+        reading_date = datetime.now().date()
+
+    is_public = data.get('is_public', True)
+    if not isinstance(is_public, bool):
+        raise ValueError('is_public must be true or false')
+
+    return {
+        'title': title.strip(),
+        'url': _optional_text(data, 'url'),
+        'content': content.strip(),
+        'notes': _optional_text(data, 'notes'),
+        'tags': tags,
+        'reading_date': reading_date,
+        'is_public': is_public
+    }
+
+def build_article(user_id: int, fields: Dict) -> Article:
+    """Create an Article (not yet added to the session) from parse_article_data() output"""
+    article = Article(
+        title=fields['title'],
+        url=fields['url'],
+        content=fields['content'],
+        notes=fields['notes'],
+        reading_date=fields['reading_date'],
+        is_public=fields['is_public'],
+        user_id=user_id
+    )
+    article.set_tags(fields['tags'])
+    # Kept from the original record when restoring a backup
+    if fields.get('created_at'):
+        article.created_at = fields['created_at']
+    return article
+
+def decode_ndjson(lines: Iterable, loads) -> Tuple[List, Dict[int, str]]:
+    """
+    Decode newline-delimited JSON, one item per non-blank line.
+
+    Returns the items (None where a line is malformed) and the decode
+    errors keyed by item index.
+    """
+    items = []
+    errors = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        if len(items) >= MAX_BULK_ARTICLES:
+            raise ValueError(f'At most {MAX_BULK_ARTICLES} articles per request')
+        try:
+            items.append(loads(line))
+        except ValueError as e:
+            errors[len(items)] = f'Invalid JSON: {e}'
+            items.append(None)
+    return items, errors
+
+def bulk_create_articles(user_id: int, items: List, invalid: Optional[Dict[int, str]] = None,
+                         batch_size: Optional[int] = None) -> List[Dict]:
+    """
+    Validate all items, then insert the valid ones in chunks of batch_size.
+
+    `invalid` carries errors found before validation (e.g. malformed NDJSON
+    lines) keyed by item index. Returns one result per item, in input order:
+    {'index', 'status': 'created', 'id'} or {'index', 'status': 'error', 'error'}.
+    """
+    invalid = invalid or {}
+    batch_size = batch_size or BULK_BATCH_SIZE
+    results = [None] * len(items)
+    valid = []
+    for index, data in enumerate(items):
+        try:
+            if index in invalid:
+                raise ValueError(invalid[index])
+            valid.append((index, parse_article_data(data)))
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+
+    # Draft digests are reassembled once per touched week after the last chunk
+    with defer_draft_refresh(db.session):
+        for start in range(0, len(valid), batch_size):
+            chunk = valid[start:start + batch_size]
+            outcomes = insert_articles(user_id, [fields for _, fields in chunk])
+            for (index, _), (article_id, error) in zip(chunk, outcomes):
+                if error is None:
+                    results[index] = {'index': index, 'status': 'created', 'id': article_id}
+                else:
+                    results[index] = {'index': index, 'status': 'error', 'error': error}
+
+    return results
+
+def insert_articles(user_id: int, chunk: List[Dict]) -> List[Tuple[Optional[int], Optional[str]]]:
+    """
+    Insert validated articles (parse_article_data() output, optionally with
+    created_at) in one transaction. If that fails they are retried
+    one by one through the ORM, so a single bad row only fails itself.
+    Returns (id, None) or (None, error) per article, in order.
+    """
+    try:
+        return [(article_id, None) for article_id in _insert_chunk(user_id, chunk)]
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    outcomes = []
+    for fields in chunk:
+        try:
+            article = build_article(user_id, fields)
+            db.session.add(article)
+            db.session.flush()
+            article_id = article.id
+            db.session.commit()
+            outcomes.append((article_id, None))
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            outcomes.append((None, str(getattr(e, 'orig', None) or e)))
+    return outcomes
+
+def _insert_chunk(user_id: int, chunk: List[Dict]) -> List[int]:
+    """Insert validated articles in one transaction and return their ids, in order"""
+    now = datetime.utcnow()
+    rows = []
+    tag_names = []
+    for fields in chunk:
+        tags = Article.clean_tags(fields['tags'])
+        tag_names.append(Tag.normalize_names(tags))
+        row = {
+            'title': fields['title'],
+            'url': fields['url'],
+            'content': fields['content'],
+            # Derived on assignment for ORM writes; Core inserts compute it here
+            'excerpt': make_excerpt(fields['content']),
+            'notes': fields['notes'],
+            'tags': json.dumps(tags),
+            'reading_date': fields['reading_date'],
+            'is_public': fields['is_public'],
+            'user_id': user_id,
+            'created_at': fields.get('created_at') or now,
+            'updated_at': now
+        }
+        row['content_hash'] = Article.hash_values(row)
+        rows.append(row)
+
+    # Create missing tags first so their ids are known
+    all_names = Tag.normalize_names(name for names in tag_names for name in names)
+    tags = Tag.get_or_create_many(all_names)
+    db.session.flush()
+    tag_ids = {tag.name: tag.id for tag in tags}
+
+    connection = db.session.connection()
+    table = Article.__table__
+    ids = connection.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    links = [{'article_id': article_id, 'tag_id': tag_ids[name]}
+             for article_id, names in zip(ids, tag_names) for name in names]
+    if links:
+        connection.execute(article_tags.insert(), links)
+
+    # What the flush hooks would have done for ORM inserts
+    record_inserted_articles(connection, rows)
+    invalidate_on_commit(db.session, {user_id}, all_names)
+    mark_articles_changed(db.session, ids)
+
+    db.session.commit()
+    return ids
@@ -0,0 +1,172 @@
+"""
+Article Full-Text Search
+Ranked search over article titles, content and notes. On SQLite the index is
+an external-content FTS5 table kept in sync by triggers; on PostgreSQL it is a
+generated, weighted tsvector column with a GIN index. Either way the index is
+updated inside the same transaction as the article write.
+"""
+import html
+import re
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from database import db
+
+# Private-use markers wrap matches in snippets so the text can be HTML-escaped
+# before the <mark> tags are put in
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+
+SNIPPET_TOKENS = 24  # Words per snippet on SQLite
+POSTGRES_TEXT_CONFIG = 'english'
+
+SQLITE_DDL = [
+    # Title, content and notes are read from the articles table itself
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    "title, content, notes, content='articles', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN "
+    "INSERT INTO articles_fts(rowid, title, content, notes) VALUES (new.id, new.title, new.content, new.notes); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN "
+    "INSERT INTO articles_fts(articles_fts, rowid, title, content, notes) "
+    "VALUES ('delete', old.id, old.title, old.content, old.notes); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, content, notes ON articles BEGIN "
+    "INSERT INTO articles_fts(articles_fts, rowid, title, content, notes) "
+    "VALUES ('delete', old.id, old.title, old.content, old.notes); "
+    "INSERT INTO articles_fts(rowid, title, content, notes) VALUES (new.id, new.title, new.content, new.notes); "
+    "END",
+]
+
+POSTGRES_DDL = [
+    # Title matches outrank notes, which outrank body text
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(notes, '')), 'B') || "
+    f"setweight(to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(content, '')), 'C')) STORED",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_search_vector ON articles USING GIN (search_vector)",
+]
+
+def create_search_index(connection):
+    """Create the full-text index for the connection's dialect and index existing rows"""
+    if connection.dialect.name == 'postgresql':
+        # The generated column is computed for existing rows when it is added
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+        return
+
+    for statement in SQLITE_DDL:
+        connection.exec_driver_sql(statement)
+    # Re-index from the articles table; idempotent, so an interrupted run can simply be repeated
+    connection.exec_driver_sql("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+def build_fts5_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word must match, and the
+    last word also matches as a prefix so results appear while typing
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def highlight(value: Optional[str]) -> Optional[str]:
+    """HTML-escape a marked-up snippet and turn the match markers into <mark> tags"""
+    if value is None:
+        return None
+    return html.escape(value).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+def _visibility_clause(user_id: Optional[int], own_only: bool) -> str:
+    if own_only:
+        return "a.user_id = :user_id"
+    if user_id is not None:
+        return "(a.is_public = :true OR a.user_id = :user_id)"
+    return "a.is_public = :true"
+
+def _search_sqlite(query: str, user_id, own_only, limit, offset):
+    match = build_fts5_query(query)
+    if match is None:
+        return []
+    sql = text(f"""
+        SELECT a.id AS id,
+               bm25(articles_fts, 10.0, 1.0, 4.0) AS rank,
+               highlight(articles_fts, 0, :start, :end) AS title_highlight,
+               snippet(articles_fts, 1, :start, :end, '…', {SNIPPET_TOKENS}) AS content_snippet,
+               snippet(articles_fts, 2, :start, :end, '…', {SNIPPET_TOKENS}) AS notes_snippet
+        FROM articles_fts
+        JOIN articles a ON a.id = articles_fts.rowid
+        WHERE articles_fts MATCH :match AND {_visibility_clause(user_id, own_only)}
+        ORDER BY rank, a.id DESC
+        LIMIT :limit OFFSET :offset
+    """)
+    rows = db.session.execute(sql, {
+        'match': match, 'user_id': user_id, 'true': True, 'start': MATCH_START, 'end': MATCH_END,
+        'limit': limit, 'offset': offset
+    }).all()
+    # bm25() is lower-is-better; report higher-is-better like ts_rank. Snippets
+    # come from the body, or the notes when only they matched.
+    return [
+        (row.id, -row.rank, row.title_highlight,
+         row.notes_snippet if MATCH_START not in (row.content_snippet or '') and MATCH_START in (row.notes_snippet or '')
+         else row.content_snippet)
+        for row in rows
+    ]
+
+def _search_postgresql(query: str, user_id, own_only, limit, offset):
+    markers = f"StartSel={MATCH_START}, StopSel={MATCH_END}"
+    options = f'{markers}, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+    # Rank and paginate on the index first; headlines are only built for the returned page
+    sql = text(f"""
+        WITH q AS (SELECT websearch_to_tsquery('{POSTGRES_TEXT_CONFIG}', :query) AS query),
+        hits AS (
+            SELECT a.id, a.title, a.content, a.notes, ts_rank_cd(a.search_vector, q.query) AS rank
+            FROM articles a, q
+            WHERE a.search_vector @@ q.query AND {_visibility_clause(user_id, own_only)}
+            ORDER BY rank DESC, a.id DESC
+            LIMIT :limit OFFSET :offset
+        )
+        SELECT hits.id, hits.rank,
+               ts_headline('{POSTGRES_TEXT_CONFIG}', hits.title, q.query, :title_options) AS title_highlight,
+               ts_headline('{POSTGRES_TEXT_CONFIG}', coalesce(hits.notes, '') || ' ' || hits.content, q.query, :options) AS snippet
+        FROM hits, q
+        ORDER BY hits.rank DESC, hits.id DESC
+    """)
+    rows = db.session.execute(sql, {
+        'query': query, 'user_id': user_id, 'true': True, 'options': options,
+        'title_options': f'{markers}, HighlightAll=true', 'limit': limit, 'offset': offset
+    }).all()
+    return [(row.id, row.rank, row.title_highlight, row.snippet) for row in rows]
+
+def search_articles(query: str, user_id: Optional[int] = None, own_only: bool = False,
+                    limit: int = 20, offset: int = 0, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Return ranked matches visible to user_id (public articles plus their own;
+    only their own when own_only), best first. Each result holds the article
+    with its author (loading only the columns behind `fields` when given),
+    a relevance score, the highlighted title and a snippet.
+    """
+    from models.models import Article
+
+    search = _search_postgresql if db.session.get_bind().dialect.name == 'postgresql' else _search_sqlite
+    hits = search(query, user_id, own_only, limit, offset)
+    if not hits:
+        return []
+
+    query = Article.with_author()
+    if fields is not None:
+        query = Article.project(query, fields)
+    articles = {article.id: article for article in query.filter(Article.id.in_([hit[0] for hit in hits])).all()}
+    return [
+        {
+            'article': articles[article_id],
+            # Unrounded: bm25 scores of a small corpus differ by as little as 1e-6
+            'rank': float(rank),
+            'title_highlight': highlight(title_highlight),
+            'snippet': highlight(snippet)
+        }
+        for article_id, rank, title_highlight, snippet in hits
+        if article_id in articles
+    ]
@@ -0,0 +1,418 @@
+"""
+Backup Restore
+Reads the reader-digest-backup .json.gz archives written by the export
+endpoint back into the database. The archive is decompressed and parsed as a
+stream, one record at a time, and records are written in batches, so memory
+is bounded by the batch size rather than the archive size.
+
+Restoring is idempotent: a record whose original id still belongs to the
+same article or digest (same owner, same creation time), or whose content
+hash matches one of the user's records, updates that record instead of
+adding a copy. Auto-maintained draft digests are not restored; they are
+rebuilt from the restored articles.
+"""
+import gzip
+import io
+import json
+import zlib
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+from models.models import Article, Digest, User
+from services.article_bulk import insert_articles, parse_article_data
+from services.draft_digest import defer_draft_refresh
+from utils.excerpt import make_excerpt
+
+RESTORE_BATCH_SIZE = 500  # Records written per transaction
+READ_CHUNK_SIZE = 1 << 16  # Characters decompressed per read
+MAX_REPORTED_ERRORS = 100  # Per-record errors kept in the report
+BACKUP_FORMAT_MAJOR = '1'  # Restorable major version of EXPORT_FORMAT_VERSION
+RECORD_SECTIONS = ('articles', 'digests')
+OUTCOMES = ('created', 'updated', 'unchanged', 'skipped', 'failed')
+
+def open_backup(fileobj) -> io.TextIOBase:
+    """Text stream over a gzip-compressed backup, decompressed as it is read"""
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'), encoding='utf-8')
+
+class _JSONStream:
+    """Incremental reader over a text stream, decoding one JSON value at a time"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self, size: int):
+        # Drop what has been consumed before appending more
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        try:
+            chunk = self.stream.read(size)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f'Unreadable backup: {e}')
+        if chunk:
+            self.buffer += chunk
+        else:
+            self.eof = True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._read(READ_CHUNK_SIZE)
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f'Malformed backup: expected {char!r}')
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        while True:
+            self.peek()
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value touching the end of the buffer may continue (e.g. a number)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f'Malformed backup: {e.msg}')
+            # Read at least as much again as is buffered, so a large record takes few attempts
+            self._read(max(READ_CHUNK_SIZE, len(self.buffer) - self.pos))
+
+def iter_backup(stream) -> Iterator[Tuple[str, object]]:
+    """
+    Parse a backup document incrementally.
+
+    Yields (key, value) for each top-level header entry and (section, record)
+    for each element of the "articles" and "digests" arrays, in file order,
+    holding only the current record in memory.
+    """
+    reader = _JSONStream(stream)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError('Malformed backup: expected a key')
+        reader.expect(':')
+        if key in RECORD_SECTIONS and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() != ']':
+                while True:
+                    yield key, reader.value()
+                    if reader.peek() != ',':
+                        break
+                    reader.expect(',')
+            reader.expect(']')
+        else:
+            yield key, reader.value()
+
+        if reader.peek() != ',':
+            break
+        reader.expect(',')
+    reader.expect('}')
+
+def _parse_timestamp(value, name: str) -> Optional[datetime]:
+    """Naive UTC datetime from an ISO 8601 string, as stored by the models"""
+    if value is None or value == '':
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Use ISO 8601')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _parse_date(value, name: str) -> date:
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name} format. Use YYYY-MM-DD')
+
+def _original_id(record: Dict) -> Optional[int]:
+    original_id = record.get('id')
+    return original_id if isinstance(original_id, int) and not isinstance(original_id, bool) else None
+
+def parse_digest_record(record) -> Dict:
+    """
+    Validate a backed-up digest and return its column values.
+
+    Raises:
+        ValueError: with a message suitable for the restore report
+    """
+    if not isinstance(record, dict):
+        raise ValueError('Digest must be a JSON object')
+    title = record.get('title')
+    content = record.get('content')
+    if not isinstance(title, str) or not title.strip() or not isinstance(content, str) or not content.strip():
+        raise ValueError('Title and content are required')
+    summary = record.get('summary')
+    if summary is not None and not isinstance(summary, str):
+        raise ValueError('Summary must be a string')
+
+    fields = {
+        'title': title,
+        'content': content,
+        'summary': summary,
+        'week_start': _parse_date(record.get('week_start'), 'week_start'),
+        'week_end': _parse_date(record.get('week_end'), 'week_end'),
+        'is_published': record.get('is_published', False),
+        'is_public': record.get('is_public', True)
+    }
+    for name in ('is_published', 'is_public'):
+        if not isinstance(fields[name], bool):
+            raise ValueError(f'{name} must be true or false')
+    # updated_at is not restored: it records when the row last changed here, for the change feed
+    for name in ('created_at', 'published_at'):
+        fields[name] = _parse_timestamp(record.get(name), name)
+    return fields
+
+class _Restore:
+    """Batches records per section and keeps the restore report"""
+
+    def __init__(self, user_id: Optional[int], batch_size: int, progress: Optional[Callable]):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.progress = progress
+        self.report = {section: dict.fromkeys(OUTCOMES, 0) for section in RECORD_SECTIONS}
+        self.report['errors'] = []
+        self.batches = {section: [] for section in RECORD_SECTIONS}
+        self.positions = dict.fromkeys(RECORD_SECTIONS, 0)
+
+    def header(self, key: str, value):
+        if key == 'version' and str(value).split('.')[0] != BACKUP_FORMAT_MAJOR:
+            raise ValueError(f'Unsupported backup version {value}')
+        if key == 'user' and self.user_id is None:
+            username = value.get('username') if isinstance(value, dict) else None
+            user = User.query.filter_by(username=username).first() if username else None
+            if user is None:
+                raise ValueError(f'No user named {username!r} to restore into')
+            self.user_id = user.id
+
+    def add(self, section: str, record):
+        if self.user_id is None:
+            raise ValueError('Malformed backup: records before the user header')
+        for other in RECORD_SECTIONS:
+            if other != section:
+                # Finish the previous section first, so records are written in file order
+                self.flush(other)
+        batch = self.batches[section]
+        batch.append((self.positions[section], record))
+        self.positions[section] += 1
+        if len(batch) >= self.batch_size:
+            self.flush(section)
+
+    def flush(self, section: str):
+        batch = self.batches[section]
+        if not batch:
+            return
+        if section == 'articles':
+            self._restore_articles(batch)
+        else:
+            self._restore_digests(batch)
+        batch.clear()
+        if self.progress:
+            self.progress(self.report)
+
+    def fail(self, section: str, position: int, error: str):
+        self.report[section]['failed'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'section': section, 'index': position, 'error': error})
+
+    def _existing(self, model, parsed: List[Tuple]) -> Tuple[Dict, Dict]:
+        """The user's records matching the batch by original id or content hash"""
+        ids = [original_id for _, original_id, _, _ in parsed if original_id is not None]
+        hashes = [digest for _, _, _, digest in parsed]
+        # Two queries rather than one OR, so each is served by its own index
+        by_id = {row.id: row for row in model.query.filter(model.user_id == self.user_id, model.id.in_(ids))}
+        by_hash = {row.content_hash: row for row in
+                   model.query.filter(model.user_id == self.user_id, model.content_hash.in_(hashes))}
+        return by_id, by_hash
+
+    def _match(self, parsed: List[Tuple], by_id: Dict, by_hash: Dict, stats: Dict) -> Tuple[List, List]:
+        """Split a parsed batch into (record, fields) matches and (position, fields) to insert"""
+        matches = []
+        new = []
+        seen = set()
+        for position, original_id, fields, digest in parsed:
+            row = by_id.get(original_id)
+            # Ids are reused across databases; the creation time confirms it is the same record
+            if row is None or fields['created_at'] is None or row.created_at != fields['created_at']:
+                row = by_hash.get(digest)
+            if row is not None:
+                matches.append((row, fields))
+            elif digest in seen:
+                # The same record twice in one backup
+                stats['unchanged'] += 1
+            else:
+                seen.add(digest)
+                new.append((position, fields))
+        return matches, new
+
+    def _restore_articles(self, batch: List[Tuple]):
+        stats = self.report['articles']
+        parsed = []
+        for position, record in batch:
+            try:
+                fields = parse_article_data(record)
+                fields['tags'] = Article.clean_tags(fields['tags'])
+                fields['created_at'] = _parse_timestamp(record.get('created_at'), 'created_at')
+            except ValueError as e:
+                self.fail('articles', position, str(e))
+                continue
+            parsed.append((position, _original_id(record), fields, Article.hash_values(fields)))
+
+        matches, new = self._match(parsed, *self._existing(Article, parsed), stats)
+        for article, fields in matches:
+            changed = False
+            for name in ('title', 'url', 'content', 'notes', 'reading_date', 'is_public'):
+                if getattr(article, name) != fields[name]:
+                    setattr(article, name, fields[name])
+                    changed = True
+            if article.get_tags() != fields['tags']:
+                article.set_tags(fields['tags'])
+                changed = True
+            stats['updated' if changed else 'unchanged'] += 1
+        db.session.commit()
+
+        outcomes = insert_articles(self.user_id, [fields for _, fields in new])
+        for (position, _), (article_id, error) in zip(new, outcomes):
+            if error is None:
+                stats['created'] += 1
+            else:
+                self.fail('articles', position, error)
+
+    def _restore_digests(self, batch: List[Tuple]):
+        stats = self.report['digests']
+        parsed = []
+        for position, record in batch:
+            if isinstance(record, dict) and record.get('is_auto_draft'):
+                # Rebuilt from the restored articles instead
+                stats['skipped'] += 1
+                continue
+            try:
+                fields = parse_digest_record(record)
+            except ValueError as e:
+                self.fail('digests', position, str(e))
+                continue
+            parsed.append((position, _original_id(record), fields, Digest.hash_values(fields)))
+
+        matches, new = self._match(parsed, *self._existing(Digest, parsed), stats)
+        for digest, fields in matches:
+            changed = False
+            for name in ('title', 'content', 'summary', 'week_start', 'week_end', 'is_published', 'is_public',
+                         'published_at'):
+                if getattr(digest, name) != fields[name]:
+                    setattr(digest, name, fields[name])
+                    changed = True
+            if digest.is_auto_draft:
+                # A draft with the same content becomes the user's own digest
+                digest.is_auto_draft = False
+                changed = True
+            stats['updated' if changed else 'unchanged'] += 1
+        db.session.commit()
+
+        if not new:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for _, fields in new:
+            row = dict(fields, user_id=self.user_id, is_auto_draft=False, excerpt=make_excerpt(fields['content']))
+            row['created_at'] = row['created_at'] or now
+            row['updated_at'] = now
+            row['content_hash'] = Digest.hash_values(row)
+            rows.append(row)
+        try:
+            self._insert_digests(rows)
+            stats['created'] += len(rows)
+        except SQLAlchemyError:
+            db.session.rollback()
+            # One transaction per digest so a bad row only fails itself
+            for (position, _), row in zip(new, rows):
+                try:
+                    self._insert_digests([row])
+                    stats['created'] += 1
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    self.fail('digests', position, str(getattr(e, 'orig', None) or e))
+
+    def _insert_digests(self, rows: List[Dict]):
+        # Restored digests supersede the auto-maintained drafts of their weeks (ORM deletes leave tombstones)
+        weeks = {row['week_start'] for row in rows}
+        for draft in Digest.query.filter(
+            Digest.user_id == self.user_id, Digest.week_start.in_(weeks),
+            Digest.is_auto_draft.is_(True), Digest.is_published.is_(False)
+        ):
+            db.session.delete(draft)
+        # Core bulk insert: the ORM excerpt and content hash hooks do not run
+        db.session.execute(insert(Digest), rows)
+        db.session.commit()
+
+def restore_backup(stream, user_id: Optional[int] = None, batch_size: Optional[int] = None,
+                   progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Restore a backup document from a text stream (see open_backup()).
+
+    Records go to user_id, or to the account named in the backup's header
+    when no user is given. Each batch commits on its own, so an interrupted
+    restore can simply be run again. `progress` is called with the report
+    after every batch.
+
+    Returns the report: per section counts of created, updated, unchanged,
+    skipped and failed records, plus the first per-record errors.
+
+    Raises:
+        ValueError: if the archive is unreadable, malformed or of an unsupported version
+    """
+    restore = _Restore(user_id, batch_size or RESTORE_BATCH_SIZE, progress)
+    # Draft digests are reassembled once per touched week at the end
+    with defer_draft_refresh(db.session):
+        for key, value in iter_backup(stream):
+            if key in RECORD_SECTIONS:
+                restore.add(key, value)
+            else:
+                restore.header(key, value)
+        for section in RECORD_SECTIONS:
+            restore.flush(section)
+    return restore.report
+
+def backfill_content_hashes(connection, batch_size: int = 500) -> int:
+    """
+    Fill in content hashes of articles and digests written before the
+    columns existed, in id order. Returns the number of rows updated.
+    """
+    updated = 0
+    for model in (Article, Digest):
+        table = model.__table__
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(table.c.id, *(table.c[name] for name in model.HASH_FIELDS))
+                .where(table.c.id > last_id, table.c.content_hash.is_(None))
+                .order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            # Keep updated_at: a derived column changing is not an edit (and not a change feed entry)
+            connection.execute(
+                table.update().where(table.c.id == bindparam('row_id'))
+                .values(content_hash=bindparam('hash'), updated_at=table.c.updated_at),
+                [{'row_id': row.id, 'hash': model.hash_values(row._mapping)} for row in rows]
+            )
+            updated += len(rows)
+    return updated
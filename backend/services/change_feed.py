@@ -0,0 +1,139 @@
+"""
+Change Feed
+Lets a client sync a user's articles and digests by asking what changed since
+its last sync instead of re-downloading everything. Changes are read from
+each table's (user_id, updated_at) index, deletions from tombstones written
+in the same transaction as the delete, and the three streams are merged in
+(changed_at, stream, id) order behind a resumable keyset cursor.
+"""
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, event, insert, inspect as sa_inspect, literal, or_, select
+
+from database import db
+
+# Sort order of simultaneous changes; a cursor names the stream of its last change
+STREAMS = ('article', 'digest', 'tombstone')
+DEFAULT_CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 500
+
+def _stream_tables():
+    """{stream: (model, change timestamp column, query loading full rows)}"""
+    from models.models import Article, Digest, Tombstone
+
+    return {
+        'article': (Article, Article.updated_at, Article.with_author()),
+        'digest': (Digest, Digest.updated_at, Digest.with_author()),
+        'tombstone': (Tombstone, Tombstone.deleted_at, Tombstone.query),
+    }
+
+def _stream_after(stream: str, changed_at, id_column, position: Optional[Tuple]):
+    """Condition selecting a stream's changes that sort after `position` (changed_at, stream rank, id)"""
+    if position is None:
+        return None
+    after, rank, last_id = position
+    bound = literal(after, type_=changed_at.type)
+    own_rank = STREAMS.index(stream)
+    if own_rank > rank:
+        return changed_at >= bound
+    if own_rank < rank:
+        return changed_at > bound
+    return or_(changed_at > bound, and_(changed_at == bound, id_column > last_id))
+
+def fetch_changes(user_id: int, position: Optional[Tuple], until: datetime, limit: int) -> Dict:
+    """
+    Return the user's changes after `position`, oldest first.
+
+    `position` is (changed_at, stream rank, id) of the last change the client
+    has seen; a rank of len(STREAMS) means "everything after changed_at".
+    Only changes stamped at or before `until` are returned, so the feed never
+    moves past a write that may still be committing.
+
+    Returns:
+        Dict with 'changes' (dicts with stream, id, changed_at and the row:
+        an Article, a Digest or a Tombstone), 'position' of the last change
+        returned (the input position when there is none) and 'has_more'
+    """
+    limit = max(1, min(limit, MAX_CHANGES_LIMIT))
+    changes = []
+    streams = _stream_tables()
+    for stream, (model, changed_at, _) in streams.items():
+        query = select(changed_at, model.id).where(model.user_id == user_id, changed_at <= until)
+        condition = _stream_after(stream, changed_at, model.id, position)
+        if condition is not None:
+            query = query.where(condition)
+        # Each stream is read from its own index; at most limit + 1 rows are kept overall
+        rows = db.session.execute(query.order_by(changed_at, model.id).limit(limit + 1)).all()
+        changes.extend((row[0], STREAMS.index(stream), row[1]) for row in rows)
+
+    changes.sort()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    rows = {}
+    for stream, (model, _, query) in streams.items():
+        ids = [change_id for _, rank, change_id in changes if STREAMS[rank] == stream]
+        rows[stream] = {row.id: row for row in query.filter(model.id.in_(ids))} if ids else {}
+
+    results = []
+    for changed_at, rank, change_id in changes:
+        stream = STREAMS[rank]
+        row = rows[stream].get(change_id)
+        if row is None:
+            # Deleted between the two queries; its tombstone comes later in the feed
+            continue
+        results.append({'stream': stream, 'id': change_id, 'changed_at': changed_at, 'row': row})
+
+    return {
+        'changes': results,
+        'position': changes[-1] if changes else position,
+        'has_more': has_more
+    }
+
+# Deleted articles and digests leave a tombstone, written in the flush that
+# deletes them. Objects are read before the flush, while their rows still exist.
+
+def _tombstone_types():
+    from models.models import Article, Digest
+
+    return {Article: 'article', Digest: 'digest'}
+
+@event.listens_for(db.session, 'before_flush')
+def _snapshot_deletions(session, flush_context, instances):
+    types = _tombstone_types()
+    pending = session.info.setdefault('tombstones_pending', {})
+    for obj in session.deleted:
+        if type(obj) in types and obj not in pending:
+            pending[obj] = obj.user_id
+
+@event.listens_for(db.session, 'after_flush')
+def _write_tombstones(session, flush_context):
+    from models.models import Tombstone, User
+
+    types = _tombstone_types()
+    pending = session.info.pop('tombstones_pending', {})
+    # Tombstones of deleted users go with them; SQLite does not enforce ON DELETE CASCADE
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    table = Tombstone.__table__
+    if deleted_users:
+        session.connection().execute(table.delete().where(table.c.user_id.in_(deleted_users)))
+
+    now = datetime.utcnow()
+    rows = []
+    for obj in session.deleted:
+        record_type = types.get(type(obj))
+        if record_type is None:
+            continue
+        state = sa_inspect(obj)
+        # Orphans removed during the flush were not in the snapshot
+        user_id = pending[obj] if obj in pending else state.dict.get('user_id')
+        if user_id is not None and user_id not in deleted_users:
+            rows.append({'user_id': user_id, 'record_type': record_type, 'record_id': state.identity[0],
+                         'deleted_at': now})
+    if rows:
+        session.connection().execute(insert(table), rows)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_deletion_snapshots(session):
+    session.info.pop('tombstones_pending', None)
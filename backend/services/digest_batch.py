@@ -0,0 +1,166 @@
+"""
+Batch Weekly Digest Generation
+Generates draft digests for every active user for one week, ahead of the
+Monday-morning rush. Users are sharded across a process pool; each shard is
+bulk-inserted and committed on its own, so an interrupted run resumes by
+skipping users who already have a digest for the week.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, text
+
+from database import db
+from models.models import Digest, User, WeeklyRollup
+from services.weekly_digest_service import WeeklyDigestService
+from utils.excerpt import make_excerpt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_SIZE = 50
+
+def previous_week_start(today: Optional[date] = None) -> date:
+    """Monday of the last full week before today"""
+    today = today or datetime.now().date()
+    return today - timedelta(days=today.weekday() + 7)
+
+def pending_user_ids(week_start: date) -> List[int]:
+    """
+    Active users with articles in the week and no digest for it yet.
+    Users without articles are skipped via the weekly rollups.
+    """
+    has_digest = exists().where(Digest.user_id == User.id, Digest.week_start == week_start)
+    rows = db.session.query(User.id).join(
+        WeeklyRollup, WeeklyRollup.user_id == User.id
+    ).filter(
+        User.is_active.is_(True),
+        WeeklyRollup.week_start == week_start,
+        WeeklyRollup.article_count > 0,
+        ~has_digest
+    ).order_by(User.id).all()
+    return [row.id for row in rows]
+
+def generate_shard(user_ids: List[int], week_start: date) -> Dict[str, int]:
+    """Generate and bulk-insert draft digests for one shard of users (requires an app context)"""
+    week_end = week_start + timedelta(days=6)
+    service = WeeklyDigestService()
+
+    # Re-check inside the shard in case an on-demand digest was saved meanwhile
+    done = {row.user_id for row in db.session.query(Digest.user_id).filter(
+        Digest.user_id.in_(user_ids), Digest.week_start == week_start
+    )}
+
+    rows = []
+    skipped = 0
+    for user_id in user_ids:
+        if user_id in done:
+            skipped += 1
+            continue
+        try:
+            data = service.generate_weekly_digest(user_id, week_start, week_end)
+        except ValueError:
+            # No articles in the week after all
+            skipped += 1
+            continue
+        row = {
+            'title': data['title'],
+            'content': data['content'],
+            # Core bulk insert: the ORM excerpt and content hash hooks do not run
+            'excerpt': make_excerpt(data['content']),
+            'summary': data['summary'],
+            'week_start': week_start,
+            'week_end': week_end,
+            'is_published': False,
+            'is_auto_draft': True,
+            'user_id': user_id
+        }
+        row['content_hash'] = Digest.hash_values(row)
+        rows.append(row)
+
+    created = 0
+    if rows:
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        # A draft written since the re-check (another run, or the user's articles changing) wins
+        created = connection.execute(
+            insert(Digest.__table__).on_conflict_do_nothing(
+                index_elements=['user_id', 'week_start'], index_where=text('is_auto_draft')
+            ),
+            rows
+        ).rowcount
+    db.session.commit()
+    return {'created': created, 'skipped': skipped + len(rows) - created}
+
+# Worker processes build their own app (and connection pool) once, then
+# handle shards in turn.
+
+_worker_app = None
+
+def _init_worker(config: Dict):
+    global _worker_app
+    from app import create_app
+
+    _worker_app = create_app(config)
+
+def _run_shard(user_ids: List[int], week_start: date) -> Dict[str, int]:
+    with _worker_app.app_context():
+        try:
+            return generate_shard(user_ids, week_start)
+        finally:
+            db.session.remove()
+
+def generate_weekly_drafts(week_start: date, workers: int = 4,
+                           shard_size: int = DEFAULT_SHARD_SIZE, log=print) -> Dict[str, int]:
+    """
+    Create draft digests for every pending user for the week starting on
+    week_start (requires an app context). With workers <= 1 shards run in
+    this process.
+    """
+    week_start = week_start - timedelta(days=week_start.weekday())
+    user_ids = pending_user_ids(week_start)
+    shards = [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+    totals = {'users': len(user_ids), 'created': 0, 'skipped': 0}
+    log(f"{len(user_ids)} user(s) pending for week of {week_start} in {len(shards)} shard(s)")
+
+    if not shards:
+        return totals
+
+    if workers <= 1:
+        for shard in shards:
+            result = generate_shard(shard, week_start)
+            totals['created'] += result['created']
+            totals['skipped'] += result['skipped']
+            log(f"  {totals['created']} created, {totals['skipped']} skipped")
+        return totals
+
+    from flask import current_app
+
+    config = {'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI'], 'AUTO_MIGRATE': False}
+    # Do not hand pooled connections to the children
+    db.session.remove()
+    db.engine.dispose()
+
+    # spawn: children start clean instead of inheriting this process's threads and sockets
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(config,)) as pool:
+        futures = [pool.submit(_run_shard, shard, week_start) for shard in shards]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The shard's users stay pending and are picked up by the next run
+                logger.error(f"Digest shard failed: {e}")
+                log(f"  Shard failed: {e}")
+                continue
+            totals['created'] += result['created']
+            totals['skipped'] += result['skipped']
+            log(f"  {totals['created']} created, {totals['skipped']} skipped")
+
+    return totals
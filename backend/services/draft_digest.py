@@ -0,0 +1,221 @@
+"""
+Draft Digest Maintenance
+Keeps one unpublished draft digest per user-week in sync with the week's
+articles. Each article's section is rendered once into digest_fragments; when
+an article is created, edited or deleted only its own fragment is re-rendered
+and the draft is reassembled from the stored fragments. Section numbers are
+applied during assembly, so reordering a week never re-renders a section.
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import event, exists, inspect as sa_inspect
+
+from database import db
+from services.weekly_rollup import week_start_for
+
+SYNC_BATCH_SIZE = 500  # Articles (and fragments) loaded per IN query
+REFRESH_BATCH_SIZE = 50  # Drafts reassembled per transaction after a deferred bulk write
+
+def sync_fragment(session, article_id: int, service) -> Set[Tuple[int, date]]:
+    """
+    Re-render (or drop) the fragment of one article.
+    Returns the (user_id, week_start) drafts that need reassembly.
+    """
+    return sync_fragments(session, [article_id], service)
+
+def sync_fragments(session, article_ids: Iterable[int], service) -> Set[Tuple[int, date]]:
+    """
+    Re-render (or drop) the fragments of several articles, loading articles
+    and fragments with one query per batch instead of one per article.
+    Returns the (user_id, week_start) drafts that need reassembly.
+    """
+    from models.models import Article, DigestFragment
+
+    article_ids = list(article_ids)
+    weeks = set()
+    # New fragments are flushed together at the end, not before every lookup
+    with session.no_autoflush:
+        for start in range(0, len(article_ids), SYNC_BATCH_SIZE):
+            batch = article_ids[start:start + SYNC_BATCH_SIZE]
+            fragments = {fragment.article_id: fragment for fragment in
+                         DigestFragment.query.filter(DigestFragment.article_id.in_(batch))}
+            articles = {article.id: article for article in Article.query.filter(Article.id.in_(batch))}
+
+            for article_id in batch:
+                fragment = fragments.get(article_id)
+                if fragment is not None:
+                    weeks.add((fragment.user_id, fragment.week_start))
+
+                article = articles.get(article_id)
+                if article is None:
+                    if fragment is not None:
+                        session.delete(fragment)
+                    continue
+
+                if fragment is None:
+                    fragment = DigestFragment(article_id=article.id)
+                    session.add(fragment)
+                fragment.user_id = article.user_id
+                fragment.week_start = week_start_for(article.reading_date)
+                fragment.reading_date = article.reading_date
+                fragment.article_created_at = article.created_at
+                fragment.content = service.render_article_section(article)
+
+                weeks.add((fragment.user_id, fragment.week_start))
+    return weeks
+
+def refresh_draft(session, user_id: int, week_start: date, service):
+    """Reassemble the auto-maintained draft for one user-week from its fragments"""
+    from models.models import Article, Digest, DigestFragment, WeeklyRollup
+
+    week_end = week_start + timedelta(days=6)
+    digests = Digest.query.filter_by(user_id=user_id, week_start=week_start).all()
+    draft = next((digest for digest in digests if digest.is_auto_draft and not digest.is_published), None)
+    if draft is None and digests:
+        # The user already saved their own digest for this week
+        return
+
+    # Articles written before fragments existed get theirs on first use
+    missing = Article.query.filter(
+        Article.user_id == user_id,
+        Article.reading_date >= week_start,
+        Article.reading_date <= week_end,
+        ~exists().where(DigestFragment.article_id == Article.id)
+    ).all()
+    sync_fragments(session, [article.id for article in missing], service)
+
+    fragments = DigestFragment.query.filter_by(user_id=user_id, week_start=week_start).order_by(
+        DigestFragment.reading_date, DigestFragment.article_created_at, DigestFragment.article_id
+    ).all()
+
+    if not fragments:
+        if draft is not None:
+            session.delete(draft)
+        return
+
+    if draft is None:
+        draft = Digest(
+            title=service.default_title(week_start, week_end),
+            week_start=week_start,
+            week_end=week_end,
+            is_published=False,
+            is_auto_draft=True,
+            user_id=user_id
+        )
+        session.add(draft)
+
+    articles_section = service.join_article_sections([fragment.content for fragment in fragments])
+    draft.content = service.render_content(draft.title, articles_section, len(fragments), week_start, week_end)
+
+    rollup = session.get(WeeklyRollup, (user_id, week_start), populate_existing=True)
+    if rollup is not None:
+        draft.summary = service._generate_summary(fragments, week_start, week_end, rollup)
+
+# Article changes are collected on every flush and applied just before the
+# transaction commits, so a request that edits several articles in one week
+# reassembles that week's draft once.
+
+def _empty_changes() -> dict:
+    return {'articles': set(), 'weeks': set(), 'users': set()}
+
+def _pending(session) -> dict:
+    return session.info.setdefault('draft_digest_changes', _empty_changes())
+
+def mark_articles_changed(session, article_ids: Iterable[int]):
+    """Queue articles written with Core statements, which bypass the flush hook, for the next commit"""
+    _pending(session)['articles'].update(article_ids)
+
+@contextmanager
+def defer_draft_refresh(session):
+    """
+    Postpone draft maintenance while the block runs. Changes from every
+    commit inside it are applied together afterwards, so a bulk import
+    committing in chunks reassembles each touched week once.
+    """
+    deferred = session.info['draft_digest_deferred'] = _empty_changes()
+    try:
+        yield
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop('draft_digest_deferred', None)
+        if any(deferred.values()):
+            _apply_deferred_changes(session, deferred)
+
+def _apply_deferred_changes(session, changes: dict):
+    """
+    Apply changes collected by defer_draft_refresh() in bounded transactions:
+    fragments one batch of articles at a time, then drafts a few weeks at a
+    time, so memory does not grow with the size of the import.
+    """
+    from services.weekly_digest_service import WeeklyDigestService
+
+    service = WeeklyDigestService()
+    weeks = set(changes['weeks'])
+    article_ids = sorted(changes['articles'])
+    for start in range(0, len(article_ids), SYNC_BATCH_SIZE):
+        weeks.update(sync_fragments(session, article_ids[start:start + SYNC_BATCH_SIZE], service))
+        session.commit()
+
+    # Deleted users take their digests with them
+    weeks = sorted((user_id, week_start) for user_id, week_start in weeks if user_id not in changes['users'])
+    for start in range(0, len(weeks), REFRESH_BATCH_SIZE):
+        for user_id, week_start in weeks[start:start + REFRESH_BATCH_SIZE]:
+            refresh_draft(session, user_id, week_start, service)
+        session.commit()
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_article_changes(session, flush_context):
+    from models.models import Article, User
+
+    pending = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj in session.deleted:
+            pending = pending or _pending(session)
+            pending['users'].add(obj.id)
+        if not isinstance(obj, Article):
+            continue
+
+        pending = pending or _pending(session)
+        pending['articles'].add(obj.id)
+        # Weeks the article is leaving; its fragment may already be gone (ON DELETE CASCADE)
+        state = sa_inspect(obj)
+        user_ids = list(state.attrs.user_id.history.deleted) or [state.dict.get('user_id')]
+        reading_dates = list(state.attrs.reading_date.history.deleted) or [state.dict.get('reading_date')]
+        for user_id in user_ids:
+            for reading_date in reading_dates:
+                if user_id is not None and reading_date is not None:
+                    pending['weeks'].add((user_id, week_start_for(reading_date)))
+
+@event.listens_for(db.session, 'before_commit')
+def _apply_article_changes(session):
+    # Flush outstanding changes now (commit would anyway) so their articles are collected too
+    session.flush()
+    pending = session.info.pop('draft_digest_changes', None)
+    if not pending:
+        return
+
+    deferred = session.info.get('draft_digest_deferred')
+    if deferred is not None:
+        # Kept outside draft_digest_changes so a later rollback does not discard them
+        for key, values in pending.items():
+            deferred[key].update(values)
+        return
+
+    from services.weekly_digest_service import WeeklyDigestService
+
+    service = WeeklyDigestService()
+    weeks = set(pending['weeks'])
+    weeks.update(sync_fragments(session, sorted(pending['articles']), service))
+
+    for user_id, week_start in sorted(weeks):
+        # Deleted users take their digests with them
+        if user_id not in pending['users']:
+            refresh_draft(session, user_id, week_start, service)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_article_changes(session):
+    session.info.pop('draft_digest_changes', None)
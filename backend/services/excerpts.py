@@ -0,0 +1,43 @@
+"""
+Stored Excerpts
+Backfills the plain-text excerpt columns of articles and digests. New writes
+fill them in as content is assigned (see models.models); this covers rows
+written before the columns existed or rendered with older rules.
+"""
+from sqlalchemy import bindparam, select
+
+from utils.excerpt import make_excerpt
+
+def backfill_excerpts(connection, only_missing: bool = True, batch_size: int = 500) -> int:
+    """
+    Recompute excerpts for articles and digests in id order, batch by batch.
+    Returns the number of rows updated.
+    """
+    from models.models import Article, Digest
+
+    updated = 0
+    for table in (Article.__table__, Digest.__table__):
+        last_id = 0
+        while True:
+            query = select(table.c.id, table.c.content, table.c.excerpt).where(table.c.id > last_id)
+            if only_missing:
+                query = query.where(table.c.excerpt.is_(None))
+            rows = connection.execute(query.order_by(table.c.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            for row in rows:
+                excerpt = make_excerpt(row.content)
+                if excerpt != row.excerpt:
+                    changes.append({'row_id': row.id, 'excerpt': excerpt})
+            if changes:
+                # Keep updated_at: a derived column changing is not an edit (and not a change feed entry)
+                connection.execute(
+                    table.update().where(table.c.id == bindparam('row_id'))
+                    .values(excerpt=bindparam('excerpt'), updated_at=table.c.updated_at),
+                    changes
+                )
+                updated += len(changes)
+    return updated
@@ -0,0 +1,148 @@
+"""
+RSS Feed Cache Service
+Keeps rendered (and pre-gzipped) RSS feed bodies in memory so feed reader
+polls are answered without touching the database. Entries are dropped when
+articles that could appear in them are created, updated or deleted.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect as sa_inspect
+
+from database import db
+
+class FeedEntry:
+    """A rendered feed body with its validators"""
+
+    def __init__(self, body: bytes, user_id: Optional[int], tag: Optional[str]):
+        self.body = body
+        self.gzip_body = gzip.compress(body)
+        self.etag = hashlib.sha1(body).hexdigest()
+        # HTTP dates have second resolution
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.created = self.last_modified.timestamp()
+        self.user_id = user_id
+        self.tag = tag
+
+class FeedCache:
+    def __init__(self, ttl: int = 3600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; read it before querying and pass it to set()"""
+        return self._generation
+
+    def get(self, key) -> Optional[FeedEntry]:
+        """Return a fresh entry for key, or None"""
+        now = datetime.now(timezone.utc).timestamp()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry.created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body: bytes, user_id: Optional[int] = None, tag: Optional[str] = None,
+            generation: Optional[int] = None) -> FeedEntry:
+        """
+        Store a rendered feed body and return its entry. When `generation` is
+        given and an invalidation has happened since it was read, the body may
+        predate that write: the entry is returned but not stored.
+        """
+        entry = FeedEntry(body, user_id, tag)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_ids: Iterable[int], tags: Iterable[str]):
+        """
+        Drop every feed that could contain an article owned by one of
+        user_ids or carrying one of tags. Unfiltered feeds always go.
+        """
+        user_ids = set(user_ids)
+        tags = set(tags)
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if (entry.user_id is None or entry.user_id in user_ids)
+                and (entry.tag is None or entry.tag in tags)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+def get_feed_cache() -> Optional[FeedCache]:
+    """Return the feed cache of the current app, if one is configured"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('feed_cache')
+
+# Invalidation: collect the users and tags touched by each flush, and apply
+# them only once the transaction commits so a concurrent request cannot
+# re-cache pre-commit data.
+
+def _article_scope(article, include_previous: bool):
+    from models.models import normalize_tag, parse_tags
+
+    user_ids = {article.user_id}
+    tags = {normalize_tag(tag) for tag in article.get_tags()}
+
+    if include_previous:
+        state = sa_inspect(article)
+        user_ids.update(state.attrs.user_id.history.deleted)
+        for value in state.attrs.tags.history.deleted:
+            tags.update(normalize_tag(tag) for tag in parse_tags(value))
+
+    return user_ids, tags
+
+def invalidate_on_commit(session, user_ids: Iterable[int], tags: Iterable[str]):
+    """
+    Drop the feeds of these users and normalized tags once the session's
+    transaction commits. Flushed articles are collected automatically; this
+    is for rows written with Core statements.
+    """
+    pending = session.info.setdefault('feed_invalidations', (set(), set()))
+    pending[0].update(user_ids)
+    pending[1].update(tags)
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_feed_invalidations(session, flush_context):
+    from models.models import Article
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Article):
+            invalidate_on_commit(session, *_article_scope(obj, include_previous=obj in session.dirty))
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_feed_invalidations(session):
+    pending = session.info.pop('feed_invalidations', None)
+    cache = get_feed_cache()
+    if pending and cache is not None:
+        cache.invalidate(*pending)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_feed_invalidations(session):
+    session.info.pop('feed_invalidations', None)
@@ -0,0 +1,175 @@
+"""
+URL Preview Cache
+Two-tier cache for URL preview metadata: an in-process LRU in front of a
+SQLite file shared by every worker process. Successful previews and failures
+get separate TTLs, so dead links are not re-fetched on every paste.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref_src')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL into a cache key: lowercase scheme and host, default
+    port, fragment and tracking parameters removed, query parameters sorted.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ]
+    query.sort()
+
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, urlencode(query), ''))
+
+class PreviewCache:
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 1024,
+                 ttl: int = 86400, negative_ttl: int = 600, clock=time.time):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._memory = OrderedDict()  # key -> (expires_at, preview)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return a cached preview for url, or None"""
+        key = normalize_url(url)
+        now = self.clock()
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached and cached[0] > now:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return dict(cached[1])
+            if cached:
+                del self._memory[key]
+
+        cached = self._disk_get(key, now)
+        if cached:
+            self._remember(key, *cached)
+            with self._lock:
+                self._stats['disk_hits'] += 1
+            return dict(cached[1])
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, url: str, preview: Dict):
+        """Cache a preview; failed previews use the negative TTL"""
+        key = normalize_url(url)
+        ttl = self.ttl if preview.get('success') else self.negative_ttl
+        expires_at = self.clock() + ttl
+
+        self._remember(key, expires_at, dict(preview))
+        self._disk_set(key, expires_at, preview)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters for this process plus tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        stats['disk_entries'] = self._disk_count()
+        stats['persistent'] = bool(self.path)
+        return stats
+
+    def clear(self):
+        """Drop every cached preview from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM url_previews")
+
+    def _remember(self, key: str, expires_at: float, preview: Dict):
+        with self._lock:
+            self._memory[key] = (expires_at, preview)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    # Persistent tier
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Per-thread connection to the shared cache file, created on first use"""
+        if not self.path:
+            return None
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS url_previews ("
+                "url_key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_url_previews_expires_at ON url_previews (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str, now: float):
+        try:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT expires_at, payload FROM url_previews WHERE url_key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            return (row[0], json.loads(row[1])) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.warning(f"URL preview cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, expires_at: float, preview: Dict):
+        try:
+            conn = self._connection()
+            if conn is None:
+                return
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO url_previews (url_key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(preview), expires_at)
+                )
+                # Opportunistically purge expired rows so the file does not grow forever
+                conn.execute("DELETE FROM url_previews WHERE expires_at <= ?", (self.clock(),))
+        except sqlite3.Error as e:
+            self.logger.warning(f"URL preview cache write failed: {e}")
+
+    def _disk_count(self) -> int:
+        try:
+            conn = self._connection()
+            if conn is None:
+                return 0
+            return conn.execute("SELECT COUNT(*) FROM url_previews").fetchone()[0]
+        except sqlite3.Error:
+            return 0
@@ -0,0 +1,204 @@
+"""
+Query Profiler
+Opt-in (QUERY_PROFILER=true) engine-level view of the SQL each request runs.
+Statements slower than SLOW_QUERY_MS are logged with the line of app code
+that issued them, requests repeating one statement shape more than
+N_PLUS_ONE_THRESHOLD times are flagged as likely N+1 queries, and every
+request ends with a one-line JSON summary on the `services.query_profiler`
+logger. assert_query_budget() is the same check for tests.
+"""
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from types import GeneratorType
+from typing import Dict, List, Optional
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_STATEMENT = 500
+MAX_REPORTED_SHAPES = 5
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals and IN lists folded, so repeats with other parameters compare equal"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = re.sub(r'%\(\w+\)s|%s|:\w+|\$\d+', '?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def call_site() -> Optional[str]:
+    """Innermost frame of app code (not this module, not a library) on the current stack"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(_BACKEND_DIR) and filename != os.path.abspath(__file__)
+                and 'site-packages' not in filename):
+            return f'{os.path.relpath(filename, _BACKEND_DIR)}:{frame.lineno} in {frame.name}'
+    return None
+
+def _truncate(statement: str) -> str:
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return statement if len(statement) <= MAX_LOGGED_STATEMENT else statement[:MAX_LOGGED_STATEMENT] + '...'
+
+class _RequestQueries:
+    __slots__ = ('method', 'route', 'started', 'streamed', 'count', 'seconds', 'slow', 'shapes', 'repeated')
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.streamed = False
+        self.count = 0
+        self.seconds = 0.0
+        self.slow = 0
+        self.shapes = Counter()
+        # shape -> call site where it crossed the threshold
+        self.repeated = {}
+
+def _route() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else request.path
+
+class _EngineProfiler:
+    def __init__(self, slow_seconds: float, repeat_threshold: int):
+        self.slow_seconds = slow_seconds
+        self.repeat_threshold = repeat_threshold
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('profiler_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        queries = g.get('_request_queries') if has_request_context() else None
+
+        if elapsed >= self.slow_seconds:
+            record = {'event': 'slow_query', 'duration_ms': round(elapsed * 1000, 1),
+                      'statement': _truncate(statement), 'call_site': call_site()}
+            if queries is not None:
+                queries.slow += 1
+                record.update(method=queries.method, route=queries.route)
+            logger.warning(json.dumps(record))
+
+        if queries is None:
+            return
+        queries.count += 1
+        queries.seconds += elapsed
+        shape = statement_shape(statement)
+        queries.shapes[shape] += 1
+        if queries.shapes[shape] == self.repeat_threshold + 1:
+            # Only the stack of the repeat that crosses the threshold is walked
+            queries.repeated[shape] = call_site()
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('profiler_query_start'):
+            connection.info['profiler_query_start'].pop()
+
+def _start_request():
+    g._request_queries = _RequestQueries(request.method, _route())
+
+def _defer_streamed_summary(response):
+    queries = g.get('_request_queries')
+    if queries is not None and isinstance(response.response, GeneratorType):
+        # Teardown runs before a streamed body is generated; its queries count too
+        queries.streamed = True
+        response.call_on_close(lambda: _log_summary(queries))
+    return response
+
+def _finish_request(exception=None):
+    queries = g.get('_request_queries')
+    if queries is None or queries.streamed:
+        return
+    g.pop('_request_queries')
+    _log_summary(queries)
+
+def _log_summary(queries: _RequestQueries):
+    repeated = [
+        {'statement': _truncate(shape), 'count': queries.shapes[shape], 'call_site': site}
+        for shape, site in sorted(queries.repeated.items(), key=lambda item: -queries.shapes[item[0]])
+    ][:MAX_REPORTED_SHAPES]
+    summary = {
+        'event': 'request_queries',
+        'method': queries.method,
+        'route': queries.route,
+        'queries': queries.count,
+        'db_ms': round(queries.seconds * 1000, 1),
+        'duration_ms': round((time.perf_counter() - queries.started) * 1000, 1),
+        'slow_queries': queries.slow,
+        'repeated': repeated,
+    }
+    if repeated:
+        logger.warning(json.dumps(summary))
+    else:
+        logger.info(json.dumps(summary))
+
+def init_query_profiler(app: Flask):
+    """Attach the profiler to the app's engines when QUERY_PROFILER is on; a no-op otherwise"""
+    if not app.config.get('QUERY_PROFILER'):
+        return
+    profiler = _EngineProfiler(app.config['SLOW_QUERY_MS'] / 1000.0, app.config['N_PLUS_ONE_THRESHOLD'])
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', profiler.before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', profiler.after_cursor_execute)
+            event.listen(engine, 'handle_error', profiler.handle_error)
+    app.before_request(_start_request)
+    app.after_request(_defer_streamed_summary)
+    app.teardown_request(_finish_request)
+
+    # Like Flask's own logger: make the records visible unless logging is configured
+    if logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+
+@contextmanager
+def assert_query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None, engine=None):
+    """
+    Fail with AssertionError when the block runs more than `max_queries`
+    statements, or repeats one statement shape more than `max_repeats` times.
+    Must be used inside an app context (for db.engine) unless `engine` is given.
+
+    Yields the list of statements executed so far, for further assertions.
+    """
+    engine = engine if engine is not None else db.engine
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    if max_queries is not None and len(statements) > max_queries:
+        raise AssertionError(f'{len(statements)} queries exceed the budget of {max_queries}:\n'
+                             + '\n'.join(_truncate(statement) for statement in statements))
+    if max_repeats is not None:
+        shapes: Dict[str, int] = Counter(statement_shape(statement) for statement in statements)
+        repeated = {shape: count for shape, count in shapes.items() if count > max_repeats}
+        if repeated:
+            raise AssertionError(f'Statements repeated more than {max_repeats} times:\n'
+                                 + '\n'.join(f'{count}x {_truncate(shape)}' for shape, count in repeated.items()))
@@ -0,0 +1,116 @@
+"""
+Request Metrics
+Times every request across all blueprints and counts the database work done
+on its behalf, for the Prometheus-format /metrics endpoint. Requests are
+labelled by their URL rule (/api/v1/articles/<int:article_id>), never the
+raw path, so the number of series stays bounded.
+"""
+import time
+from types import GeneratorType
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.metrics import DEFAULT_BUCKETS, Counter, Gauge, Histogram
+
+# Label of requests that matched no route (404s, scanners)
+UNMATCHED_ROUTE = '<unmatched>'
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests handled, by route and status code',
+                   ('method', 'route', 'status'))
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Time spent handling HTTP requests, by route',
+                             ('method', 'route'))
+REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'HTTP requests currently being handled, by route',
+                             ('method', 'route'))
+REQUEST_QUERIES = Histogram('http_request_db_queries', 'Database statements executed per HTTP request, by route',
+                            ('method', 'route'), buckets=QUERY_COUNT_BUCKETS)
+REQUEST_QUERY_DURATION = Histogram('http_request_db_duration_seconds',
+                                   'Time spent in database statements per HTTP request, by route',
+                                   ('method', 'route'), buckets=DEFAULT_BUCKETS)
+QUERIES = Counter('db_queries_total', 'Database statements executed, in and outside of requests')
+QUERY_DURATION = Counter('db_query_duration_seconds_total', 'Time spent in database statements')
+
+class _RequestStats:
+    __slots__ = ('method', 'route', 'started', 'status', 'streamed', 'queries', 'query_seconds')
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.status = None
+        self.streamed = False
+        self.queries = 0
+        self.query_seconds = 0.0
+
+def _current_stats():
+    return g.get('_request_metrics') if has_request_context() else None
+
+# Statements are timed on every engine, so work done by background jobs
+# shows up in the totals as well; only statements run inside a request are
+# charged to it.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    QUERIES.inc()
+    QUERY_DURATION.inc(elapsed)
+    stats = _current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_query_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_query_start'):
+        connection.info['metrics_query_start'].pop()
+
+def _start_request():
+    rule = request.url_rule
+    stats = _RequestStats(request.method, rule.rule if rule is not None else UNMATCHED_ROUTE)
+    g._request_metrics = stats
+    REQUESTS_IN_PROGRESS.inc(method=stats.method, route=stats.route)
+
+def _record_status(response):
+    stats = _current_stats()
+    if stats is not None:
+        stats.status = response.status_code
+        if isinstance(response.response, GeneratorType):
+            # Teardown runs before a streamed body is generated; stop the clock once it has been sent
+            stats.streamed = True
+            response.call_on_close(lambda: _observe(stats))
+    return response
+
+def _finish_request(exception=None):
+    stats = _current_stats()
+    if stats is None or stats.streamed:
+        return
+    g.pop('_request_metrics')
+    if exception is not None:
+        stats.status = 500
+    _observe(stats)
+
+def _observe(stats: _RequestStats):
+    labels = {'method': stats.method, 'route': stats.route}
+    REQUESTS_IN_PROGRESS.dec(**labels)
+    REQUESTS.inc(status=stats.status if stats.status is not None else 500, **labels)
+    REQUEST_DURATION.observe(time.perf_counter() - stats.started, **labels)
+    REQUEST_QUERIES.observe(stats.queries, **labels)
+    REQUEST_QUERY_DURATION.observe(stats.query_seconds, **labels)
+
+def init_request_metrics(app: Flask):
+    """Instrument every request of the app; register before any other before_request hook"""
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
@@ -0,0 +1,165 @@
+"""
+Request Profiler
+Profiles a single request with cProfile when an admin asks for it with an
+`X-Profile: 1` header (or a `_profile=1` query parameter). The profile is
+saved under PROFILE_DIR as a pstats file plus a small JSON description, and
+the response names it in X-Profile-Id for download from /api/v1/admin/profiles.
+Requests that do not ask pay for one header lookup.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime
+from types import GeneratorType
+from typing import Dict, List, Optional
+
+from flask import Flask, current_app, g, request
+from flask_jwt_extended import get_current_user, verify_jwt_in_request
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = '_profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+_PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+_TRUTHY = ('1', 'true', 'yes')
+
+class _ActiveProfile:
+    __slots__ = ('id', 'profile', 'started', 'user_id', 'method', 'path', 'route', 'status', 'streamed', 'app')
+
+    def __init__(self, user_id: int):
+        self.id = f'{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.user_id = user_id
+        self.method = request.method
+        self.path = request.full_path.rstrip('?')
+        self.route = request.url_rule.rule if request.url_rule is not None else None
+        self.status = None
+        self.streamed = False
+        self.app = current_app._get_current_object()
+
+def _requested() -> bool:
+    value = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_FLAG)
+    return value is not None and value.lower() in _TRUTHY
+
+def _requesting_admin():
+    """The authenticated admin sending the request, or None; never rejects the request itself"""
+    try:
+        verify_jwt_in_request(optional=True)
+        user = get_current_user()
+    except Exception:
+        return None
+    return user if user is not None and user.is_admin else None
+
+def _start_profile():
+    if not _requested():
+        return
+    user = _requesting_admin()
+    if user is None:
+        return
+    active = _ActiveProfile(user.id)
+    try:
+        active.profile.enable()
+    except ValueError:
+        # Another profiler is already running in this thread
+        return
+    g._request_profile = active
+
+def _add_profile_header(response):
+    active = g.get('_request_profile')
+    if active is not None:
+        active.status = response.status_code
+        response.headers[PROFILE_ID_HEADER] = active.id
+        if isinstance(response.response, GeneratorType):
+            # Teardown runs before a streamed body (RSS, exports) is generated; profile until it is sent
+            active.streamed = True
+            response.call_on_close(lambda: _finish(active))
+    return response
+
+def _finish_profile(exception=None):
+    active = g.get('_request_profile')
+    if active is None or active.streamed:
+        return
+    g.pop('_request_profile')
+    if exception is not None:
+        active.status = 500
+    _finish(active)
+
+def _finish(active: _ActiveProfile):
+    active.profile.disable()
+    try:
+        save_profile(active)
+    except OSError:
+        active.app.logger.exception('Could not save request profile %s', active.id)
+
+def profile_dir() -> str:
+    return current_app.config['PROFILE_DIR']
+
+def save_profile(active: _ActiveProfile):
+    """Write the pstats file and its JSON description, then drop the oldest profiles"""
+    directory = active.app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    meta = {
+        'id': active.id,
+        'method': active.method,
+        'path': active.path,
+        'route': active.route,
+        'status': active.status,
+        'user_id': active.user_id,
+        'duration_ms': round((time.perf_counter() - active.started) * 1000, 1),
+        'created_at': datetime.utcnow(),
+    }
+    active.profile.dump_stats(os.path.join(directory, f'{active.id}.prof'))
+    with open(os.path.join(directory, f'{active.id}.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, default=lambda value: value.isoformat())
+    _prune(directory, active.app.config['PROFILE_MAX_FILES'])
+
+def _prune(directory: str, keep: int):
+    """Delete all but the newest `keep` profiles (ids sort by creation time)"""
+    ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+    for profile_id in ids[:max(0, len(ids) - keep)]:
+        for suffix in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> List[Dict]:
+    """Descriptions of the stored profiles, newest first"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored pstats file, or None for unknown or malformed ids"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(profile_dir(), f'{profile_id}.prof')
+    return path if os.path.isfile(path) else None
+
+def render_profile(path: str, sort: str = 'cumulative', limit: int = 50) -> str:
+    """pstats report of a stored profile, the top `limit` functions by `sort`"""
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+def init_request_profiler(app: Flask):
+    """Let admins profile individual requests of the app"""
+    app.before_request(_start_profile)
+    app.after_request(_add_profile_header)
+    app.teardown_request(_finish_profile)
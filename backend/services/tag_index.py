@@ -0,0 +1,53 @@
+"""
+Tag Index
+Backfills the normalized tags / article_tags tables from the JSON
+Article.tags column. New writes keep them in sync through Article.set_tags;
+this covers articles written before the tables existed.
+"""
+from sqlalchemy import insert, select
+
+def backfill_article_tags(connection, batch_size: int = 500) -> int:
+    """
+    Link every article to the tags in its JSON column, in id order, batch by batch.
+    Existing tags and links are kept. Returns the number of links added.
+    """
+    from models.models import Article, Tag, article_tags, parse_tags
+
+    articles, tags = Article.__table__, Tag.__table__
+    added = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(articles.c.id, articles.c.tags).where(articles.c.id > last_id)
+            .order_by(articles.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        wanted = {row.id: Tag.normalize_names(parse_tags(row.tags)) for row in rows}
+        names = {name for article_names in wanted.values() for name in article_names}
+        if not names:
+            continue
+
+        tag_ids = dict(connection.execute(select(tags.c.name, tags.c.id).where(tags.c.name.in_(names))).all())
+        missing = sorted(names - set(tag_ids))
+        if missing:
+            connection.execute(insert(tags), [{'name': name} for name in missing])
+            tag_ids.update(connection.execute(
+                select(tags.c.name, tags.c.id).where(tags.c.name.in_(missing))
+            ).all())
+
+        linked = set(connection.execute(
+            select(article_tags.c.article_id, article_tags.c.tag_id)
+            .where(article_tags.c.article_id.in_(list(wanted)))
+        ).all())
+        links = [
+            {'article_id': article_id, 'tag_id': tag_ids[name]}
+            for article_id, article_names in wanted.items() for name in article_names
+            if (article_id, tag_ids[name]) not in linked
+        ]
+        if links:
+            connection.execute(insert(article_tags), links)
+            added += len(links)
+    return added
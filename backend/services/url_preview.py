@@ -3,16 +3,67 @@ URL Preview Service
 Crawls URLs to extract metadata for article previews without storing content
 """
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import urljoin, urlparse
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import logging
+import os
+import threading
+import time
+from services.preview_cache import PreviewCache
+from utils.metrics import Histogram
+
+# The C-accelerated lxml parser is in requirements.txt; html.parser covers platforms without it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+FETCH_DURATION = Histogram('url_preview_fetch_duration_seconds',
+                           'Time spent fetching and parsing a URL preview (cache misses only), by outcome',
+                           ('outcome',), buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+# Markers used to decide when enough of the document has been read
+_HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+_HEAD_DESCRIPTION = re.compile(rb'<meta[^>]+(?:og:description|twitter:description|name=["\']?description)', re.IGNORECASE)
+_HEAD_IMAGE = re.compile(rb'<meta[^>]+(?:og:image|twitter:image)', re.IGNORECASE)
+_BODY_PARAGRAPH = re.compile(rb'</p\s*>', re.IGNORECASE)
+_BODY_IMAGE = re.compile(rb'<img\b', re.IGNORECASE)
+
+class _HostQueue:
+    """Fetches of one host: how many are on the pool and which wait for a slot"""
+    __slots__ = ('active', 'pending')
+
+    def __init__(self):
+        self.active = 0
+        self.pending = deque()
 
 class URLPreviewService:
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, cache: Optional[PreviewCache] = None,
+                 max_bytes: int = 512 * 1024, chunk_size: int = 16 * 1024,
+                 max_workers: int = 8, per_host_limit: int = 2):
         self.timeout = timeout
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self._executor = None
+        # host -> _HostQueue, only while the host has fetches in flight
+        self._hosts = {}
+        self._lock = threading.Lock()
         self.session = requests.Session()
+        # Keep enough pooled keep-alive connections for every batch worker
+        adapter = HTTPAdapter(pool_connections=max_workers * 2, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         # Set a user agent to avoid blocking
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -32,17 +83,117 @@ class URLPreviewService:
             'error': str
         }
         """
+        # Validate URL
+        if not self._is_valid_url(url):
+            return self._error_response("Invalid URL format")
+
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        preview_data = self._fetch_preview(url)
+
+        if self.cache is not None:
+            self.cache.set(url, preview_data)
+
+        return preview_data
+
+    def get_previews(self, urls: List[str]) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+        """
+        Fetch previews for many URLs concurrently.
+
+        Fetches run on a bounded thread pool shared by all callers, with at
+        most per_host_limit requests in flight per host; the rest wait
+        outside the pool, so a busy host never holds workers idle. Yields
+        (index, preview) pairs in completion order; duplicate URLs are
+        fetched once.
+        """
+        positions = {}
+        for index, url in enumerate(urls):
+            positions.setdefault(url, []).append(index)
+
+        futures = {self._submit_limited(url): url for url in positions}
+
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                preview = future.result()
+            except Exception as e:
+                self.logger.error(f"URL preview error for {url}: {str(e)}")
+                preview = self._error_response(f"Preview extraction failed: {str(e)}")
+            for index in positions[url]:
+                yield index, dict(preview)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='url-preview')
+            return self._executor
+
+    def _submit_limited(self, url: str) -> Future:
+        """Run get_preview(url) on the pool now, or once its host is below per_host_limit"""
+        host = (urlparse(url).hostname or '').lower()
+        future = Future()
+        with self._lock:
+            queue = self._hosts.get(host)
+            if queue is None:
+                queue = self._hosts[host] = _HostQueue()
+            if queue.active >= self.per_host_limit:
+                queue.pending.append((url, future))
+                return future
+            queue.active += 1
+        self._get_executor().submit(self._run_limited, host, url, future)
+        return future
+
+    def _run_limited(self, host: str, url: str, future: Future):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.get_preview(url))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            # Hand the host's slot to its next waiting URL, or drop the idle host
+            with self._lock:
+                queue = self._hosts[host]
+                if queue.pending:
+                    url, future = queue.pending.popleft()
+                else:
+                    queue.active -= 1
+                    if queue.active == 0:
+                        del self._hosts[host]
+                    return
+            self._get_executor().submit(self._run_limited, host, url, future)
+
+    def _fetch_preview(self, url: str) -> Dict[str, Optional[str]]:
+        """Fetch and parse a URL, recording how long it took"""
+        started = time.perf_counter()
+        preview_data = self._fetch_and_parse(url)
+        FETCH_DURATION.observe(time.perf_counter() - started,
+                               outcome='success' if preview_data['success'] else 'error')
+        return preview_data
+
+    def _fetch_and_parse(self, url: str) -> Dict[str, Optional[str]]:
+        """Fetch and parse a URL; network and parse failures become error responses"""
         try:
-            # Validate URL
-            if not self._is_valid_url(url):
-                return self._error_response("Invalid URL format")
+            # Make HTTP request, streaming so the body is only read as far as needed
+            response = self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True)
+            try:
+                response.raise_for_status()
 
-            # Make HTTP request
-            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
-            response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                mime_type = content_type.split(';')[0].strip().lower()
+                if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                    return self._error_response(f"Unsupported content type: {mime_type}")
 
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+                markup = self._read_head(response)
+            finally:
+                response.close()
+
+            # Parse HTML (use the HTTP charset if given, otherwise let BeautifulSoup sniff it)
+            encoding = response.encoding if 'charset=' in content_type.lower() else None
+            soup = BeautifulSoup(markup, HTML_PARSER, from_encoding=encoding)
             
             # Extract metadata
             preview_data = {
@@ -67,6 +218,40 @@ class URLPreviewService:
             self.logger.error(f"URL preview error for {url}: {str(e)}")
             return self._error_response(f"Preview extraction failed: {str(e)}")
 
+    def _read_head(self, response) -> bytes:
+        """
+        Read the response body until the extractors have what they need.
+
+        Stops at </head> when the head carries description and image meta
+        tags; otherwise keeps reading until the first </p> and <img> of the
+        body are in, or max_bytes have been read.
+        """
+        buffer = bytearray()
+        head_end = None
+
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            if not chunk:
+                continue
+            buffer.extend(chunk)
+            if len(buffer) >= self.max_bytes:
+                del buffer[self.max_bytes:]
+                break
+
+            if head_end is None:
+                match = _HEAD_END.search(buffer)
+                if not match:
+                    continue
+                head_end = match.end()
+                head = bytes(buffer[:head_end])
+                if _HEAD_DESCRIPTION.search(head) and _HEAD_IMAGE.search(head):
+                    break
+
+            body = bytes(buffer[head_end:])
+            if _BODY_PARAGRAPH.search(body) and _BODY_IMAGE.search(body):
+                break
+
+        return bytes(buffer)
+
     def _is_valid_url(self, url: str) -> bool:
         """Validate URL format"""
         try:
@@ -189,5 +374,13 @@ class URLPreviewService:
             'error': error_message
         }
 
-# Global instance
-url_preview_service = URLPreviewService()
+# Global instance, cached in memory and in a SQLite file shared by all workers
+# (set URL_PREVIEW_CACHE_PATH to an empty value to keep the cache in memory only)
+url_preview_service = URLPreviewService(cache=PreviewCache(
+    path=os.getenv(
+        'URL_PREVIEW_CACHE_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'url_preview_cache.db')
+    ),
+    ttl=int(os.getenv('URL_PREVIEW_CACHE_TTL', '86400')),
+    negative_ttl=int(os.getenv('URL_PREVIEW_NEGATIVE_CACHE_TTL', '600'))
+))
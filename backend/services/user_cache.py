@@ -0,0 +1,121 @@
+"""
+JWT User Cache
+Resolves the user behind a JWT without a database round trip on most
+requests. Column snapshots are kept per process with a short TTL and are
+attached to the request's session without a SELECT; entries are dropped as
+soon as a transaction that changed or deleted the user commits.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from database import db
+
+class UserCache:
+    def __init__(self, ttl: int = 60, max_entries: int = 10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # user_id -> (expires_at, column snapshot)
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load that raced one is not cached
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Return a fresh column snapshot for user_id, or None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id: int, snapshot: Dict, generation: Optional[int] = None):
+        """Store a snapshot, unless an invalidation happened since generation was read"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[user_id] = (self.clock() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+def get_user_cache() -> Optional[UserCache]:
+    """Return the user cache of the current app, if one is configured"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('user_cache')
+
+def _snapshot(user) -> Dict:
+    return {attr.key: getattr(user, attr.key) for attr in user.__mapper__.column_attrs}
+
+def load_user(identity) -> Optional[object]:
+    """
+    Return the User for a JWT identity, attached to the current session.
+    Cache hits issue no query; misses load the row and cache it.
+    """
+    from models.models import User
+
+    try:
+        user_id = int(identity)
+    except (TypeError, ValueError):
+        return None
+
+    cache = get_user_cache()
+    snapshot = cache.get(user_id) if cache is not None else None
+    if snapshot is None:
+        generation = cache.generation if cache is not None else None
+        user = db.session.get(User, user_id)
+        if user is not None and cache is not None:
+            cache.set(user_id, _snapshot(user), generation)
+        return user
+
+    # Rebuild a persistent instance from the snapshot without a SELECT
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+# Invalidation: collect users changed or deleted by each flush and drop them
+# once the transaction commits.
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_user_invalidations(session, flush_context):
+    from models.models import User
+
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            session.info.setdefault('user_invalidations', set()).add(obj.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_user_invalidations(session):
+    user_ids = session.info.pop('user_invalidations', None)
+    cache = get_user_cache()
+    if user_ids and cache is not None:
+        cache.invalidate(user_ids)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_user_invalidations(session):
+    session.info.pop('user_invalidations', None)
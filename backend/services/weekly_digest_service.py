@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta, date
-from models.models import Article, User
+from models.models import Article, User, WeeklyRollup, normalize_tag
 from database import db
+from collections import Counter
 from typing import List, Dict, Optional, Union
 import json
 
@@ -61,7 +62,7 @@ class WeeklyDigestService:
                 week_end_date = week_end
         
         # Get user's articles from that week
-        articles = Article.query.filter(
+        articles = Article.with_author().filter(
             Article.user_id == user_id,
             Article.reading_date >= week_start_date,
             Article.reading_date <= week_end_date
@@ -75,31 +76,19 @@ class WeeklyDigestService:
         username = user.username if user else "User"
         
         # Generate title
-        if custom_title:
-            title = custom_title
-        else:
-            # Format week range nicely
-            start_str = week_start_date.strftime("%B %d")
-            end_str = week_end_date.strftime("%B %d, %Y")
-            if week_start_date.month == week_end_date.month:
-                start_str = week_start_date.strftime("%B %d")
-                end_str = week_end_date.strftime("%d, %Y")
-            title = f"Weekly Reading Digest: {start_str} - {end_str}"
+        title = custom_title or self.default_title(week_start_date, week_end_date)
         
         # Generate articles section
         articles_section = self._generate_articles_section(articles)
         
         # Generate the complete content using the template
-        content = self.template.format(
-            title=title,
-            articles_section=articles_section,
-            articles_count=len(articles),
-            week_start=week_start_date.strftime("%B %d, %Y"),
-            week_end=week_end_date.strftime("%B %d, %Y")
-        )
+        content = self.render_content(title, articles_section, len(articles), week_start_date, week_end_date)
         
-        # Generate summary
-        summary = self._generate_summary(articles, week_start_date, week_end_date)
+        # Generate summary, from the maintained rollup when the range is exactly one week
+        rollup = None
+        if week_start_date.weekday() == 0 and week_end_date - week_start_date == timedelta(days=6):
+            rollup = db.session.get(WeeklyRollup, (user_id, week_start_date))
+        summary = self._generate_summary(articles, week_start_date, week_end_date, rollup)
         
         return {
             'title': title,
@@ -111,132 +100,151 @@ class WeeklyDigestService:
             'articles': [article.to_dict() for article in articles]
         }
     
+    def default_title(self, week_start: date, week_end: date) -> str:
+        """Title for a digest covering week_start to week_end"""
+        # Format week range nicely
+        start_str = week_start.strftime("%B %d")
+        end_str = week_end.strftime("%B %d, %Y")
+        if week_start.month == week_end.month:
+            start_str = week_start.strftime("%B %d")
+            end_str = week_end.strftime("%d, %Y")
+        return f"Weekly Reading Digest: {start_str} - {end_str}"
+    
+    def render_content(self, title: str, articles_section: str, articles_count: int,
+                       week_start: date, week_end: date) -> str:
+        """Fill the digest template"""
+        return self.template.format(
+            title=title,
+            articles_section=articles_section,
+            articles_count=articles_count,
+            week_start=week_start.strftime("%B %d, %Y"),
+            week_end=week_end.strftime("%B %d, %Y")
+        )
+    
     def _generate_articles_section(self, articles: List[Article]) -> str:
         """Generate the articles section of the digest"""
         if not articles:
             return "_No articles were read this week._"
         
-        sections = []
-        
-        for i, article in enumerate(articles, 1):
-            # Article title with URL link
-            if article.url:
-                article_header = f"[{article.title}]({article.url})"
-            else:
-                article_header = article.title
-            
-            # Build the article section
-            section = f"### {i}. {article_header}\n\n"
-            
-            # Add reading date
-            section += f"**Read on:** {article.reading_date.strftime('%B %d, %Y')}\n\n"
-            
-            # Add tags if available
-            if article.tags:
-                try:
-                    tags = json.loads(article.tags) if isinstance(article.tags, str) else article.tags
-                    if tags and isinstance(tags, list):
-                        tags_str = ", ".join([f"`{tag}`" for tag in tags])
-                        section += f"**Tags:** {tags_str}\n\n"
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            
-            # Add AI summary placeholder
-            section += "**Summary:**\n"
-            section += "_AI summary will be generated here in future updates._\n\n"
-            
-            # Add user notes
-            if article.notes:
-                section += "**My Notes:**\n"
-                # Format notes with proper markdown indentation
-                notes_lines = article.notes.split('\n')
-                formatted_notes = '\n'.join([f"> {line}" if line.strip() else ">" for line in notes_lines])
-                section += f"{formatted_notes}\n\n"
-            else:
-                section += "**My Notes:**\n"
-                section += "_No notes taken for this article._\n\n"
-            
-            sections.append(section)
+        return self.join_article_sections([self.render_article_section(article) for article in articles])
+    
+    @staticmethod
+    def join_article_sections(sections: List[str]) -> str:
+        """Number pre-rendered article sections and join them in order"""
+        return '\n'.join(f"### {i}. {section}" for i, section in enumerate(sections, 1))
+    
+    def render_article_section(self, article: Article) -> str:
+        """
+        Render one article's section without its position number, so the
+        result stays valid when articles before it are added or removed
+        """
+        # Article title with URL link
+        if article.url:
+            article_header = f"[{article.title}]({article.url})"
+        else:
+            article_header = article.title
+        
+        # Build the article section
+        section = f"{article_header}\n\n"
+        
+        # Add reading date
+        section += f"**Read on:** {article.reading_date.strftime('%B %d, %Y')}\n\n"
+        
+        # Add tags if available
+        if article.tags:
+            try:
+                tags = json.loads(article.tags) if isinstance(article.tags, str) else article.tags
+                if tags and isinstance(tags, list):
+                    tags_str = ", ".join([f"`{tag}`" for tag in tags])
+                    section += f"**Tags:** {tags_str}\n\n"
+            except (json.JSONDecodeError, TypeError):
+                pass
+        
+        # Add AI summary placeholder
+        section += "**Summary:**\n"
+        section += "_AI summary will be generated here in future updates._\n\n"
+        
+        # Add user notes
+        if article.notes:
+            section += "**My Notes:**\n"
+            # Format notes with proper markdown indentation
+            notes_lines = article.notes.split('\n')
+            formatted_notes = '\n'.join([f"> {line}" if line.strip() else ">" for line in notes_lines])
+            section += f"{formatted_notes}\n\n"
+        else:
+            section += "**My Notes:**\n"
+            section += "_No notes taken for this article._\n\n"
         
-        return '\n'.join(sections)
+        return section
     
-    def _generate_summary(self, articles: List[Article], week_start: date, week_end: date) -> str:
-        """Generate a summary of the weekly digest"""
+    def _generate_summary(self, articles: List[Article], week_start: date, week_end: date,
+                          rollup: Optional[WeeklyRollup] = None) -> str:
+        """Generate a summary of the weekly digest, using the week's rollup row when given"""
         if not articles:
             return f"No articles were read during the week of {week_start} to {week_end}."
         
-        # Count articles by day
-        daily_counts = {}
-        for article in articles:
-            day = article.reading_date.strftime('%A')
-            daily_counts[day] = daily_counts.get(day, 0) + 1
-        
-        # Extract unique tags
-        all_tags = []
-        for article in articles:
-            if article.tags:
-                try:
-                    tags = json.loads(article.tags) if isinstance(article.tags, str) else article.tags
-                    if tags and isinstance(tags, list):
-                        all_tags.extend(tags)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-        
-        unique_tags = list(set(all_tags))
+        if rollup is not None:
+            article_count = rollup.article_count
+            daily_counts = {}
+            for offset, count in enumerate(rollup.get_day_counts()):
+                if count:
+                    daily_counts[(rollup.week_start + timedelta(days=offset)).strftime('%A')] = count
+            tag_counts = Counter(rollup.get_tag_counts())
+        else:
+            # Custom ranges do not line up with rollup weeks, so count the loaded articles
+            article_count = len(articles)
+            daily_counts = {}
+            tag_counts = Counter()
+            for article in articles:
+                day = article.reading_date.strftime('%A')
+                daily_counts[day] = daily_counts.get(day, 0) + 1
+                tag_counts.update({normalize_tag(tag) for tag in article.get_tags() if normalize_tag(tag)})
         
         # Build summary
         summary_parts = []
-        summary_parts.append(f"Read {len(articles)} articles during the week of {week_start.strftime('%B %d')} to {week_end.strftime('%B %d, %Y')}.")
+        summary_parts.append(f"Read {article_count} articles during the week of {week_start.strftime('%B %d')} to {week_end.strftime('%B %d, %Y')}.")
         
         if daily_counts:
             most_active_day = max(daily_counts.items(), key=lambda x: x[1])
             summary_parts.append(f"Most active reading day: {most_active_day[0]} with {most_active_day[1]} articles.")
         
-        if unique_tags:
-            top_tags = unique_tags[:5]  # Show top 5 tags
+        if tag_counts:
+            # Show top 5 tags, most frequent first
+            top_tags = [tag for tag, _ in sorted(tag_counts.items(), key=lambda x: (-x[1], x[0]))[:5]]
             summary_parts.append(f"Main topics covered: {', '.join(top_tags)}.")
         
         return ' '.join(summary_parts)
 
-    def get_available_weeks(self, user_id: int, limit: int = 12) -> List[Dict]:
-        """Get available weeks that have articles for the user"""
-        # Get all reading dates for the user
-        articles = db.session.query(Article.reading_date).filter(
-            Article.user_id == user_id
-        ).distinct().order_by(Article.reading_date.desc()).all()
-        
-        if not articles:
-            return []
-        
+    def get_available_weeks(self, user_id: int, limit: int = 12,
+                            before: Optional[Union[date, str]] = None) -> List[Dict]:
+        """
+        Get available weeks that have articles for the user, newest first
+
+        Reads the maintained weekly rollups, so this is a single indexed
+        query. Pass the oldest returned week_start as `before` to page back
+        through older weeks.
+        """
+        query = WeeklyRollup.query.filter(
+            WeeklyRollup.user_id == user_id,
+            WeeklyRollup.article_count > 0
+        )
+
+        if before:
+            if isinstance(before, str):
+                before = datetime.strptime(before, '%Y-%m-%d').date()
+            # Rollups are keyed by Monday, so older weeks start before that Monday
+            query = query.filter(WeeklyRollup.week_start < before - timedelta(days=before.weekday()))
+
         weeks = []
-        processed_weeks = set()
-        
-        for article in articles:
-            reading_date = article.reading_date
-            # Calculate the Monday of that week
-            monday = reading_date - timedelta(days=reading_date.weekday())
+        for rollup in query.order_by(WeeklyRollup.week_start.desc()).limit(limit):
+            monday = rollup.week_start
             sunday = monday + timedelta(days=6)
-            
-            week_key = monday.isoformat()
-            
-            if week_key not in processed_weeks:
-                # Count articles in this week
-                article_count = Article.query.filter(
-                    Article.user_id == user_id,
-                    Article.reading_date >= monday,
-                    Article.reading_date <= sunday
-                ).count()
-                
-                weeks.append({
-                    'week_start': monday.isoformat(),
-                    'week_end': sunday.isoformat(),
-                    'week_label': f"{monday.strftime('%b %d')} - {sunday.strftime('%b %d, %Y')}",
-                    'article_count': article_count
-                })
-                
-                processed_weeks.add(week_key)
-            
-            if len(weeks) >= limit:
-                break
-        
+
+            weeks.append({
+                'week_start': monday.isoformat(),
+                'week_end': sunday.isoformat(),
+                'week_label': f"{monday.strftime('%b %d')} - {sunday.strftime('%b %d, %Y')}",
+                'article_count': rollup.article_count
+            })
+
         return weeks
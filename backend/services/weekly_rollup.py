@@ -0,0 +1,223 @@
+"""
+Weekly Rollup Service
+Maintains the weekly_rollups table: per-user, per-week article counts, per-day
+counts and tag frequencies. Rows are adjusted incrementally in the same
+transaction as every article insert, update and delete, so weekly stats never
+need to re-scan the articles table.
+"""
+import json
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, event, inspect as sa_inspect, select, tuple_
+
+from database import db
+
+def week_start_for(day) -> date:
+    """Return the Monday of the week containing day"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day - timedelta(days=day.weekday())
+
+def _article_tags(value) -> set:
+    from models.models import normalize_tag, parse_tags
+
+    return {normalize_tag(tag)[:100] for tag in parse_tags(value) if normalize_tag(tag)}
+
+class RollupDelta:
+    """Pending change to one (user_id, week_start) rollup row"""
+
+    def __init__(self):
+        self.article_count = 0
+        self.day_counts = [0] * 7
+        self.tag_counts = Counter()
+
+    def add(self, reading_date, tags: Iterable[str], sign: int):
+        self.article_count += sign
+        self.day_counts[reading_date.weekday()] += sign
+        for tag in tags:
+            self.tag_counts[tag] += sign
+
+def _accumulate(deltas: Dict[Tuple[int, date], RollupDelta], user_id, reading_date, tags_value, sign: int):
+    if user_id is None or reading_date is None:
+        return
+    if isinstance(reading_date, datetime):
+        reading_date = reading_date.date()
+    deltas[(user_id, week_start_for(reading_date))].add(reading_date, _article_tags(tags_value), sign)
+
+ROLLUP_FIELDS = ('user_id', 'reading_date', 'tags')
+
+def _previous_values(session, article) -> Tuple:
+    """(user_id, reading_date, tags) of an article as stored before this flush"""
+    state = sa_inspect(article)
+    values = []
+    for key in ROLLUP_FIELDS:
+        history = state.attrs[key].history
+        known = history.deleted or history.unchanged
+        if not known and history.added:
+            # Assigned while expired, so the old value was never loaded
+            break
+        values.append(known[0] if known else getattr(article, key))
+    else:
+        return tuple(values)
+
+    from models.models import Article
+
+    articles = Article.__table__
+    return tuple(session.connection().execute(
+        select(*(articles.c[key] for key in ROLLUP_FIELDS)).where(articles.c.id == article.id)
+    ).one())
+
+def apply_deltas(connection, deltas: Dict[Tuple[int, date], RollupDelta]):
+    """Merge pending deltas into weekly_rollups using the given connection"""
+    from models.models import WeeklyRollup
+
+    table = WeeklyRollup.__table__
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    deltas = {
+        key: delta for key, delta in sorted(deltas.items())
+        if delta.article_count or any(delta.day_counts) or any(delta.tag_counts.values())
+    }
+    if not deltas:
+        return
+
+    # Create missing rows without racing a concurrent writer, then lock them
+    # all, in key order, with one statement each
+    now = datetime.utcnow()
+    connection.execute(
+        insert(table).on_conflict_do_nothing(index_elements=['user_id', 'week_start']),
+        [{'user_id': user_id, 'week_start': week_start, 'article_count': 0, 'day_counts': json.dumps([0] * 7),
+          'tag_counts': '{}', 'updated_at': now} for user_id, week_start in deltas]
+    )
+    rows = connection.execute(
+        select(table).where(tuple_(table.c.user_id, table.c.week_start).in_(list(deltas)))
+        .order_by(table.c.user_id, table.c.week_start).with_for_update()
+    ).all()
+
+    updates = []
+    deletes = []
+    for row in rows:
+        delta = deltas[(row.user_id, row.week_start)]
+        key = {'key_user_id': row.user_id, 'key_week_start': row.week_start}
+        article_count = row.article_count + delta.article_count
+        if article_count <= 0:
+            deletes.append(key)
+            continue
+
+        # The row exposes the same JSON columns as the model, so reuse its parsers
+        day_counts = [max(count + change, 0)
+                      for count, change in zip(WeeklyRollup.get_day_counts(row), delta.day_counts)]
+        tag_counts = Counter(WeeklyRollup.get_tag_counts(row))
+        tag_counts.update(delta.tag_counts)
+        updates.append(dict(
+            key,
+            article_count=article_count,
+            day_counts=json.dumps(day_counts),
+            tag_counts=json.dumps({tag: count for tag, count in sorted(tag_counts.items()) if count > 0}),
+            updated_at=now
+        ))
+
+    by_key = (table.c.user_id == bindparam('key_user_id')) & (table.c.week_start == bindparam('key_week_start'))
+    if deletes:
+        connection.execute(table.delete().where(by_key), deletes)
+    if updates:
+        # Columns named in the parameter dicts are SET
+        connection.execute(table.update().where(by_key), updates)
+
+def record_inserted_articles(connection, rows: Iterable[Dict]):
+    """
+    Count articles inserted with Core statements, which bypass the flush
+    hooks below. Each row needs user_id, reading_date and tags (JSON).
+    """
+    deltas = defaultdict(RollupDelta)
+    for row in rows:
+        _accumulate(deltas, row['user_id'], row['reading_date'], row['tags'], 1)
+    if deltas:
+        apply_deltas(connection, deltas)
+
+def rebuild_weekly_rollups(connection, user_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """
+    Recompute weekly_rollups from the articles table, for one user or everyone.
+    Returns the number of rollup rows written.
+    """
+    from models.models import Article, WeeklyRollup
+
+    articles = Article.__table__
+    rollups = WeeklyRollup.__table__
+
+    delete = rollups.delete()
+    query = select(articles.c.user_id, articles.c.reading_date, articles.c.tags)
+    if user_id is not None:
+        delete = delete.where(rollups.c.user_id == user_id)
+        query = query.where(articles.c.user_id == user_id)
+    connection.execute(delete)
+
+    deltas = defaultdict(RollupDelta)
+    result = connection.execution_options(yield_per=batch_size).execute(query)
+    for row in result:
+        _accumulate(deltas, row.user_id, row.reading_date, row.tags, 1)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': owner_id,
+            'week_start': week_start,
+            'article_count': delta.article_count,
+            'day_counts': json.dumps(delta.day_counts),
+            'tag_counts': json.dumps(dict(sorted(delta.tag_counts.items()))),
+            'updated_at': now
+        }
+        for (owner_id, week_start), delta in sorted(deltas.items())
+    ]
+    for start in range(0, len(rows), batch_size):
+        connection.execute(rollups.insert(), rows[start:start + batch_size])
+    return len(rows)
+
+# Incremental maintenance: snapshot the stored state of changed articles before
+# the flush writes them, then apply the net change on the flush's own
+# connection, so rollups commit or roll back together with the articles.
+
+@event.listens_for(db.session, 'before_flush')
+def _snapshot_articles(session, flush_context, instances):
+    from models.models import Article
+
+    previous = session.info.setdefault('rollup_previous', {})
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Article) or obj in previous or obj not in session.deleted and \
+                not any(sa_inspect(obj).attrs[key].history.has_changes() for key in ROLLUP_FIELDS):
+            continue
+        previous[obj] = _previous_values(session, obj)
+
+@event.listens_for(db.session, 'after_flush')
+def _update_weekly_rollups(session, flush_context):
+    from models.models import Article, User, WeeklyRollup
+
+    previous = session.info.pop('rollup_previous', {})
+    # Rollups of deleted users go with them; SQLite does not enforce ON DELETE CASCADE
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    if deleted_users:
+        table = WeeklyRollup.__table__
+        session.connection().execute(table.delete().where(table.c.user_id.in_(deleted_users)))
+    deltas = defaultdict(RollupDelta)
+
+    for obj in session.new:
+        if isinstance(obj, Article):
+            _accumulate(deltas, obj.user_id, obj.reading_date, obj.tags, 1)
+
+    for obj, values in previous.items():
+        _accumulate(deltas, *values, -1)
+        if obj not in session.deleted:
+            _accumulate(deltas, obj.user_id, obj.reading_date, obj.tags, 1)
+
+    deltas = {key: delta for key, delta in deltas.items() if key[0] not in deleted_users}
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_article_snapshots(session):
+    session.info.pop('rollup_previous', None)
@@ -0,0 +1,153 @@
+"""
+Tests for bulk article creation
+"""
+import unittest
+import sys
+import os
+import json
+from datetime import date
+from unittest.mock import patch
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest, Tag, WeeklyRollup
+from services.article_search import search_articles
+from flask_jwt_extended import create_access_token
+import services.article_bulk as article_bulk
+
+
+class TestBulkCreate(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def item(self, i, **overrides):
+        data = {'title': f'Article {i}', 'content': f'Body {i}', 'tags': ['python', f'topic-{i % 3}'],
+                'reading_date': '2025-01-06'}
+        data.update(overrides)
+        return data
+
+    def test_json_array_in_batches(self):
+        items = [self.item(i) for i in range(25)]
+        with patch.object(article_bulk, 'BULK_BATCH_SIZE', 10):
+            response = self.client.post('/api/v1/articles/bulk', json=items, headers=self.headers)
+
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual(body['created'], 25)
+        self.assertEqual([result['index'] for result in body['results']], list(range(25)))
+        self.assertEqual(Article.query.count(), 25)
+        # Tags are shared across batches, not duplicated
+        self.assertEqual(Tag.query.count(), 4)
+
+        # What the ORM hooks maintain is in place: rollups, excerpts, the draft digest and the search index
+        rollup = db.session.get(WeeklyRollup, (self.user_id, date(2025, 1, 6)))
+        self.assertEqual(rollup.article_count, 25)
+        self.assertEqual(rollup.get_tag_counts()['python'], 25)
+        draft = Digest.query.filter_by(user_id=self.user_id, is_auto_draft=True).one()
+        self.assertIn('Article 24', draft.content)
+        self.assertEqual(len(search_articles('Article', user_id=self.user_id, limit=50)), 25)
+        article = db.session.get(Article, body['results'][0]['id'])
+        self.assertEqual(article.title, 'Article 0')
+        self.assertEqual(article.excerpt, 'Body 0')
+        self.assertEqual(sorted(tag.name for tag in article.tag_entries), ['python', 'topic-0'])
+
+    def test_per_item_errors(self):
+        items = [self.item(0), {'title': 'No content'}, self.item(2, reading_date='06/01/2025'), 'not an object',
+                 self.item(4)]
+        response = self.client.post('/api/v1/articles/bulk', json={'articles': items}, headers=self.headers)
+
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual((body['created'], body['failed']), (2, 3))
+        statuses = [(result['status'], result.get('error')) for result in body['results']]
+        self.assertEqual(statuses, [
+            ('created', None),
+            ('error', 'Content is required'),
+            ('error', 'Invalid reading_date format. Use YYYY-MM-DD'),
+            ('error', 'Article must be a JSON object'),
+            ('created', None),
+        ])
+        self.assertEqual(Article.query.count(), 2)
+
+    def test_ndjson(self):
+        lines = [json.dumps(self.item(0)), '', '{"title": broken', json.dumps(self.item(2))]
+        response = self.client.post('/api/v1/articles/bulk', data='\n'.join(lines) + '\n',
+                                    content_type='application/x-ndjson', headers=self.headers)
+
+        self.assertEqual(response.status_code, 207)
+        results = response.get_json()['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'error', 'created'])
+        self.assertTrue(results[1]['error'].startswith('Invalid JSON'))
+
+    def test_database_error_only_fails_its_item(self):
+        original_build = article_bulk.build_article
+        original_insert = article_bulk._insert_chunk
+
+        def build(user_id, fields):
+            article = original_build(user_id, fields)
+            if fields['title'] == 'Bad':
+                article.user_id = None  # NOT NULL violation at flush time
+            return article
+
+        def insert_chunk(user_id, chunk):
+            if any(fields['title'] == 'Bad' for fields in chunk):
+                return original_insert(None, chunk)
+            return original_insert(user_id, chunk)
+
+        items = [self.item(0), self.item(1, title='Bad'), self.item(2)]
+        with patch.object(article_bulk, 'build_article', build), \
+                patch.object(article_bulk, '_insert_chunk', insert_chunk):
+            response = self.client.post('/api/v1/articles/bulk', json=items, headers=self.headers)
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.get_json()['results']],
+                         ['created', 'error', 'created'])
+        self.assertEqual(Article.query.count(), 2)
+
+    def test_rejects_bad_requests(self):
+        response = self.client.post('/api/v1/articles/bulk', json=[self.item(0)])
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post('/api/v1/articles/bulk', json={'title': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/v1/articles/bulk', json=[], headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        with patch('routes.articles.MAX_BULK_ARTICLES', 2):
+            response = self.client.post('/api/v1/articles/bulk', json=[self.item(i) for i in range(3)],
+                                        headers=self.headers)
+        self.assertEqual(response.status_code, 413)
+
+    def test_single_create_validation(self):
+        response = self.client.post('/api/v1/articles', json={'title': 'Only a title'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Content is required')
+
+        response = self.client.post('/api/v1/articles', json=self.item(0, url=' https://example.com '),
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['article']['url'], 'https://example.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
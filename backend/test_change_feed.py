@@ -0,0 +1,156 @@
+"""
+Tests for the change feed (delta sync) endpoint and tombstones
+"""
+import unittest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article, Digest, Tombstone
+from utils.pagination import encode_cursor
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SYNC_SETTLE_SECONDS': 0})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        self.other = User(username='other', email='other@example.com')
+        db.session.add_all([self.user, self.other])
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Article(title=f'Article {i}', content='content', reading_date=date(2025, 1, 6),
+                                   user_id=self.user.id))
+        db.session.add(Article(title='Not mine', content='content', reading_date=date(2025, 1, 6),
+                               user_id=self.other.id))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(self.user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def changes(self, **params):
+        response = self.client.get('/api/v1/sync/changes', query_string=params, headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response.get_json()
+
+    def sync_all(self, cursor=None, limit=2):
+        """Follow the feed to its end, returning every change and the final cursor"""
+        changes = []
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.changes(**params)
+            changes.extend(body['changes'])
+            cursor = body['next_cursor'] or cursor
+            if not body['has_more']:
+                return changes, cursor
+
+    def test_initial_sync_pages_through_library(self):
+        changes, cursor = self.sync_all()
+
+        keys = [(change['type'], change['record']['title']) for change in changes]
+        # Three articles and the week's auto-maintained draft, each exactly once
+        self.assertEqual(sorted(keys), [('article', 'Article 0'), ('article', 'Article 1'), ('article', 'Article 2'),
+                                        ('digest', Digest.query.filter_by(user_id=self.user.id).one().title)])
+        self.assertNotIn('Not mine', [title for _, title in keys])
+        self.assertEqual([change['changed_at'] for change in changes],
+                         sorted(change['changed_at'] for change in changes))
+
+        # Nothing new since
+        body = self.changes(cursor=cursor)
+        self.assertEqual((body['changes'], body['next_cursor'], body['has_more']), ([], cursor, False))
+
+    def test_updates_and_tombstones_after_cursor(self):
+        _, cursor = self.sync_all()
+        first, second = Article.query.filter_by(user_id=self.user.id).order_by(Article.id).limit(2).all()
+        first_id, second_id = first.id, second.id
+        first.notes = 'edited'
+        db.session.commit()
+        db.session.delete(second)
+        db.session.commit()
+
+        changes, _ = self.sync_all(cursor)
+
+        articles = [change for change in changes if change['type'] == 'article']
+        self.assertEqual([(change['id'], change['deleted']) for change in articles],
+                         [(first_id, False), (second_id, True)])
+        self.assertEqual(articles[0]['record']['notes'], 'edited')
+        self.assertNotIn('record', articles[1])
+        # The draft was reassembled, so it changed too
+        self.assertIn(('digest', False), [(change['type'], change['deleted']) for change in changes])
+
+    def test_saved_digest_replaces_draft_with_tombstone(self):
+        _, cursor = self.sync_all()
+        draft_id = Digest.query.filter_by(user_id=self.user.id, is_auto_draft=True).one().id
+
+        response = self.client.post('/api/v1/digests', headers=self.headers, json={
+            'title': 'Mine', 'content': 'My digest', 'week_start': '2025-01-06', 'week_end': '2025-01-12'
+        })
+        self.assertEqual(response.status_code, 201)
+
+        changes, _ = self.sync_all(cursor)
+        self.assertEqual([(change['type'], change['id'], change['deleted']) for change in changes],
+                         [('digest', response.get_json()['digest']['id'], False), ('digest', draft_id, True)])
+
+    def test_since_watermark_and_settle_window(self):
+        watermark = datetime.utcnow()
+        article = Article.query.filter_by(user_id=self.user.id).first()
+        article.title = 'Renamed'
+        db.session.commit()
+
+        body = self.changes(since=watermark.isoformat())
+        self.assertEqual([change['record']['title'] for change in body['changes'] if change['type'] == 'article'],
+                         ['Renamed'])
+        self.assertIsNotNone(body['next_cursor'])
+
+        # Writes younger than the settle window are held back until it passes
+        self.app.config['SYNC_SETTLE_SECONDS'] = 60
+        body = self.changes(since=(watermark - timedelta(minutes=5)).isoformat())
+        self.assertEqual(body['changes'], [])
+
+    def test_deleted_user_takes_tombstones(self):
+        db.session.delete(Article.query.filter_by(user_id=self.other.id).one())
+        db.session.commit()
+        # The article and the week's draft, which has nothing left to show
+        self.assertEqual(sorted(tombstone.record_type for tombstone in Tombstone.query.filter_by(user_id=self.other.id)),
+                         ['article', 'digest'])
+
+        db.session.delete(db.session.get(User, self.other.id))
+        db.session.commit()
+        self.assertEqual(Tombstone.query.filter_by(user_id=self.other.id).count(), 0)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/api/v1/sync/changes').status_code, 401)
+        cursors = [encode_cursor(payload) for payload in (
+            [1, 2, 3], ['2025-01-06T00:00:00', 1], ['2025-01-06T00:00:00', True, 1], ['2025-01-06T00:00:00', 4, 1],
+            ['2025-01-06T00:00:00', 1, '7'], ['2025-01-06T00:00:00', 1.5, 7], ['yesterday', 1, 7])]
+        for params in [{'cursor': 'garbage'}, {'since': 'yesterday'}] + [{'cursor': cursor} for cursor in cursors]:
+            response = self.client.get('/api/v1/sync/changes', query_string=params, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+
+    def test_feed_reads_user_updated_at_index(self):
+        with db.engine.connect() as conn:
+            plan = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT updated_at, id FROM articles WHERE user_id = 1 AND updated_at > '2025-01-01' "
+                "ORDER BY updated_at, id LIMIT 101"
+            ).all()
+        self.assertIn('ix_articles_user_id_updated_at', ' '.join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for batch weekly draft digest generation
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from services.digest_batch import generate_shard, generate_weekly_drafts, previous_week_start
+from services.weekly_digest_service import WeeklyDigestService
+
+WEEK = date(2025, 1, 6)
+
+
+class TestDigestBatch(unittest.TestCase):
+
+    database_uri = 'sqlite://'
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': self.database_uri})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # reader0..reader5 read that week, idle has no articles, inactive is disabled
+        for i in range(6):
+            user = User(username=f'reader{i}', email=f'reader{i}@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Article(title=f'Article {i}', content='content', reading_date=date(2025, 1, 8),
+                                   tags='["python"]', user_id=user.id))
+        db.session.add(User(username='idle', email='idle@example.com'))
+        inactive = User(username='inactive', email='inactive@example.com', is_active=False)
+        db.session.add(inactive)
+        db.session.flush()
+        db.session.add(Article(title='Hidden', content='content', reading_date=date(2025, 1, 8), user_id=inactive.id))
+        db.session.commit()
+        # Simulate articles saved before drafts were maintained incrementally
+        Digest.query.delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def drafts(self):
+        return Digest.query.filter_by(week_start=WEEK).order_by(Digest.user_id).all()
+
+    def test_generates_drafts_and_resumes(self):
+        # An on-demand digest already exists for reader0
+        db.session.add(Digest(title='Mine', content='content', week_start=WEEK, week_end=date(2025, 1, 12),
+                              user_id=User.query.filter_by(username='reader0').one().id))
+        db.session.commit()
+
+        totals = generate_weekly_drafts(date(2025, 1, 9), workers=0, shard_size=2, log=lambda msg: None)
+        self.assertEqual(totals, {'users': 5, 'created': 5, 'skipped': 0})
+
+        drafts = self.drafts()
+        self.assertEqual(len(drafts), 6)
+        for digest in drafts[1:]:
+            self.assertFalse(digest.is_published)
+            self.assertEqual(digest.week_end, date(2025, 1, 12))
+            self.assertIn('Read 1 articles', digest.summary)
+
+        # A second run finds nothing left to do
+        totals = generate_weekly_drafts(WEEK, workers=0, log=lambda msg: None)
+        self.assertEqual(totals['created'], 0)
+        self.assertEqual(len(self.drafts()), 6)
+
+    def test_draft_written_during_generation_wins(self):
+        user_id = User.query.filter_by(username='reader0').one().id
+        generate = WeeklyDigestService.generate_weekly_digest
+
+        def racing_generate(service, *args):
+            # The user's own draft refresh commits while the batch renders
+            db.session.add(Digest(title='Draft', content='draft', week_start=WEEK, week_end=date(2025, 1, 12),
+                                  is_auto_draft=True, user_id=user_id))
+            db.session.commit()
+            return generate(service, *args)
+
+        with patch.object(WeeklyDigestService, 'generate_weekly_digest', racing_generate):
+            result = generate_shard([user_id], WEEK)
+
+        self.assertEqual(result, {'created': 0, 'skipped': 1})
+        self.assertEqual([digest.title for digest in Digest.query.filter_by(user_id=user_id)], ['Draft'])
+
+    def test_previous_week_start(self):
+        self.assertEqual(previous_week_start(date(2025, 1, 15)), WEEK)
+        self.assertEqual(previous_week_start(date(2025, 1, 13)), WEEK)
+
+
+class TestDigestBatchProcessPool(TestDigestBatch):
+    """Same scenarios with shards handled by worker processes against a file database"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.database_uri = f'sqlite:///{self.path}'
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        os.remove(self.path)
+
+    def test_generates_drafts_and_resumes(self):
+        totals = generate_weekly_drafts(WEEK, workers=2, shard_size=2, log=lambda msg: None)
+        self.assertEqual(totals, {'users': 6, 'created': 6, 'skipped': 0})
+        self.assertEqual(len(self.drafts()), 6)
+
+        totals = generate_weekly_drafts(WEEK, workers=2, log=lambda msg: None)
+        self.assertEqual(totals['users'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for incrementally maintained draft digests
+"""
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+from unittest.mock import patch
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest, DigestFragment
+from services.weekly_digest_service import WeeklyDigestService
+from flask_jwt_extended import create_access_token
+
+WEEK = date(2025, 1, 6)
+
+
+class TestDraftDigest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        db.session.add(self.user)
+        db.session.commit()
+        self.service = WeeklyDigestService()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, title, reading_date, **fields):
+        article = Article(title=title, content='content', reading_date=reading_date, user_id=self.user.id, **fields)
+        db.session.add(article)
+        db.session.commit()
+        return article
+
+    def draft(self, week_start=WEEK):
+        return Digest.query.filter_by(user_id=self.user.id, week_start=week_start, is_auto_draft=True).one_or_none()
+
+    def assert_draft_matches_full_render(self, week_start=WEEK):
+        expected = self.service.generate_weekly_digest(self.user.id, week_start, week_start + timedelta(days=6))
+        draft = self.draft(week_start)
+        self.assertEqual(draft.content, expected['content'])
+        self.assertEqual(draft.summary, expected['summary'])
+        self.assertFalse(draft.is_published)
+
+    def test_draft_follows_article_changes(self):
+        first = self.add_article('First', date(2025, 1, 8), notes='line one\n\nline two', tags='["python"]')
+        self.assert_draft_matches_full_render()
+
+        # An earlier article shifts the numbering without re-rendering the others
+        with patch.object(WeeklyDigestService, 'render_article_section',
+                          autospec=True, side_effect=WeeklyDigestService.render_article_section) as render:
+            self.add_article('Second', date(2025, 1, 6), url='https://example.com')
+        self.assertEqual(render.call_count, 1)
+        self.assert_draft_matches_full_render()
+        self.assertLess(self.draft().content.index('### 1. [Second]'), self.draft().content.index('### 2. First'))
+
+        with patch.object(WeeklyDigestService, 'render_article_section',
+                          autospec=True, side_effect=WeeklyDigestService.render_article_section) as render:
+            first.notes = 'edited'
+            db.session.commit()
+        self.assertEqual(render.call_count, 1)
+        self.assert_draft_matches_full_render()
+
+        # Moving the article to another week updates both drafts
+        first.reading_date = date(2025, 1, 14)
+        db.session.commit()
+        self.assert_draft_matches_full_render()
+        self.assert_draft_matches_full_render(date(2025, 1, 13))
+
+        db.session.delete(first)
+        db.session.commit()
+        self.assertIsNone(self.draft(date(2025, 1, 13)))
+        self.assertIsNone(db.session.get(DigestFragment, first.id))
+        self.assert_draft_matches_full_render()
+
+    def test_user_digest_is_left_alone(self):
+        self.add_article('First', date(2025, 1, 8))
+        draft = self.draft()
+
+        token = create_access_token(identity=str(self.user.id))
+        response = self.client.put(f'/api/v1/digests/{draft.id}', json={'content': 'My own words'},
+                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+        self.add_article('Second', date(2025, 1, 9))
+        digests = Digest.query.filter_by(user_id=self.user.id, week_start=WEEK).all()
+        self.assertEqual([digest.content for digest in digests], ['My own words'])
+
+    def test_saving_a_digest_replaces_the_draft(self):
+        self.add_article('First', date(2025, 1, 8))
+        token = create_access_token(identity=str(self.user.id))
+        response = self.client.post('/api/v1/digests', json={
+            'title': 'Week', 'content': 'content', 'week_start': '2025-01-06', 'week_end': '2025-01-12'
+        }, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(self.draft())
+        self.assertEqual(Digest.query.filter_by(user_id=self.user.id).count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for stored plain-text excerpts of articles and digests
+"""
+import unittest
+import sys
+import os
+from datetime import date, datetime
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from services.excerpts import backfill_excerpts
+from utils.excerpt import make_excerpt, strip_markdown
+
+
+class TestMakeExcerpt(unittest.TestCase):
+
+    def test_strips_markdown(self):
+        text = (
+            "# Title\n\n"
+            "Some **bold**, *italic* and `code` with a [link](https://example.com).\n\n"
+            "> quoted\n\n"
+            "- first item\n"
+            "1. numbered\n\n"
+            "```python\nprint('hidden')\n```\n"
+            "![alt text](image.png) snake_case_name stays"
+        )
+        self.assertEqual(
+            strip_markdown(text),
+            "Title Some bold, italic and code with a link. quoted first item numbered alt text snake_case_name stays"
+        )
+
+    def test_short_text_is_kept(self):
+        self.assertEqual(make_excerpt('Just a few words'), 'Just a few words')
+        self.assertIsNone(make_excerpt(''))
+        self.assertIsNone(make_excerpt(None))
+
+    def test_cuts_at_word_boundary(self):
+        excerpt = make_excerpt('alpha beta gamma delta', length=14)
+        self.assertEqual(excerpt, 'alpha beta…')
+        self.assertLessEqual(len(excerpt), 14)
+
+        # The cut lands exactly between two words
+        self.assertEqual(make_excerpt('alpha beta gamma', length=11), 'alpha beta…')
+        # A single overlong word is cut mid-word
+        self.assertEqual(make_excerpt('x' * 20, length=10), 'x' * 9 + '…')
+
+
+class TestStoredExcerpts(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_excerpt_follows_content(self):
+        article = Article(title='One', content='**Bold** start', reading_date=date(2025, 1, 6), user_id=self.user.id)
+        digest = Digest(title='Week', content='## Articles\n\nBody', week_start=date(2025, 1, 6),
+                        week_end=date(2025, 1, 12), user_id=self.user.id)
+        db.session.add_all([article, digest])
+        db.session.commit()
+        self.assertEqual(article.excerpt, 'Bold start')
+        self.assertEqual(digest.excerpt, 'Articles Body')
+
+        article.content = 'Rewritten body'
+        db.session.commit()
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Article, article.id).excerpt, 'Rewritten body')
+
+    def test_backfill(self):
+        article = Article(title='One', content='_Old_ rows', reading_date=date(2025, 1, 6), user_id=self.user.id,
+                          updated_at=datetime(2025, 1, 6, 8, 30))
+        db.session.add(article)
+        db.session.commit()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE articles SET excerpt = NULL, updated_at = '2025-01-06 08:30:00.000000'")
+
+        with db.engine.begin() as conn:
+            self.assertEqual(backfill_excerpts(conn), 1)
+            # Nothing left to do
+            self.assertEqual(backfill_excerpts(conn), 0)
+            self.assertEqual(backfill_excerpts(conn, only_missing=False), 0)
+
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Article, article.id).excerpt, 'Old rows')
+        # A backfill is not an edit
+        self.assertEqual(db.session.get(Article, article.id).updated_at, datetime(2025, 1, 6, 8, 30))
+
+    def test_rss_description_uses_excerpt(self):
+        content = ('word ' * 100) + '**tail**'
+        db.session.add(Article(title='One', content=content, reading_date=date(2025, 1, 6), user_id=self.user.id))
+        db.session.commit()
+
+        body = self.client.get('/rss/articles.xml').get_data(as_text=True)
+        self.assertIn(make_excerpt(content), body)
+
+
+if __name__ == '__main__':
+    unittest.main()
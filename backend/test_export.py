@@ -0,0 +1,73 @@
+"""
+Tests for the streaming gzip export
+"""
+import unittest
+import sys
+import os
+import gzip
+import json
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+
+
+class TestStreamingExport(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        db.session.add(self.user)
+        db.session.flush()
+        for i in range(3):
+            article = Article(title=f'Article {i}', content='content "quoted"\nline',
+                              reading_date=date(2025, 1, 6), user_id=self.user.id)
+            article.set_tags(['export'])
+            db.session.add(article)
+        db.session.add(Digest(title='Digest', content='# Digest', week_start=date(2025, 1, 6),
+                              week_end=date(2025, 1, 12), user_id=self.user.id))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(self.user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_export_streams_valid_gzip_json(self):
+        response = self.client.get('/api/v1/admin/export', headers=self.headers, buffered=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertIn('reader-digest-backup-reader-', response.headers['Content-Disposition'])
+
+        backup = json.loads(gzip.decompress(response.get_data()))
+        self.assertEqual(backup['version'], '1.0.0')
+        self.assertEqual(backup['user']['username'], 'reader')
+        self.assertEqual(len(backup['articles']), 3)
+        self.assertEqual(backup['articles'][0]['tags'], ['export'])
+        self.assertEqual(backup['articles'][0]['content'], 'content "quoted"\nline')
+        self.assertEqual([d['title'] for d in backup['digests']], ['Digest'])
+
+    def test_export_empty_library(self):
+        Article.query.delete()
+        Digest.query.delete()
+        db.session.commit()
+
+        response = self.client.get('/api/v1/admin/export', headers=self.headers, buffered=True)
+        backup = json.loads(gzip.decompress(response.get_data()))
+        self.assertEqual(backup['articles'], [])
+        self.assertEqual(backup['digests'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for sparse fieldsets on the article and digest list endpoints
+"""
+import unittest
+import sys
+import os
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from services.query_profiler import assert_query_budget
+from utils.excerpt import make_excerpt
+from utils.fields import parse_fields
+
+
+class TestParseFields(unittest.TestCase):
+
+    def test_presets_and_lists(self):
+        self.assertEqual(parse_fields(None, Article.FIELDS, Article.SUMMARY_FIELDS), Article.SUMMARY_FIELDS)
+        self.assertEqual(parse_fields('summary', Article.FIELDS, Article.SUMMARY_FIELDS), Article.SUMMARY_FIELDS)
+        self.assertEqual(parse_fields('all', Article.FIELDS, Article.SUMMARY_FIELDS), Article.FIELDS)
+        # id is always included and the model's order is kept
+        self.assertEqual(parse_fields('tags, title', Article.FIELDS, Article.SUMMARY_FIELDS), ('id', 'title', 'tags'))
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            parse_fields('title,password_hash', Article.FIELDS, Article.SUMMARY_FIELDS)
+
+
+class TestListProjections(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.content = 'Long body text. ' * 200
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Article(title=f'Article {i}', content=self.content, notes='Short note',
+                                   tags='["python"]', reading_date=date(2025, 1, 6), user_id=user.id))
+        db.session.add(Digest(title='Digest', content=self.content, summary='Summary', is_published=True,
+                              week_start=date(2025, 1, 6), week_end=date(2025, 1, 12), user_id=user.id))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def capture_selects(self, url):
+        with assert_query_budget() as statements:
+            response = self.client.get(url)
+        return response, [s for s in statements if 'count(' not in s.lower()]
+
+    def test_article_summary_projection(self):
+        response, statements = self.capture_selects('/api/v1/articles')
+        self.assertEqual(response.status_code, 200)
+        article = response.get_json()['articles'][0]
+        self.assertEqual(set(article), set(Article.SUMMARY_FIELDS))
+        self.assertEqual(article['excerpt'], make_excerpt(self.content))
+        self.assertEqual(article['notes_excerpt'], 'Short note')
+        self.assertEqual(article['tags'], ['python'])
+        self.assertEqual(article['author'], 'reader')
+
+        # Content and notes are never selected whole
+        self.assertEqual(len(statements), 1, statements)
+        self.assertNotIn('articles.content AS', statements[0])
+        self.assertNotIn('articles.notes AS', statements[0])
+
+    def test_article_fields_parameter(self):
+        response, statements = self.capture_selects('/api/v1/articles?fields=title,reading_date&cursor=')
+        article = response.get_json()['articles'][0]
+        self.assertEqual(set(article), {'id', 'title', 'reading_date'})
+        self.assertNotIn('substr', statements[0].lower())
+
+        response = self.client.get('/api/v1/articles?fields=all')
+        article = response.get_json()['articles'][0]
+        self.assertEqual(article['content'], self.content)
+        self.assertEqual(article['notes'], 'Short note')
+
+        response = self.client.get('/api/v1/articles?fields=title,secret')
+        self.assertEqual(response.status_code, 400)
+
+    def test_digest_summary_projection(self):
+        response, statements = self.capture_selects('/api/v1/digests')
+        digest = response.get_json()['digests'][0]
+        self.assertEqual(set(digest), set(Digest.SUMMARY_FIELDS))
+        self.assertEqual(digest['excerpt'], make_excerpt(self.content))
+        self.assertEqual(digest['summary'], 'Summary')
+        self.assertNotIn('digests.content AS', statements[0])
+
+        response = self.client.get('/api/v1/digests?fields=content&cursor=')
+        self.assertEqual(response.get_json()['digests'][0], {'id': digest['id'], 'content': self.content})
+
+    def test_detail_endpoint_unchanged(self):
+        article_id = Article.query.first().id
+        article = self.client.get(f'/api/v1/articles/{article_id}').get_json()['article']
+        self.assertEqual(set(article), set(Article.DETAIL_FIELDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
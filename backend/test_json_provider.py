@@ -0,0 +1,85 @@
+"""
+Tests for the JSON provider (orjson with a stdlib fallback)
+"""
+import unittest
+import sys
+import os
+import json
+import uuid
+from datetime import date, datetime
+from unittest.mock import patch
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article
+import utils.json_provider as json_provider
+
+
+class TestJSONProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def backends(self):
+        """Run the block once per available serializer"""
+        yield
+        if json_provider.orjson is not None:
+            with patch.object(json_provider, 'orjson', None):
+                yield
+
+    def test_dates_and_extra_types(self):
+        value = {
+            'day': date(2025, 1, 6),
+            'at': datetime(2025, 1, 6, 9, 30, 15, 123456),
+            'id': uuid.UUID(int=1),
+            'huge': 2 ** 70,
+            'text': 'café'
+        }
+        for _ in self.backends():
+            decoded = json.loads(self.app.json.dumps_bytes(value))
+            self.assertEqual(decoded['day'], '2025-01-06')
+            self.assertEqual(decoded['at'], '2025-01-06T09:30:15.123456')
+            self.assertEqual(decoded['id'], str(uuid.UUID(int=1)))
+            self.assertEqual(decoded['huge'], 2 ** 70)
+            self.assertEqual(decoded['text'], 'café')
+            self.assertEqual(self.app.json.loads('{"a": [1, 2]}'), {'a': [1, 2]})
+
+    def test_api_serializes_model_dates(self):
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        article = Article(title='Dates', content='content', reading_date=date(2025, 1, 6), user_id=user.id)
+        db.session.add(article)
+        db.session.commit()
+
+        for _ in self.backends():
+            response = self.client.get(f'/api/v1/articles/{article.id}')
+            self.assertEqual(response.mimetype, 'application/json')
+            data = response.get_json()['article']
+            self.assertEqual(data['reading_date'], '2025-01-06')
+            self.assertEqual(data['created_at'], article.created_at.isoformat())
+
+    def test_invalid_request_body(self):
+        from flask import request
+        from werkzeug.exceptions import BadRequest
+
+        for _ in self.backends():
+            with self.app.test_request_context(data='{not json', content_type='application/json'):
+                with self.assertRaises(BadRequest):
+                    request.get_json()
+
+
+if __name__ == '__main__':
+    unittest.main()
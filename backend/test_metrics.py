@@ -0,0 +1,156 @@
+"""
+Tests for the request metrics and the /metrics endpoint
+"""
+import unittest
+import sys
+import os
+from datetime import date
+from unittest.mock import Mock
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article
+from services.request_metrics import REQUEST_DURATION, REQUEST_QUERIES, REQUESTS, REQUESTS_IN_PROGRESS
+from services.url_preview import FETCH_DURATION, URLPreviewService
+from utils.metrics import Counter, Histogram, Registry
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_renders_text_format(self):
+        registry = Registry()
+        counter = Counter('jobs_total', 'Jobs run', ('queue',), registry=registry)
+        histogram = Histogram('job_seconds', 'Job time', buckets=(0.1, 1), registry=registry)
+        counter.inc(queue='a "b"')
+        counter.inc(2, queue='a "b"')
+        for value in (0.05, 0.5, 3):
+            histogram.observe(value)
+
+        self.assertEqual(registry.render().splitlines(), [
+            '# HELP jobs_total Jobs run',
+            '# TYPE jobs_total counter',
+            'jobs_total{queue="a \\"b\\""} 3',
+            '# HELP job_seconds Job time',
+            '# TYPE job_seconds histogram',
+            'job_seconds_bucket{le="0.1"} 1',
+            'job_seconds_bucket{le="1"} 2',
+            'job_seconds_bucket{le="+Inf"} 3',
+            'job_seconds_sum 3.55',
+            'job_seconds_count 3',
+        ])
+
+    def test_rejects_wrong_labels_and_duplicates(self):
+        registry = Registry()
+        counter = Counter('jobs_total', 'Jobs run', ('queue',), registry=registry)
+        with self.assertRaises(ValueError):
+            counter.inc(kind='x')
+        with self.assertRaises(ValueError):
+            counter.inc(-1, queue='a')
+        with self.assertRaises(ValueError):
+            Counter('jobs_total', 'Again', registry=registry)
+
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        article = Article(title='Article', content='content', reading_date=date(2025, 1, 6), user_id=user.id)
+        db.session.add(article)
+        db.session.commit()
+        self.article_id = article.id
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_requests_labelled_by_route(self):
+        labels = {'method': 'GET', 'route': '/api/v1/articles/<int:article_id>'}
+        requests_before = REQUESTS.value(status=200, **labels)
+        count_before, _ = REQUEST_DURATION.value(**labels)
+        queries_before, query_sum_before = REQUEST_QUERIES.value(**labels)
+
+        for _ in range(2):
+            response = self.client.get(f'/api/v1/articles/{self.article_id}', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+        self.client.get('/api/v1/articles/999999', headers=self.headers)
+        self.client.get('/no/such/page')
+
+        self.assertEqual(REQUESTS.value(status=200, **labels) - requests_before, 2)
+        self.assertEqual(REQUEST_DURATION.value(**labels)[0] - count_before, 3)
+        queries, query_sum = REQUEST_QUERIES.value(**labels)
+        self.assertEqual(queries - queries_before, 3)
+        self.assertGreater(query_sum - query_sum_before, 0)
+        self.assertEqual(REQUESTS_IN_PROGRESS.value(**labels), 0)
+
+        self.app.config['METRICS_TOKEN'] = 'scrape-me'
+        text = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'}).get_data(as_text=True)
+        self.assertIn('http_requests_total{method="GET",route="/api/v1/articles/<int:article_id>",status="404"}', text)
+        self.assertIn('http_requests_total{method="GET",route="<unmatched>",status="404"}', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/api/v1/articles/<int:article_id>",'
+                      'le="+Inf"}', text)
+        self.assertNotIn('/api/v1/articles/999999', text)
+
+    def test_streamed_response_recorded_once_sent(self):
+        # Without a feed cache the RSS feed is streamed
+        self.app.extensions.pop('feed_cache')
+        labels = {'method': 'GET', 'route': '/rss/articles.xml'}
+        in_progress = REQUESTS_IN_PROGRESS.value(**labels)
+        before = REQUESTS.value(status=200, **labels)
+
+        with self.client.get('/rss/articles.xml') as response:
+            # The body has not been generated yet
+            self.assertEqual(REQUESTS_IN_PROGRESS.value(**labels) - in_progress, 1)
+            self.assertEqual(REQUESTS.value(status=200, **labels), before)
+            response.get_data()
+
+        self.assertEqual(REQUESTS_IN_PROGRESS.value(**labels), in_progress)
+        self.assertEqual(REQUESTS.value(status=200, **labels) - before, 1)
+
+    def test_unhandled_errors_count_as_500(self):
+        @self.app.route('/boom')
+        def boom():
+            raise RuntimeError('boom')
+
+        self.app.config['PROPAGATE_EXCEPTIONS'] = False
+        labels = {'method': 'GET', 'route': '/boom'}
+        self.assertEqual(self.client.get('/boom').status_code, 500)
+        self.assertEqual(REQUESTS.value(status=500, **labels), 1)
+        self.assertEqual(REQUESTS_IN_PROGRESS.value(**labels), 0)
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        self.app.config['METRICS_TOKEN'] = 'scrape-me'
+        for headers in ({}, {'Authorization': 'Bearer scrape-m'}, {'Authorization': 'Bearer scrape-me\u00e9'}):
+            self.assertEqual(self.client.get('/metrics', headers=headers).status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('# TYPE db_queries_total counter', response.get_data(as_text=True))
+
+    def test_preview_fetch_latency(self):
+        service = URLPreviewService()
+        service.session = Mock()
+        service.session.get.side_effect = ConnectionError('unreachable')
+        before, _ = FETCH_DURATION.value(outcome='error')
+
+        self.assertFalse(service.get_preview('https://example.com/a')['success'])
+
+        self.assertEqual(FETCH_DURATION.value(outcome='error')[0] - before, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
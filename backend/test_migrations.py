@@ -0,0 +1,186 @@
+"""
+Tests for the versioned migration runner
+"""
+import unittest
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect
+from app import create_app
+from database import db
+import migrations
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'AUTO_MIGRATE': False})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {migrations.MIGRATIONS_TABLE}")
+        self.app_context.pop()
+
+    def test_upgrade_records_versions_once(self):
+        all_versions = [module.VERSION for module in migrations.discover_migrations()]
+
+        self.assertEqual(migrations.upgrade(db.engine, log=lambda msg: None), all_versions)
+        self.assertEqual(sorted(migrations.applied_versions(db.engine)), all_versions)
+        self.assertEqual(migrations.upgrade(db.engine, log=lambda msg: None), [])
+
+    def test_upgrade_builds_indexes_on_existing_tables(self):
+        # Simulate a database created before the indexes were declared
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_articles_user_id_reading_date")
+            conn.exec_driver_sql("DROP INDEX ix_digests_user_id_week_start")
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        inspector = inspect(db.engine)
+        article_indexes = {index['name'] for index in inspector.get_indexes('articles')}
+        digest_indexes = {index['name'] for index in inspector.get_indexes('digests')}
+        self.assertIn('ix_articles_user_id_reading_date', article_indexes)
+        self.assertIn('ix_digests_user_id_week_start', digest_indexes)
+
+    def test_upgrade_adds_change_feed_schema(self):
+        from models.models import Tombstone
+
+        # Simulate a database created before the change feed existed
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_articles_user_id_updated_at")
+        Tombstone.__table__.drop(db.engine)
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        inspector = inspect(db.engine)
+        self.assertIn('ix_articles_user_id_updated_at', {index['name'] for index in inspector.get_indexes('articles')})
+        self.assertIn('tombstones', inspector.get_table_names())
+
+    def test_upgrade_backfills_weekly_rollups(self):
+        from datetime import date
+        from models.models import User, Article, WeeklyRollup
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([
+            Article(title='One', content='content', reading_date=date(2025, 1, 6), user_id=user.id),
+            Article(title='Two', content='content', reading_date=date(2025, 1, 7), user_id=user.id),
+        ])
+        db.session.commit()
+        # Simulate a database created before the rollup table existed
+        WeeklyRollup.__table__.drop(db.engine)
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        rollup = db.session.get(WeeklyRollup, (user.id, date(2025, 1, 6)))
+        self.assertEqual(rollup.article_count, 2)
+        self.assertEqual(rollup.get_day_counts(), [1, 1, 0, 0, 0, 0, 0])
+
+    def test_upgrade_backfills_excerpts(self):
+        from datetime import date
+        from models.models import User, Article
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Article(title='One', content='# Heading\n\nSome **bold** text',
+                               reading_date=date(2025, 1, 6), user_id=user.id))
+        db.session.commit()
+        # Simulate a database created before the excerpt columns existed
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE articles DROP COLUMN excerpt")
+            conn.exec_driver_sql("ALTER TABLE digests DROP COLUMN excerpt")
+        db.session.expunge_all()
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        self.assertEqual(Article.query.one().excerpt, 'Heading Some bold text')
+
+    def test_upgrade_backfills_content_hashes(self):
+        from datetime import date, datetime
+        from models.models import User, Article
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        article = Article(title='One', content='content', reading_date=date(2025, 1, 6), user_id=user.id,
+                          updated_at=datetime(2025, 1, 6, 8, 30))
+        db.session.add(article)
+        db.session.commit()
+        expected = article.content_hash
+        # Simulate a database created before the content hash columns existed
+        with db.engine.begin() as conn:
+            for table in ('articles', 'digests'):
+                conn.exec_driver_sql(f"DROP INDEX ix_{table}_user_id_content_hash")
+                conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN content_hash")
+        db.session.expunge_all()
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        self.assertEqual(Article.query.one().content_hash, expected)
+        self.assertEqual(Article.query.one().updated_at, datetime(2025, 1, 6, 8, 30))
+        self.assertIn('ix_articles_user_id_content_hash',
+                      {index['name'] for index in inspect(db.engine).get_indexes('articles')})
+
+    def test_upgrade_backfills_article_tags(self):
+        from datetime import date
+        from models.models import User, Article, Tag, article_tags
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Tag(name='python'))
+        db.session.add_all([
+            Article(title='One', content='content', tags='["Python", "SQL"]', reading_date=date(2025, 1, 6),
+                    user_id=user.id),
+            Article(title='Two', content='content', tags='["sql", " "]', reading_date=date(2025, 1, 7),
+                    user_id=user.id),
+            Article(title='Three', content='content', tags='not json', reading_date=date(2025, 1, 7),
+                    user_id=user.id),
+        ])
+        db.session.commit()
+        # Articles written before the tag tables existed only carry the JSON column
+        self.assertEqual(db.session.execute(db.select(db.func.count()).select_from(article_tags)).scalar(), 0)
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        self.assertEqual(sorted(tag.name for tag in Tag.query), ['python', 'sql'])
+        self.assertEqual(sorted(article.title for article in Article.filter_by_tag(Article.query, 'SQL')),
+                         ['One', 'Two'])
+        self.assertEqual([article.title for article in Article.filter_by_tag(Article.query, 'python')], ['One'])
+
+    def test_upgrade_removes_duplicate_auto_drafts(self):
+        from datetime import date
+        from models.models import User, Digest, Tombstone
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        # Simulate a database from before the unique index, where racing batch runs doubled a draft
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX uq_digests_user_id_week_start_auto_draft")
+        db.session.add_all([
+            Digest(title=title, content='content', week_start=date(2025, 1, 6), week_end=date(2025, 1, 12),
+                   is_auto_draft=auto, user_id=user.id)
+            for title, auto in (('Draft', True), ('Mine', False), ('Draft again', True))
+        ])
+        db.session.commit()
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        self.assertEqual(sorted(digest.title for digest in Digest.query), ['Draft', 'Mine'])
+        self.assertEqual([tombstone.record_type for tombstone in Tombstone.query], ['digest'])
+        self.assertIn('uq_digests_user_id_week_start_auto_draft',
+                      {index['name'] for index in inspect(db.engine).get_indexes('digests')})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for keyset (cursor) pagination on the article and digest list endpoints
+"""
+import unittest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from utils.pagination import encode_cursor, decode_cursor
+
+
+class TestCursorPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+
+        created = datetime(2025, 1, 1, 12, 0, 0)
+        for i in range(7):
+            # Several articles share a reading date and timestamp to exercise the id tiebreaker
+            db.session.add(Article(
+                title=f'Article {i}',
+                content='content',
+                reading_date=date(2025, 1, 1) + timedelta(days=i // 3),
+                created_at=created,
+                user_id=user.id
+            ))
+        for i in range(3):
+            db.session.add(Digest(
+                title=f'Digest {i}',
+                content='content',
+                week_start=date(2025, 1, 6),
+                week_end=date(2025, 1, 12),
+                is_published=True,
+                user_id=user.id
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _walk(self, path, key):
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(f'{path}?per_page=3&cursor={cursor}')
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            seen.extend(item['title'] for item in data[key])
+            self.assertIsNone(data['pagination']['total'])
+            if not data['pagination']['has_next']:
+                self.assertIsNone(data['pagination']['next_cursor'])
+                return seen
+            cursor = data['pagination']['next_cursor']
+
+    def test_articles_cursor_walk_matches_offset_order(self):
+        offset_titles = [a['title'] for a in self.client.get('/api/v1/articles?per_page=50').get_json()['articles']]
+        self.assertEqual(self._walk('/api/v1/articles', 'articles'), offset_titles)
+        self.assertEqual(len(offset_titles), 7)
+
+    def test_digests_cursor_walk(self):
+        self.assertEqual(self._walk('/api/v1/digests', 'digests'), ['Digest 2', 'Digest 1', 'Digest 0'])
+
+    def test_include_total_and_invalid_cursor(self):
+        data = self.client.get('/api/v1/articles?cursor=&include_total=true').get_json()
+        self.assertEqual(data['pagination']['total'], 7)
+
+        response = self.client.get('/api/v1/articles?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        values = [date(2025, 1, 1), datetime(2025, 1, 1, 12, 30), 42]
+        cursor = encode_cursor(values)
+        columns = [Article.reading_date, Article.created_at, Article.id]
+        self.assertEqual(decode_cursor(cursor, columns), values)
+
+    def test_cursor_with_wrong_value_types(self):
+        columns = [Article.reading_date, Article.created_at, Article.id]
+        for values in ([1, 2, 3], ['2025-01-01', '2025-01-01T12:30', '42'], ['2025-01-01', '2025-01-01T12:30', True],
+                       ['2025-01-01', 'yesterday', 42], [[], {}, 42]):
+            with self.assertRaises(ValueError):
+                decode_cursor(encode_cursor(values), columns)
+
+            response = self.client.get(f'/api/v1/articles?cursor={encode_cursor(values)}')
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
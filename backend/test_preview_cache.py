@@ -0,0 +1,109 @@
+"""
+Tests for the two-tier URL preview cache
+"""
+import unittest
+from unittest.mock import patch, Mock
+import sys
+import os
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from services.preview_cache import PreviewCache, normalize_url
+from services.url_preview import URLPreviewService
+
+HTML = '<html><head><title>Cached Page</title></head><body><p>Hello</p></body></html>'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPreviewCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'previews.db')
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _service(self, **kwargs):
+        cache = PreviewCache(path=self.path, ttl=60, negative_ttl=10, clock=self.clock, **kwargs)
+        return URLPreviewService(timeout=5, cache=cache)
+
+    def _mock_response(self):
+        response = Mock()
+        response.iter_content.return_value = [HTML.encode('utf-8')]
+        response.headers = {'Content-Type': 'text/html'}
+        response.url = 'https://example.com/page'
+        response.raise_for_status = Mock()
+        return response
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url('HTTPS://Example.COM:443/page?b=2&utm_source=x&a=1#section'),
+            'https://example.com/page?a=1&b=2'
+        )
+        self.assertEqual(normalize_url('http://example.com'), 'http://example.com/')
+        self.assertEqual(normalize_url('http://example.com:8080/x'), 'http://example.com:8080/x')
+
+    @patch('services.url_preview.requests.Session.get')
+    def test_repeat_preview_skips_network(self, mock_get):
+        mock_get.return_value = self._mock_response()
+        service = self._service()
+
+        first = service.get_preview('https://example.com/page?utm_campaign=a')
+        second = service.get_preview('https://EXAMPLE.com/page#top')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second['title'], 'Cached Page')
+        stats = service.cache.stats()
+        self.assertEqual(stats['memory_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    @patch('services.url_preview.requests.Session.get')
+    def test_persistent_tier_is_shared(self, mock_get):
+        mock_get.return_value = self._mock_response()
+        self._service().get_preview('https://example.com/page')
+
+        # A second process would start with an empty memory tier
+        other = self._service()
+        result = other.get_preview('https://example.com/page')
+        self.assertEqual(result['title'], 'Cached Page')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(other.cache.stats()['disk_hits'], 1)
+
+    @patch('services.url_preview.requests.Session.get')
+    def test_ttl_and_negative_caching(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+        service = self._service()
+
+        self.assertFalse(service.get_preview('https://down.example.com')['success'])
+        self.assertFalse(service.get_preview('https://down.example.com')['success'])
+        self.assertEqual(mock_get.call_count, 1)
+
+        # Failures expire after the negative TTL
+        self.clock.now += 11
+        mock_get.side_effect = None
+        mock_get.return_value = self._mock_response()
+        self.assertTrue(service.get_preview('https://down.example.com')['success'])
+        self.assertEqual(mock_get.call_count, 2)
+
+        # Successes expire after the regular TTL
+        self.clock.now += 61
+        service.get_preview('https://down.example.com')
+        self.assertEqual(mock_get.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
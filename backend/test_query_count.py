@@ -0,0 +1,129 @@
+"""
+Tests that list serialization runs a fixed number of queries per page
+(no per-row author lookups)
+"""
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from services.query_profiler import assert_query_budget
+from flask_jwt_extended import create_access_token
+
+
+class TestListQueryCount(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # Every article and digest has a different author
+        for i in range(20):
+            user = User(username=f'reader{i}', email=f'reader{i}@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Article(title=f'Article {i}', content='content',
+                                   reading_date=date(2025, 1, 6), user_id=user.id))
+            db.session.add(Digest(title=f'Digest {i}', content='content', is_published=True,
+                                  week_start=date(2025, 1, 6), week_end=date(2025, 1, 12),
+                                  user_id=user.id))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_article_page_query_count(self):
+        with assert_query_budget() as statements:
+            response = self.client.get('/api/v1/articles?per_page=20')
+        self.assertEqual(len(response.get_json()['articles']), 20)
+        # One COUNT(*) plus one SELECT with the authors joined in
+        self.assertEqual(len(statements), 2, statements)
+
+        with assert_query_budget() as statements:
+            response = self.client.get('/api/v1/articles?per_page=20&cursor=')
+        self.assertEqual(len(response.get_json()['articles']), 20)
+        self.assertEqual(len(statements), 1, statements)
+
+    def test_digest_page_query_count(self):
+        with assert_query_budget() as statements:
+            response = self.client.get('/api/v1/digests?per_page=20')
+        digests = response.get_json()['digests']
+        self.assertEqual(len(digests), 20)
+        self.assertTrue(all(d['author'] for d in digests))
+        self.assertEqual(len(statements), 2, statements)
+
+    def test_rss_feed_query_count(self):
+        with assert_query_budget() as statements:
+            response = self.client.get('/rss/articles.xml?limit=20', buffered=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1, statements)
+
+
+class TestAvailableWeeks(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        # Thirty weeks of history; week i has i + 1 articles spread from Monday to Sunday
+        first_monday = date(2024, 1, 1)
+        for week in range(30):
+            for n in range(week + 1):
+                db.session.add(Article(title=f'Week {week} #{n}', content='content', user_id=user.id,
+                                       reading_date=first_monday + timedelta(weeks=week, days=n % 7)))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_weeks_in_one_query(self):
+        with assert_query_budget(max_queries=2) as statements:
+            response = self.client.get('/api/v1/digests/available-weeks?limit=26', headers=self.headers)
+
+        # The JWT user lookup is the only other statement; articles are never scanned
+        self.assertEqual(len([s for s in statements if 'weekly_rollups' in s]), 1, statements)
+        self.assertFalse([s for s in statements if 'FROM articles' in s], statements)
+
+        weeks = response.get_json()['available_weeks']
+        self.assertEqual(len(weeks), 26)
+        self.assertEqual(weeks[0]['week_start'], '2024-07-22')
+        self.assertEqual(weeks[0]['week_end'], '2024-07-28')
+        self.assertEqual(weeks[0]['article_count'], 30)
+        self.assertEqual(weeks[-1]['article_count'], 5)
+
+    def test_paging_back(self):
+        response = self.client.get('/api/v1/digests/available-weeks?limit=26', headers=self.headers)
+        next_before = response.get_json()['next_before']
+        self.assertEqual(next_before, '2024-01-29')
+
+        response = self.client.get(f'/api/v1/digests/available-weeks?limit=26&before={next_before}',
+                                   headers=self.headers)
+        data = response.get_json()
+        self.assertEqual([w['article_count'] for w in data['available_weeks']], [4, 3, 2, 1])
+        self.assertEqual(data['available_weeks'][-1]['week_start'], '2024-01-01')
+        self.assertIsNone(data['next_before'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Tests for the opt-in query profiler and the query budget helper
+"""
+import unittest
+import sys
+import os
+import json
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article, Digest
+from services.query_profiler import assert_query_budget, statement_shape
+
+LOGGER = 'services.query_profiler'
+
+
+class TestStatementShape(unittest.TestCase):
+
+    def test_folds_literals_and_in_lists(self):
+        self.assertEqual(statement_shape("SELECT * FROM users WHERE id = 5 AND name = 'o''brien'"),
+                         statement_shape('SELECT *\n  FROM users WHERE id = ? AND name = ?'))
+        self.assertEqual(statement_shape('SELECT id FROM tags WHERE id IN (?, ?, ?)'),
+                         'SELECT id FROM tags WHERE id IN (?)')
+        self.assertNotEqual(statement_shape('SELECT id FROM tags WHERE id = ?'),
+                            statement_shape('SELECT id FROM users WHERE id = ?'))
+
+
+class ProfilerTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', **self.config})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # Every article and digest has a different author
+        for i in range(12):
+            user = User(username=f'reader{i}', email=f'reader{i}@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Article(title=f'Article {i}', content='content', is_public=True,
+                                   reading_date=date(2025, 1, 6), user_id=user.id))
+            db.session.add(Digest(title=f'Digest {i}', content='content', is_published=True,
+                                  week_start=date(2025, 1, 6), week_end=date(2025, 1, 12), user_id=user.id))
+        db.session.commit()
+        db.session.expunge_all()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity="1")}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+
+class TestQueryProfiler(ProfilerTestCase):
+    config = {'QUERY_PROFILER': True, 'SLOW_QUERY_MS': 100, 'N_PLUS_ONE_THRESHOLD': 10}
+
+    def records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_flags_repeated_statements(self):
+        @self.app.route('/authors')
+        def authors():
+            # One lookup per user: the pattern the detector is for
+            names = []
+            for user_id in range(1, 13):
+                names.append(User.query.filter_by(id=user_id).first().username)
+            return {'names': names}
+
+        with self.assertLogs(LOGGER, 'INFO') as logs:
+            self.assertEqual(self.client.get('/authors').status_code, 200)
+
+        summary = self.records(logs)[-1]
+        self.assertEqual(logs.records[-1].levelname, 'WARNING')
+        self.assertEqual((summary['event'], summary['method'], summary['route']), ('request_queries', 'GET', '/authors'))
+        self.assertEqual(summary['queries'], 12)
+        [repeated] = summary['repeated']
+        self.assertEqual(repeated['count'], 12)
+        self.assertIn('FROM users', repeated['statement'])
+        self.assertRegex(repeated['call_site'], r'^test_query_profiler\.py:\d+ in authors$')
+
+    def test_summary_for_clean_request(self):
+        with self.assertLogs(LOGGER, 'INFO') as logs:
+            self.client.get('/api/v1/articles?per_page=20', headers=self.headers)
+
+        [summary] = self.records(logs)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(summary['route'], '/api/v1/articles')
+        self.assertEqual(summary['repeated'], [])
+        self.assertGreater(summary['queries'], 0)
+
+    def test_slow_statements_logged_with_call_site(self):
+        # The threshold is read when the app is created
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'QUERY_PROFILER': True,
+                          'SLOW_QUERY_MS': 0, 'N_PLUS_ONE_THRESHOLD': 10})
+        with app.app_context():
+            with self.assertLogs(LOGGER, 'WARNING') as logs:
+                db.session.execute(db.text('SELECT 1')).all()
+            db.session.remove()
+
+        record = self.records(logs)[-1]
+        self.assertEqual((record['event'], record['statement']), ('slow_query', 'SELECT 1'))
+        self.assertRegex(record['call_site'], r'^test_query_profiler\.py:\d+ in test_slow_statements_logged')
+        self.assertNotIn('route', record)
+
+
+class TestQueryProfilerDisabled(ProfilerTestCase):
+
+    def test_off_by_default(self):
+        self.assertFalse(self.app.config['QUERY_PROFILER'])
+        with self.assertNoLogs(LOGGER):
+            self.client.get('/api/v1/articles?per_page=20', headers=self.headers)
+
+
+class TestQueryBudget(ProfilerTestCase):
+
+    def test_budget_exceeded(self):
+        with self.assertRaisesRegex(AssertionError, '3 queries exceed the budget of 2'):
+            with assert_query_budget(max_queries=2):
+                for i in range(1, 4):
+                    db.session.get(User, i)
+
+        with self.assertRaisesRegex(AssertionError, r'3x SELECT .* FROM users'):
+            with assert_query_budget(max_repeats=2):
+                for i in range(4, 7):
+                    db.session.get(User, i)
+
+        with assert_query_budget(max_queries=1) as statements:
+            User.query.filter(User.id.in_([7, 8, 9])).all()
+        self.assertEqual(len(statements), 1)
+
+    def test_list_endpoints_have_no_per_row_queries(self):
+        # Listing pages, the week picker and RSS used to look authors and counts up row by row
+        for url in ('/api/v1/articles?per_page=20', '/api/v1/digests?per_page=20',
+                    '/api/v1/digests/available-weeks', '/rss/articles.xml?limit=20',
+                    '/rss/user/1/articles.xml'):
+            with assert_query_budget(max_queries=5, max_repeats=1):
+                response = self.client.get(url, headers=self.headers, buffered=True)
+            self.assertEqual(response.status_code, 200, url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for admin-requested request profiles
+"""
+import unittest
+import sys
+import os
+import pstats
+import shutil
+import tempfile
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article
+
+
+class TestRequestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                               'PROFILE_DIR': self.profile_dir, 'PROFILE_MAX_FILES': 3})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        admin = User(username='admin', email='admin@example.com', is_admin=True)
+        reader = User(username='reader', email='reader@example.com')
+        db.session.add_all([admin, reader])
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Article(title=f'Article {i}', content='content', is_public=True,
+                                   reading_date=date(2025, 1, 6), user_id=admin.id))
+        db.session.commit()
+        self.admin = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        self.reader = {'Authorization': f'Bearer {create_access_token(identity=str(reader.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.profile_dir)
+
+    def test_admin_profiles_rss_rendering(self):
+        response = self.client.get('/rss/articles.xml', headers={**self.admin, 'X-Profile': '1'}, buffered=True)
+        self.assertEqual(response.status_code, 200)
+        profile_id = response.headers['X-Profile-Id']
+
+        [meta] = self.client.get('/api/v1/admin/profiles', headers=self.admin).get_json()['profiles']
+        self.assertEqual((meta['id'], meta['method'], meta['route'], meta['status']),
+                         (profile_id, 'GET', '/rss/articles.xml', 200))
+
+        response = self.client.get(f'/api/v1/admin/profiles/{profile_id}', headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'{profile_id}.prof', response.headers['Content-Disposition'])
+        path = os.path.join(self.profile_dir, f'{profile_id}.prof')
+        self.assertEqual(response.get_data(), open(path, 'rb').read())
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn('_rss_item', functions)
+
+        report = self.client.get(f'/api/v1/admin/profiles/{profile_id}?format=text&sort=tottime',
+                                 headers=self.admin).get_data(as_text=True)
+        self.assertIn('function calls', report)
+
+    def test_query_flag_on_digest_generation(self):
+        response = self.client.post('/api/v1/digests/generate-weekly?_profile=1', headers=self.admin,
+                                    json={'week_start': '2025-01-06', 'week_end': '2025-01-12'})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response.headers['X-Profile-Id']
+        functions = {name for _, _, name in pstats.Stats(os.path.join(self.profile_dir, f'{profile_id}.prof')).stats}
+        self.assertIn('generate_weekly_digest', functions)
+
+    def test_only_admins_can_profile(self):
+        for headers in ({'X-Profile': '1'}, {**self.reader, 'X-Profile': '1'}, self.admin,
+                        {'Authorization': 'Bearer garbage', 'X-Profile': '1'}):
+            response = self.client.get('/rss/articles.xml', headers=headers, buffered=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+        self.assertEqual(self.client.get('/api/v1/admin/profiles', headers=self.reader).status_code, 403)
+        self.assertEqual(self.client.get('/api/v1/admin/profiles').status_code, 401)
+        for profile_id in ('../app', '20250101T000000-deadbeef'):
+            self.assertEqual(self.client.get(f'/api/v1/admin/profiles/{profile_id}', headers=self.admin).status_code,
+                             404)
+
+    def test_keeps_newest_profiles(self):
+        ids = [self.client.get('/health', headers={**self.admin, 'X-Profile': 'true'}).headers['X-Profile-Id']
+               for _ in range(5)]
+
+        profiles = self.client.get('/api/v1/admin/profiles', headers=self.admin).get_json()['profiles']
+        self.assertEqual([meta['id'] for meta in profiles], sorted(ids)[::-1][:3])
+        self.assertEqual(len(os.listdir(self.profile_dir)), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
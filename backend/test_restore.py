@@ -0,0 +1,235 @@
+"""
+Tests for the streaming backup restore
+"""
+import unittest
+import sys
+import os
+import gzip
+import io
+import json
+from datetime import date, datetime
+from unittest.mock import patch
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article, Digest, WeeklyRollup
+import services.backup_restore as backup_restore
+from services.backup_restore import iter_backup, open_backup, restore_backup
+
+
+class TestIterBackup(unittest.TestCase):
+
+    def test_parses_records_across_small_reads(self):
+        document = {'version': '1.0.0', 'user': {'id': 1, 'username': 'reader'},
+                    'articles': [{'id': i, 'title': f'Article {i}', 'content': 'x' * 50} for i in range(5)],
+                    'digests': [], 'count': 12345}
+        with patch.object(backup_restore, 'READ_CHUNK_SIZE', 7):
+            items = list(iter_backup(io.StringIO(json.dumps(document, indent=1))))
+
+        self.assertEqual(items[:2], [('version', '1.0.0'), ('user', {'id': 1, 'username': 'reader'})])
+        self.assertEqual([value['id'] for key, value in items if key == 'articles'], list(range(5)))
+        # Numbers cut by a read boundary are not decoded early
+        self.assertEqual(items[-1], ('count', 12345))
+
+    def test_rejects_malformed_documents(self):
+        for text in ('', '[]', '{"articles": [{"id": 1}', '{"articles": [{"id": 1}] "digests": []}'):
+            with self.assertRaises(ValueError, msg=text):
+                list(iter_backup(io.StringIO(text)))
+
+        with self.assertRaises(ValueError):
+            list(iter_backup(open_backup(io.BytesIO(b'not gzip at all'))))
+
+
+class TestRestore(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.flush()
+        self.user_id = user.id
+        for i in range(5):
+            article = Article(title=f'Article {i}', content=f'Body {i}', notes='note',
+                              reading_date=date(2025, 1, 6 + i % 2), user_id=user.id,
+                              created_at=datetime(2025, 1, 6, 12, i, 30, 123456))
+            article.set_tags(['python', f'topic-{i}'])
+            db.session.add(article)
+        db.session.add(Digest(title='Week 2', content='# Week 2', summary='Saved', is_published=True,
+                              week_start=date(2025, 1, 6), week_end=date(2025, 1, 12), user_id=user.id,
+                              published_at=datetime(2025, 1, 13, 9, 0)))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        self.backup = self.client.get('/api/v1/admin/export', headers=self.headers, buffered=True).get_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def restore(self, data=None, **kwargs):
+        return self.client.post('/api/v1/admin/import', data=data if data is not None else self.backup,
+                                content_type='application/gzip', headers=self.headers, **kwargs)
+
+    def clear_library(self):
+        for article in Article.query.all():
+            db.session.delete(article)
+        Digest.query.delete()
+        db.session.commit()
+
+    def test_round_trip_into_empty_account(self):
+        originals = {article.title: article.to_dict() for article in Article.query}
+        self.clear_library()
+
+        response = self.restore()
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['articles']['created'], 5)
+        self.assertEqual(body['digests']['created'], 1)
+        self.assertEqual(body['errors'], [])
+
+        for article in Article.query:
+            original = originals[article.title]
+            for name in ('content', 'notes', 'tags', 'reading_date', 'is_public', 'created_at'):
+                self.assertEqual(article.to_dict()[name], original[name], name)
+            self.assertEqual(sorted(tag.name for tag in article.tag_entries), sorted(original['tags']))
+            self.assertEqual(article.excerpt, original['excerpt'])
+        digest = Digest.query.one()
+        self.assertEqual((digest.summary, digest.is_published, digest.is_auto_draft), ('Saved', True, False))
+        self.assertEqual(digest.published_at, datetime(2025, 1, 13, 9, 0))
+        self.assertEqual(db.session.get(WeeklyRollup, (self.user_id, date(2025, 1, 6))).article_count, 5)
+
+    def test_restore_is_idempotent(self):
+        # Same database: every record matches its original id
+        body = self.restore().get_json()
+        self.assertEqual(body['articles'], {'created': 0, 'updated': 0, 'unchanged': 5, 'skipped': 0, 'failed': 0})
+        self.assertEqual(body['digests']['unchanged'], 1)
+
+        # Edits since the backup are rolled back to the backed-up version
+        article = Article.query.filter_by(title='Article 0').one()
+        article.notes = 'edited'
+        article.set_tags(['other'])
+        db.session.commit()
+        body = self.restore().get_json()
+        self.assertEqual((body['articles']['updated'], body['articles']['unchanged']), (1, 4))
+        article = Article.query.filter_by(title='Article 0').one()
+        self.assertEqual((article.notes, article.get_tags()), ('note', ['python', 'topic-0']))
+
+        # Fresh ids after a restore into an empty account: matched by content hash
+        self.clear_library()
+        self.restore()
+        body = self.restore().get_json()
+        self.assertEqual((body['articles']['created'], body['articles']['unchanged']), (0, 5))
+        self.assertEqual(Article.query.count(), 5)
+        self.assertEqual(Digest.query.count(), 1)
+
+    def test_reused_ids_are_not_overwritten(self):
+        other = User(username='other', email='other@example.com')
+        db.session.add(other)
+        db.session.flush()
+        # Another account whose articles happen to carry the backup's ids
+        Article.query.update({'user_id': other.id})
+        db.session.commit()
+
+        body = restore_backup(open_backup(io.BytesIO(self.backup)), user_id=other.id)
+
+        self.assertEqual(body['articles']['created'], 0)
+        self.assertEqual(body['articles']['unchanged'], 5)
+        body = restore_backup(open_backup(io.BytesIO(self.backup)), user_id=self.user_id)
+        self.assertEqual(body['articles']['created'], 5)
+        self.assertEqual(Article.query.filter_by(user_id=other.id).count(), 5)
+
+        # Same id in the target account but a different record: restored alongside it
+        target = Article.query.filter_by(user_id=other.id).first()
+        for article in Article.query.filter_by(user_id=self.user_id):
+            db.session.delete(article)
+        db.session.commit()
+        target.user_id = self.user_id
+        target.created_at = datetime(2024, 1, 1)
+        target.content = 'Rewritten'
+        db.session.commit()
+        body = restore_backup(open_backup(io.BytesIO(self.backup)), user_id=self.user_id)
+        self.assertEqual(body['articles']['created'], 5)
+        self.assertEqual(db.session.get(Article, target.id).content, 'Rewritten')
+
+    def test_drafts_and_invalid_records(self):
+        document = {
+            'version': '1.0.0',
+            'user': {'id': 99, 'username': 'reader'},
+            'articles': [
+                {'id': 900, 'title': 'Fresh', 'content': 'New body', 'tags': ['new'], 'reading_date': '2025-02-03'},
+                {'id': 901, 'title': 'Broken'},
+                {'id': 902, 'title': 'Bad date', 'content': 'x', 'reading_date': 'yesterday'},
+            ],
+            'digests': [
+                {'id': 903, 'title': 'Draft', 'content': 'draft', 'is_auto_draft': True,
+                 'week_start': '2025-02-03', 'week_end': '2025-02-09'},
+                {'id': 904, 'title': 'Saved', 'content': 'mine', 'week_start': '2025-02-10', 'week_end': 'soon'},
+            ]
+        }
+        data = gzip.compress(json.dumps(document).encode('utf-8'))
+
+        # The account named in the header is used when none is given
+        body = restore_backup(open_backup(io.BytesIO(data)), batch_size=2)
+
+        self.assertEqual(body['articles']['created'], 1)
+        self.assertEqual(body['articles']['failed'], 2)
+        self.assertEqual(body['digests']['skipped'], 1)
+        self.assertEqual(body['errors'], [
+            {'section': 'articles', 'index': 1, 'error': 'Content is required'},
+            {'section': 'articles', 'index': 2, 'error': 'Invalid reading_date format. Use YYYY-MM-DD'},
+            {'section': 'digests', 'index': 1, 'error': 'Invalid week_end format. Use YYYY-MM-DD'},
+        ])
+        # The backed-up draft is rebuilt from the restored article instead
+        draft = Digest.query.filter_by(user_id=self.user_id, is_auto_draft=True).one()
+        self.assertEqual(draft.week_start, date(2025, 2, 3))
+        self.assertIn('Fresh', draft.content)
+
+    def test_restored_digest_supersedes_draft(self):
+        article = Article(title='Later', content='Later body', reading_date=date(2025, 3, 3), user_id=self.user_id)
+        db.session.add(article)
+        db.session.commit()
+        self.assertEqual(Digest.query.filter_by(week_start=date(2025, 3, 3), is_auto_draft=True).count(), 1)
+
+        document = {'version': '1.0.0', 'user': {'username': 'reader'}, 'articles': [], 'digests': [
+            {'title': 'Mine', 'content': 'My words', 'week_start': '2025-03-03', 'week_end': '2025-03-09',
+             'is_published': True}
+        ]}
+        body = restore_backup(open_backup(io.BytesIO(gzip.compress(json.dumps(document).encode()))),
+                              user_id=self.user_id)
+
+        self.assertEqual(body['digests']['created'], 1)
+        digests = Digest.query.filter_by(week_start=date(2025, 3, 3)).all()
+        self.assertEqual([(digest.title, digest.is_auto_draft) for digest in digests], [('Mine', False)])
+        self.assertIsNotNone(digests[0].excerpt)
+
+    def test_import_endpoint_errors(self):
+        response = self.client.post('/api/v1/admin/import', data=self.backup, content_type='application/gzip')
+        self.assertEqual(response.status_code, 401)
+
+        response = self.restore(b'plain text')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.restore(gzip.compress(b'{"version": "2.0.0", "articles": []}'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unsupported backup version', response.get_json()['msg'])
+
+        # Multipart upload
+        self.clear_library()
+        response = self.client.post('/api/v1/admin/import', headers=self.headers,
+                                    data={'file': (io.BytesIO(self.backup), 'backup.json.gz')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['articles']['created'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,7 +21,7 @@ except ImportError as e:
 
 # Mock article data for testing
 class MockArticle:
-    def __init__(self, id, title, content, notes, tags, created_at, url=None):
+    def __init__(self, id, title, content, notes, tags, created_at, url=None, excerpt=None):
         self.id = id
         self.title = title
         self.content = content
@@ -29,6 +29,8 @@ class MockArticle:
         self.tags = tags
         self.created_at = created_at
         self.url = url
+        # None until backfilled; the feed then computes it from content
+        self.excerpt = excerpt
         self.author = MockUser()
 
 class MockUser:
@@ -69,15 +71,15 @@ class MockRequest:
     def url(self):
         return "http://localhost:5001/rss/articles.xml"
 
-# Set up mock request
-import routes.rss
-routes.rss.request = MockRequest()
+# Set up mock request (patched only while generating, so other tests see the real request)
+from unittest.mock import patch
 
-def test_rss_generation():
-    """Test RSS XML generation"""
+def check_rss_generation():
+    """Generate a feed from the mock articles and report whether it is valid RSS"""
     try:
         # Generate RSS XML
-        rss_xml = generate_rss_xml(mock_articles)
+        with patch('routes.rss.request', MockRequest()):
+            rss_xml = generate_rss_xml(mock_articles)
         
         # Validate XML structure
         try:
@@ -113,6 +115,9 @@ def test_rss_generation():
                 # Check items
                 items = channel.findall('item')
                 print(f"✅ Found {len(items)} items")
+                if len(items) != len(mock_articles):
+                    print(f"❌ Expected {len(mock_articles)} items")
+                    return False
                 
                 for i, item in enumerate(items):
                     item_title = item.find('title')
@@ -145,9 +150,13 @@ def test_rss_generation():
         print(f"❌ Error generating RSS: {e}")
         return False
 
+def test_rss_generation():
+    """Test RSS XML generation"""
+    assert check_rss_generation()
+
 if __name__ == "__main__":
     print("🔄 Testing RSS feed generation...")
-    success = test_rss_generation()
+    success = check_rss_generation()
     
     if success:
         print("\n✅ RSS feed test completed successfully!")
@@ -0,0 +1,139 @@
+"""
+Tests for the server-side RSS feed cache, conditional requests and invalidation
+"""
+import unittest
+import sys
+import os
+import gzip
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article
+from services.query_profiler import assert_query_budget
+
+
+class TestRSSFeedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.alice = User(username='alice', email='alice@example.com')
+        self.bob = User(username='bob', email='bob@example.com')
+        db.session.add_all([self.alice, self.bob])
+        db.session.flush()
+        self.article = self._add_article(self.alice, 'First post', ['python'])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_article(self, user, title, tags):
+        article = Article(title=title, content='content', reading_date=date(2025, 1, 6), user_id=user.id)
+        article.set_tags(tags)
+        db.session.add(article)
+        return article
+
+    def get(self, path, **kwargs):
+        return self.client.get(path, buffered=True, **kwargs)
+
+    def test_repeat_polls_skip_database(self):
+        first = self.get('/rss/articles.xml')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('First post', first.get_data(as_text=True))
+
+        with assert_query_budget() as statements:
+            second = self.get('/rss/articles.xml')
+        self.assertEqual(statements, [])
+        self.assertEqual(second.get_data(), first.get_data())
+
+    def test_conditional_requests_return_304(self):
+        # The render that fills the cache already carries the validators
+        first = self.get('/rss/articles.xml')
+        etag = first.headers['ETag']
+        self.assertIn('Last-Modified', first.headers)
+        self.assertEqual(self.get('/rss/articles.xml').headers['ETag'], etag)
+
+        response = self.get('/rss/articles.xml', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+        response = self.get('/rss/articles.xml',
+                                   headers={'If-Modified-Since': first.headers['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_gzip_variant(self):
+        plain = self.get('/rss/articles.xml')
+        response = self.get('/rss/articles.xml', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), plain.get_data())
+
+    def test_writes_invalidate_affected_feeds_only(self):
+        self.get('/rss/articles.xml')
+        self.get('/rss/user/%d/articles.xml' % self.alice.id)
+        self.get('/rss/tag/python/articles.xml')
+        self.get('/rss/tag/rust/articles.xml')
+
+        # Bob's untagged article touches only the global feed
+        self._add_article(self.bob, 'Bob post', [])
+        db.session.commit()
+
+        self.assertIn('Bob post', self.get('/rss/articles.xml').get_data(as_text=True))
+        with assert_query_budget() as statements:
+            self.get('/rss/user/%d/articles.xml' % self.alice.id)
+            self.get('/rss/tag/rust/articles.xml')
+        self.assertEqual(statements, [])
+
+        # Retagging Alice's article invalidates both the old and the new tag feed
+        self.article.set_tags(['rust'])
+        db.session.commit()
+        self.assertNotIn('First post', self.get('/rss/tag/python/articles.xml').get_data(as_text=True))
+        self.assertIn('First post', self.get('/rss/tag/rust/articles.xml').get_data(as_text=True))
+
+        db.session.delete(self.article)
+        db.session.commit()
+        self.assertNotIn('First post', self.get('/rss/user/%d/articles.xml' % self.alice.id).get_data(as_text=True))
+
+    def test_render_racing_an_invalidation_is_not_stored(self):
+        cache = self.app.extensions['feed_cache']
+        generation = cache.generation
+        # Another request commits a new article while this one renders
+        cache.invalidate([self.alice.id], [])
+
+        cache.set(('articles',), b'<rss/>', generation=generation)
+        self.assertIsNone(cache.get(('articles',)))
+        cache.set(('articles',), b'<rss/>', generation=cache.generation)
+        self.assertEqual(cache.get(('articles',)).body, b'<rss/>')
+
+    def test_self_link_matches_cache_key(self):
+        first = self.get('/rss/tag/Python/articles.xml?utm_source=mail').get_data(as_text=True)
+        self.assertIn('href="http://localhost/rss/tag/python/articles.xml"', first)
+        self.assertNotIn('utm_source', first)
+        self.assertEqual(self.get('/rss/tag/python/articles.xml').get_data(as_text=True), first)
+
+        body = self.get('/rss/articles.xml?tag=python&limit=10&page=3').get_data(as_text=True)
+        self.assertIn('href="http://localhost/rss/articles.xml?tag=python&amp;limit=10"', body)
+
+    def test_limit_is_capped_and_feed_is_streamed_without_cache(self):
+        self.app.extensions.pop('feed_cache')
+        self.app.config['RSS_MAX_LIMIT'] = 2
+        for i in range(3):
+            self._add_article(self.bob, f'Extra {i}', [])
+        db.session.commit()
+
+        response = self.client.get('/rss/articles.xml?limit=100000')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.get_data(as_text=True).count('<item>'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
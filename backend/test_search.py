@@ -0,0 +1,113 @@
+"""
+Tests for full-text article search
+"""
+import unittest
+import sys
+import os
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article
+from flask_jwt_extended import create_access_token
+
+
+class TestArticleSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.alice = User(username='alice', email='alice@example.com')
+        self.bob = User(username='bob', email='bob@example.com')
+        db.session.add_all([self.alice, self.bob])
+        db.session.flush()
+        db.session.add_all([
+            Article(title='Postgres indexing guide', content='How GIN indexes speed up searching.',
+                    reading_date=date(2025, 1, 6), user_id=self.alice.id),
+            Article(title='Weekend notes', content='Mostly about gardening, one aside on indexes.',
+                    notes='Remember the <script> tag trick', reading_date=date(2025, 1, 7), user_id=self.alice.id),
+            Article(title='Private index research', content='Secret indexing experiments.',
+                    reading_date=date(2025, 1, 8), is_public=False, user_id=self.bob.id),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def search(self, query, user=None, **params):
+        headers = {}
+        if user is not None:
+            headers['Authorization'] = f'Bearer {create_access_token(identity=str(user.id))}'
+        return self.client.get('/api/v1/articles/search', query_string={'q': query, **params}, headers=headers)
+
+    def titles(self, response):
+        return [result['article']['title'] for result in response.get_json()['results']]
+
+    def test_ranked_results_with_highlights(self):
+        response = self.search('indexing')
+        self.assertEqual(response.status_code, 200)
+        # Stemming matches "indexes"; the title hit ranks first; the private article is hidden
+        self.assertEqual(self.titles(response), ['Postgres indexing guide', 'Weekend notes'])
+
+        first = response.get_json()['results'][0]
+        self.assertEqual(first['title_highlight'], 'Postgres <mark>indexing</mark> guide')
+        self.assertIn('<mark>indexes</mark>', first['snippet'])
+        self.assertEqual(first['article']['author'], 'alice')
+        # Summary projection: the snippet stands in for the body
+        self.assertNotIn('content', first['article'])
+        self.assertIn('excerpt', first['article'])
+        ranks = [result['rank'] for result in response.get_json()['results']]
+        self.assertGreater(ranks[0], ranks[1])
+
+        full = self.search('indexing', fields='all').get_json()['results'][0]['article']
+        self.assertEqual(full['content'], 'How GIN indexes speed up searching.')
+        self.assertEqual(self.search('indexing', fields='bogus').status_code, 400)
+
+    def test_snippets_are_escaped(self):
+        result = self.search('script')
+        self.assertIn('&lt;<mark>script</mark>&gt;', result.get_json()['results'][0]['snippet'])
+
+    def test_visibility(self):
+        self.assertIn('Private index research', self.titles(self.search('index', user=self.bob)))
+        self.assertNotIn('Private index research', self.titles(self.search('index', user=self.alice)))
+        self.assertEqual(self.titles(self.search('index', user=self.bob, view='own')), ['Private index research'])
+        self.assertEqual(self.search('index', view='own').status_code, 401)
+
+    def test_index_follows_writes(self):
+        article = Article.query.filter_by(title='Weekend notes').one()
+        article.content = 'Now all about compilers.'
+        article.notes = None
+        db.session.commit()
+        self.assertEqual(self.titles(self.search('gardening')), [])
+        self.assertEqual(self.titles(self.search('compilers')), ['Weekend notes'])
+
+        db.session.delete(article)
+        db.session.commit()
+        self.assertEqual(self.titles(self.search('compilers')), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ['"unbalanced', 'title:postgres', 'NOT AND OR', 'guide)*']:
+            self.assertEqual(self.search(query).status_code, 200, query)
+        self.assertEqual(self.search('   ').status_code, 400)
+        # The last word matches as a prefix
+        self.assertEqual(self.titles(self.search('postgres ind')), ['Postgres indexing guide'])
+
+    def test_pagination(self):
+        response = self.search('index', per_page=1)
+        self.assertTrue(response.get_json()['pagination']['has_next'])
+        response = self.search('index', per_page=1, page=2)
+        self.assertFalse(response.get_json()['pagination']['has_next'])
+        self.assertEqual(len(response.get_json()['results']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for normalized tag storage and indexed tag filtering
+"""
+import unittest
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database import db
+from models.models import User, Article, Tag, article_tags
+
+
+class TestTagIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        db.session.add(self.user)
+        db.session.commit()
+        self.token = create_access_token(identity=str(self.user.id))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _create(self, title, tags):
+        response = self.client.post('/api/v1/articles', json={
+            'title': title,
+            'content': f'{title} content',
+            'tags': tags,
+            'reading_date': '2025-01-06'
+        }, headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()['article']['id']
+
+    def test_create_syncs_tag_rows(self):
+        article_id = self._create('Decorators', ['Python', 'python ', 'patterns'])
+
+        article = db.session.get(Article, article_id)
+        self.assertEqual(sorted(tag.name for tag in article.tag_entries), ['patterns', 'python'])
+        self.assertEqual(Tag.query.count(), 2)
+
+    def test_filter_matches_whole_tags_only(self):
+        self._create('Python article', ['python'])
+        self._create('Py article', ['py'])
+
+        response = self.client.get('/api/v1/articles?tag=py')
+        titles = [a['title'] for a in response.get_json()['articles']]
+        self.assertEqual(titles, ['Py article'])
+
+        response = self.client.get('/rss/tag/py/articles.xml')
+        body = response.get_data(as_text=True)
+        self.assertIn('Py article', body)
+        self.assertNotIn('Python article', body)
+
+    def test_update_and_delete_keep_association_in_sync(self):
+        article_id = self._create('Retagged', ['old'])
+        headers = {'Authorization': f'Bearer {self.token}'}
+
+        self.client.put(f'/api/v1/articles/{article_id}', json={'tags': ['new']}, headers=headers)
+        response = self.client.get('/api/v1/articles?tag=old')
+        self.assertEqual(response.get_json()['articles'], [])
+        response = self.client.get('/api/v1/articles?tag=new')
+        self.assertEqual(len(response.get_json()['articles']), 1)
+
+        self.client.delete(f'/api/v1/articles/{article_id}', headers=headers)
+        remaining = db.session.execute(db.select(article_tags)).all()
+        self.assertEqual(remaining, [])
+
+    def test_tag_created_concurrently_is_reused(self):
+        inserted = []
+
+        def concurrent_insert(conn, cursor, statement, parameters, context, executemany):
+            # Another request commits the tag right after this one looked for it
+            if not inserted and statement.startswith('SELECT') and 'FROM tags' in statement:
+                inserted.append(True)
+                cursor.connection.execute("INSERT INTO tags (name) VALUES ('python')")
+
+        event.listen(db.engine, 'after_cursor_execute', concurrent_insert)
+        try:
+            article_id = self._create('Raced', ['python', 'racing'])
+        finally:
+            event.remove(db.engine, 'after_cursor_execute', concurrent_insert)
+
+        self.assertEqual(inserted, [True])
+        article = db.session.get(Article, article_id)
+        self.assertEqual(sorted(tag.name for tag in article.tag_entries), ['python', 'racing'])
+        self.assertEqual(Tag.query.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
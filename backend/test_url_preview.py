@@ -13,7 +13,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.url_preview import URLPreviewService, url_preview_service
 from app import create_app
+from database import db
+from models.models import User
+from flask_jwt_extended import create_access_token
 import requests
+import threading
 
 
 class TestURLPreviewService(unittest.TestCase):
@@ -102,7 +106,9 @@ class TestURLPreviewService(unittest.TestCase):
         
         # Mock response
         mock_response = Mock()
-        mock_response.text = html_content
+        mock_response.iter_content.return_value = [html_content.encode('utf-8')]
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.encoding = 'utf-8'
         mock_response.url = 'https://example.com/article'
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
@@ -174,7 +180,9 @@ class TestURLPreviewService(unittest.TestCase):
         '''
         
         mock_response = Mock()
-        mock_response.text = html_content
+        mock_response.iter_content.return_value = [html_content.encode('utf-8')]
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.encoding = 'utf-8'
         mock_response.url = 'https://example.com'
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
@@ -195,7 +203,9 @@ class TestURLPreviewService(unittest.TestCase):
         '''
         
         mock_response = Mock()
-        mock_response.text = html_content
+        mock_response.iter_content.return_value = [html_content.encode('utf-8')]
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.encoding = 'utf-8'
         mock_response.url = 'https://example.com'
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
@@ -217,7 +227,9 @@ class TestURLPreviewService(unittest.TestCase):
         '''
         
         mock_response = Mock()
-        mock_response.text = html_content
+        mock_response.iter_content.return_value = [html_content.encode('utf-8')]
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.encoding = 'utf-8'
         mock_response.url = 'https://example.com/article'
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
@@ -225,6 +237,54 @@ class TestURLPreviewService(unittest.TestCase):
         result = self.service.get_preview('https://example.com/article')
         self.assertEqual(result['image'], 'https://example.com/article-image.jpg')
 
+    @patch('services.url_preview.requests.Session.get')
+    def test_stops_reading_after_head(self, mock_get):
+        """Test that the body is not downloaded once the head has all metadata"""
+        head = (b'<html><head><title>T</title>'
+                b'<meta property="og:description" content="D">'
+                b'<meta property="og:image" content="/i.jpg"></head>')
+        consumed = []
+
+        def chunks(chunk_size=None):
+            for chunk in [head, b'<body>' + b'x' * 10000, b'never read']:
+                consumed.append(chunk)
+                yield chunk
+
+        mock_response = Mock()
+        mock_response.iter_content.side_effect = chunks
+        mock_response.headers = {'Content-Type': 'text/html'}
+        mock_response.url = 'https://example.com/'
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        result = self.service.get_preview('https://example.com/')
+
+        self.assertEqual(consumed, [head])
+        self.assertEqual(result['description'], 'D')
+        self.assertEqual(result['image'], 'https://example.com/i.jpg')
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+        mock_response.close.assert_called_once()
+
+    @patch('services.url_preview.requests.Session.get')
+    def test_byte_cap_and_non_html(self, mock_get):
+        """Test the read cap and that non-HTML responses are skipped"""
+        service = URLPreviewService(timeout=5, max_bytes=64, chunk_size=16)
+        mock_response = Mock()
+        mock_response.iter_content.return_value = iter([b'<html><head><title>Capped</title>', b'y' * 1000, b'z' * 1000])
+        mock_response.headers = {'Content-Type': 'text/html'}
+        mock_response.url = 'https://example.com/'
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        self.assertEqual(len(service._read_head(mock_response)), 64)
+
+        mock_response.iter_content.reset_mock()
+        mock_response.headers = {'Content-Type': 'application/pdf'}
+        result = service.get_preview('https://example.com/file.pdf')
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], 'Unsupported content type: application/pdf')
+        mock_response.iter_content.assert_not_called()
+
 
 class TestURLPreviewAPI(unittest.TestCase):
     
@@ -289,6 +349,86 @@ class TestURLPreviewAPI(unittest.TestCase):
         self.assertIn('Preview failed', data['error'])
 
 
+class TestBatchURLPreview(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        user = User(username='reader', email='reader@example.com')
+        db.session.add(user)
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fetches_concurrently_with_per_host_limit(self):
+        """Test that a busy host neither exceeds its limit nor holds workers other hosts could use"""
+        service = URLPreviewService(timeout=5, max_workers=4, per_host_limit=2)
+        in_flight = {}
+        peak = {}
+        started = []
+        first_wave = threading.Event()
+        lock = threading.Lock()
+
+        def slow_preview(url):
+            host = url.split('/')[2]
+            with lock:
+                started.append(url)
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+                peak['total'] = max(peak.get('total', 0), sum(in_flight.values()))
+                if sum(in_flight.values()) == service.max_workers:
+                    first_wave.set()
+            # Hold every worker until the pool is full (or give up, failing the peak assertion)
+            first_wave.wait(timeout=5)
+            with lock:
+                in_flight[host] -= 1
+            return {'url': url, 'success': True}
+
+        urls = [f'https://busy.example.com/{i}' for i in range(4)] + \
+               [f'https://site{i}.example.com/a' for i in range(2)]
+        with patch.object(service, 'get_preview', side_effect=slow_preview):
+            results = dict(service.get_previews(urls))
+
+        self.assertEqual(sorted(results), list(range(len(urls))))
+        self.assertEqual(results[5]['url'], urls[5])
+        self.assertEqual(peak['busy.example.com'], 2)
+        self.assertEqual(peak['total'], 4)
+        # The other hosts got the workers the busy host could not use; its queued URLs waited their turn
+        self.assertEqual(set(started[:4]), set(urls[:2] + urls[4:]))
+        self.assertEqual(set(started[4:]), set(urls[2:4]))
+        self.assertEqual(service._hosts, {})
+
+    @patch('routes.articles.url_preview_service.get_previews')
+    def test_batch_endpoint_modes(self, mock_get_previews):
+        """Test consolidated and NDJSON responses of the batch endpoint"""
+        urls = ['https://a.example.com', 'https://b.example.com']
+        mock_get_previews.side_effect = lambda requested: iter([
+            (1, {'url': requested[1], 'success': True}),
+            (0, {'url': requested[0], 'success': False}),
+        ])
+
+        response = self.client.post('/api/v1/articles/preview-urls', json={'urls': urls}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()['results']
+        self.assertEqual([r['url'] for r in results], urls)
+        self.assertFalse(results[0]['preview']['success'])
+
+        response = self.client.post('/api/v1/articles/preview-urls?stream=true', json={'urls': urls}, headers=self.headers)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['index'] for line in lines], [1, 0])
+
+        response = self.client.post('/api/v1/articles/preview-urls', json={'urls': []}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
 class TestURLPreviewIntegration(unittest.TestCase):
     """Integration tests with real HTTP requests (optional, for manual testing)"""
     
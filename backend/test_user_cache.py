@@ -0,0 +1,89 @@
+"""
+Tests for the cached JWT user lookup
+"""
+import unittest
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User
+from services.query_profiler import assert_query_budget
+from flask_jwt_extended import create_access_token
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='reader', email='reader@example.com')
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+        self.headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_profile_endpoints_reuse_cached_user(self):
+        with assert_query_budget() as statements:
+            response = self.client.get('/api/v1/auth/me', headers=self.headers)
+        self.assertEqual(response.get_json()['user']['username'], 'reader')
+        # The JWT loader's lookup is the only query; the route reuses its user
+        self.assertEqual(len(statements), 1, statements)
+
+        with assert_query_budget() as statements:
+            self.assertEqual(self.client.get('/api/v1/auth/me', headers=self.headers).status_code, 200)
+            self.assertEqual(self.client.get('/api/v1/users/profile', headers=self.headers).status_code, 200)
+        self.assertEqual(statements, [])
+
+    def test_updates_invalidate_cache(self):
+        self.client.get('/api/v1/auth/me', headers=self.headers)
+
+        response = self.client.put('/api/v1/users/profile', json={'first_name': 'Ada'}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/auth/me', headers=self.headers).get_json()['user']['first_name'], 'Ada')
+
+        # Changes made outside the request path are seen too
+        db.session.get(User, self.user_id).is_admin = True
+        db.session.commit()
+        db.session.remove()
+        self.assertTrue(self.client.get('/api/v1/users/profile', headers=self.headers).get_json()['user']['is_admin'])
+
+        self.assertEqual(self.client.post('/api/v1/users/deactivate', headers=self.headers).status_code, 200)
+        self.assertFalse(self.client.get('/api/v1/auth/me', headers=self.headers).get_json()['user']['is_active'])
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get('/api/v1/auth/me', headers=self.headers)
+        db.session.delete(db.session.get(User, self.user_id))
+        db.session.commit()
+        self.assertEqual(self.client.get('/api/v1/auth/me', headers=self.headers).status_code, 401)
+
+    def test_ttl_expiry(self):
+        cache = self.app.extensions['user_cache']
+        now = [0.0]
+        cache.clock = lambda: now[0]
+        self.client.get('/api/v1/auth/me', headers=self.headers)
+
+        now[0] += cache.ttl + 1
+        # The test's app context outlives requests, so clear its identity map
+        db.session.remove()
+        with assert_query_budget() as statements:
+            self.client.get('/api/v1/auth/me', headers=self.headers)
+        self.assertEqual(len(statements), 1, statements)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests that weekly rollups stay in sync with article writes and match a full rebuild
+"""
+import unittest
+import sys
+import os
+import json
+from datetime import date
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database import db
+from models.models import User, Article, WeeklyRollup
+from services.weekly_rollup import rebuild_weekly_rollups
+from services.weekly_digest_service import WeeklyDigestService
+
+
+class TestWeeklyRollup(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='reader', email='reader@example.com')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, reading_date, tags, commit=True):
+        article = Article(title='Article', content='content', reading_date=reading_date, user_id=self.user.id)
+        article.set_tags(tags)
+        db.session.add(article)
+        if commit:
+            db.session.commit()
+        return article
+
+    def snapshot(self):
+        db.session.expire_all()
+        return {rollup.week_start: rollup.to_dict() for rollup in WeeklyRollup.query.all()}
+
+    def assert_matches_rebuild(self):
+        incremental = self.snapshot()
+        with db.engine.begin() as conn:
+            rebuild_weekly_rollups(conn)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_create_update_delete(self):
+        # Monday and Wednesday of one week, Sunday of the next
+        first = self.add_article(date(2025, 1, 6), ['Python', 'web'])
+        self.add_article(date(2025, 1, 8), ['python'])
+        last = self.add_article(date(2025, 1, 19), [])
+
+        rollup = db.session.get(WeeklyRollup, (self.user.id, date(2025, 1, 6)))
+        self.assertEqual(rollup.article_count, 2)
+        self.assertEqual(rollup.get_day_counts(), [1, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(rollup.get_tag_counts(), {'python': 2, 'web': 1})
+        self.assertEqual(db.session.get(WeeklyRollup, (self.user.id, date(2025, 1, 13))).get_day_counts(),
+                         [0, 0, 0, 0, 0, 0, 1])
+        self.assert_matches_rebuild()
+
+        # Move an article to another week and retag it
+        first.reading_date = date(2025, 1, 14)
+        first.set_tags(['rust'])
+        db.session.commit()
+        self.assertEqual(self.snapshot()[date(2025, 1, 6)]['tag_counts'], {'python': 1})
+        self.assertEqual(self.snapshot()[date(2025, 1, 13)]['tag_counts'], {'rust': 1})
+        self.assert_matches_rebuild()
+
+        # Update an article whose attributes were expired by the previous commit
+        db.session.expire(last)
+        last.tags = json.dumps(['go'])
+        db.session.commit()
+        self.assertEqual(self.snapshot()[date(2025, 1, 13)]['tag_counts'], {'go': 1, 'rust': 1})
+
+        db.session.delete(last)
+        db.session.commit()
+        self.assertEqual(self.snapshot()[date(2025, 1, 13)]['article_count'], 1)
+        self.assert_matches_rebuild()
+
+        db.session.delete(db.session.get(Article, first.id))
+        db.session.commit()
+        self.assertNotIn(date(2025, 1, 13), self.snapshot())
+
+    def test_rollback_leaves_rollups_untouched(self):
+        self.add_article(date(2025, 1, 6), ['python'])
+        before = self.snapshot()
+
+        self.add_article(date(2025, 1, 7), ['web'], commit=False)
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(before, self.snapshot())
+
+    def test_deleting_user_drops_rollups(self):
+        self.add_article(date(2025, 1, 6), ['python'])
+        db.session.delete(self.user)
+        db.session.commit()
+        self.assertEqual(self.snapshot(), {})
+
+    def test_summary_reads_rollup(self):
+        for day in (6, 7, 7):
+            self.add_article(date(2025, 1, day), ['python', 'web'] if day == 7 else ['python'])
+
+        digest = WeeklyDigestService().generate_weekly_digest(self.user.id, '2025-01-06', '2025-01-12')
+        self.assertIn('Read 3 articles', digest['summary'])
+        self.assertIn('Most active reading day: Tuesday with 2 articles.', digest['summary'])
+        self.assertIn('Main topics covered: python, web.', digest['summary'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import re
+from typing import Optional
+
+EXCERPT_LENGTH = 300  # Maximum characters of a stored excerpt, ellipsis included
+
+# Applied in order; mirrors stripMarkdown() in the frontend utils. Each rule
+# is skipped when its marker does not occur in the text at all.
+_MARKDOWN_RULES = [
+    ('```', re.compile(r'```.*?(```|$)', re.S), ' '),                  # Fenced code blocks
+    ('<', re.compile(r'<[^>\n]+>'), ' '),                              # Inline HTML tags
+    ('![', re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),              # Images -> alt text
+    ('](', re.compile(r'\[([^\]]+)\]\([^)]*\)'), r'\1'),               # Links -> link text
+    ('][', re.compile(r'\[([^\]]+)\]\[[^\]]*\]'), r'\1'),              # Reference links
+    (']:', re.compile(r'^\s{0,3}\[[^\]]+\]:\s*\S+.*$', re.M), ''),     # Link definitions
+    ('#', re.compile(r'^\s{0,3}#{1,6}\s+', re.M), ''),                 # Headers
+    ('>', re.compile(r'^\s{0,3}>\s?', re.M), ''),                      # Blockquotes
+    ('', re.compile(r'^\s*([-*_]\s*){3,}$', re.M), ''),              # Horizontal rules
+    ('', re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+', re.M), ''),           # List markers
+    ('|', re.compile(r'^\s*\|?[\s:|-]*-[\s:|-]*$', re.M), ''),         # Table separator rows
+    ('|', re.compile(r'\|'), ' '),                                     # Table cell borders
+    ('', re.compile(r'(\*\*|__)(.+?)\1'), r'\2'),                     # Bold
+    ('', re.compile(r'(?<!\w)([*_])(?!\s)(.+?)(?<!\s)\1(?!\w)'), r'\2'),  # Italic
+    ('~~', re.compile(r'~~(.+?)~~'), r'\1'),                            # Strikethrough
+    ('`', re.compile(r'`([^`]*)`'), r'\1'),                            # Inline code
+]
+
+def strip_markdown(text: Optional[str]) -> str:
+    """Reduce markdown to plain text on a single line"""
+    if not text:
+        return ''
+    for marker, pattern, replacement in _MARKDOWN_RULES:
+        if marker in text:
+            text = pattern.sub(replacement, text)
+    return ' '.join(text.split())
+
+def make_excerpt(text: Optional[str], length: int = EXCERPT_LENGTH) -> Optional[str]:
+    """
+    Plain-text preview of markdown, at most `length` characters.
+
+    Longer text is cut at the last word boundary that fits and ends with an
+    ellipsis; a single overlong word is cut mid-word. Returns None for empty text.
+    """
+    if not text:
+        return None
+    # Markup rarely triples the length of text, so only the head is stripped;
+    # the whole text is used when the head turns out to be mostly markup
+    head = text[:length * 3]
+    plain = strip_markdown(head)
+    if len(plain) <= length and len(head) < len(text):
+        plain = strip_markdown(text)
+    if not plain:
+        return None
+    if len(plain) <= length:
+        return plain
+
+    cut = plain[:length - 1]
+    if not plain[length - 1].isspace():
+        # Drop the partial last word
+        boundary = cut.rfind(' ')
+        if boundary > 0:
+            cut = cut[:boundary]
+    return cut.rstrip(' ,;:.-') + '…'
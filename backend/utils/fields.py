@@ -0,0 +1,27 @@
+from typing import Optional, Sequence, Tuple
+
+def parse_fields(raw: Optional[str], available: Sequence[str], summary: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Resolve a `fields=` query parameter into the keys to serialize.
+
+    Missing or `summary` selects the summary projection and `all` every
+    available field; otherwise a comma-separated list of field names is
+    expected. `id` is always included.
+
+    Raises:
+        ValueError: if a requested field is unknown
+    """
+    raw = (raw or '').strip()
+    if raw in ('', 'summary'):
+        return tuple(summary)
+    if raw == 'all':
+        return tuple(available)
+
+    requested = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+
+    # Keep the model's field order so responses look the same whatever the parameter order
+    selected = set(requested) | {'id'}
+    return tuple(name for name in available if name in selected)
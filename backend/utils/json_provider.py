@@ -0,0 +1,65 @@
+"""
+JSON provider for API responses.
+
+Uses orjson (pinned in requirements.txt) and falls back to the standard
+library only where it cannot be installed. Dates and datetimes are serialized natively as ISO 8601, so
+models can hand them over as-is instead of pre-formatting every value.
+"""
+import json
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+
+# Required in production; the fallback keeps platforms without wheels working
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(o):
+    """ISO 8601 for dates and times, then Flask's extra types (UUID, Decimal, dataclasses)"""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    @property
+    def backend(self) -> str:
+        """Name of the serializer in use"""
+        return 'orjson' if orjson is not None else 'json'
+
+    def dumps_bytes(self, obj, indent: bool = False) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except TypeError:
+                # e.g. integers wider than 64 bits; the stdlib encoder handles them
+                pass
+
+        layout = {'indent': 2} if indent else {'separators': (',', ':')}
+        return json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys, **layout).encode('utf-8')
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Options meant for json.dumps (indent, cls, ...) keep the stdlib behavior
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Date, DateTime, literal, tuple_
+
+MAX_CURSOR_PAGE_SIZE = 100
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    Encode the sort key of the last row on a page as an opaque cursor.
+
+    Dates and datetimes are stored as ISO strings; the result is URL-safe.
+    """
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor_payload(cursor: str) -> List:
+    """
+    The raw JSON list inside a cursor, with dates still as ISO strings.
+
+    Raises:
+        ValueError: if the cursor is not an encoded JSON list
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeEncodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(payload, list):
+        raise ValueError('Invalid cursor')
+    return payload
+
+def decode_cursor(cursor: str, columns: Sequence) -> List:
+    """
+    Decode a cursor produced by encode_cursor() back into typed values.
+
+    Raises:
+        ValueError: if the cursor is malformed or does not match the columns
+    """
+    payload = decode_cursor_payload(cursor)
+    if len(payload) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    return [_decode_value(column, value) for column, value in zip(columns, payload)]
+
+def _decode_value(column, value):
+    """One JSON value of a cursor as the Python type of its column"""
+    if value is None:
+        return None
+    if isinstance(column.type, (DateTime, Date)):
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        parse = datetime.fromisoformat if isinstance(column.type, DateTime) else date.fromisoformat
+        try:
+            return parse(value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return value
+    # JSON has no int/float distinction for whole numbers, and bool is an int to isinstance()
+    if isinstance(value, bool) and expected is not bool:
+        raise ValueError('Invalid cursor')
+    if expected is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, expected):
+        raise ValueError('Invalid cursor')
+    return value
+
+def keyset_paginate(query, columns: Sequence, cursor: Optional[str], per_page: int,
+                    include_total: bool = False) -> Dict:
+    """
+    Paginate a query by keyset instead of OFFSET.
+
+    Rows are ordered by `columns` descending (the last column must be unique,
+    typically the primary key) and the page starts strictly after `cursor`.
+    One extra row is fetched to detect whether another page exists, so no
+    COUNT(*) is issued unless `include_total` is set.
+
+    Returns:
+        Dict with 'items', 'per_page', 'next_cursor', 'has_next' and 'total' (None when skipped)
+    """
+    per_page = max(1, min(per_page, MAX_CURSOR_PAGE_SIZE))
+
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if any(value is None for value in values):
+            raise ValueError('Invalid cursor')
+        bounds = [literal(value, type_=column.type) for column, value in zip(columns, values)]
+        query = query.filter(tuple_(*columns) < tuple_(*bounds))
+
+    rows = query.order_by(None).order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    return {
+        'items': items,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+        'total': total
+    }
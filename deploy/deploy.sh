@@ -226,7 +226,7 @@ EOF"
     sudo -u $APP_USER bash -c "
         source venv/bin/activate
         export FLASK_APP=app.py
-        python3 -c 'from database import db; db.create_all()'
+        python3 migrate.py
     "
     
     log "Backend setup completed"
@@ -319,11 +319,52 @@ ReadWritePaths=$APP_DIR
 
 [Install]
 WantedBy=multi-user.target
+EOF
+
+    # Weekly draft digest job, triggered every Monday morning by a timer
+    sudo tee /etc/systemd/system/reader-digest-weekly.service > /dev/null << EOF
+[Unit]
+Description=Reader Digest weekly draft digest generation
+After=network.target
+
+[Service]
+Type=oneshot
+User=$APP_USER
+Group=$APP_USER
+WorkingDirectory=$APP_DIR/reader-digest/backend
+Environment=PATH=$APP_DIR/reader-digest/backend/venv/bin
+ExecStart=$APP_DIR/reader-digest/backend/venv/bin/python generate_weekly_digests.py --workers 4
+Nice=10
+
+# Logging
+StandardOutput=journal
+StandardError=journal
+SyslogIdentifier=reader-digest-weekly
+
+# Security
+NoNewPrivileges=true
+ProtectSystem=strict
+ProtectHome=true
+ReadWritePaths=$APP_DIR
+EOF
+
+    sudo tee /etc/systemd/system/reader-digest-weekly.timer > /dev/null << EOF
+[Unit]
+Description=Generate draft weekly digests early every Monday
+
+[Timer]
+OnCalendar=Mon *-*-* 02:00:00
+Persistent=true
+RandomizedDelaySec=15min
+
+[Install]
+WantedBy=timers.target
 EOF
 
     # Reload systemd and enable services
     sudo systemctl daemon-reload
     sudo systemctl enable reader-digest-backend reader-digest-frontend
+    sudo systemctl enable --now reader-digest-weekly.timer
     
     log "Systemd services configured"
 }
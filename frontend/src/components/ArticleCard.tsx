@@ -13,6 +13,10 @@ interface ArticleCardProps {
 const ArticleCard: React.FC<ArticleCardProps> = ({ article, viewMode, onArticleClick }) => {
   const tags = extractTags(article.tags || []);
   const domain = getDomainFromUrl(article.url);
+  // List endpoints return excerpts instead of the full content and notes;
+  // the content excerpt is already plain text
+  const notes = article.notes_excerpt ?? article.notes;
+  const content = article.excerpt ?? (article.content ? stripMarkdown(article.content) : undefined);
 
   const handleClick = () => {
     if (onArticleClick) {
@@ -53,16 +57,16 @@ const ArticleCard: React.FC<ArticleCardProps> = ({ article, viewMode, onArticleC
               <span className="text-blue-600">{domain}</span>
             </div>
 
-            {article.notes && (
+            {notes && (
               <p className="text-gray-700 mb-3">
-                {truncateText(article.notes, 200)}
+                {truncateText(notes, 200)}
               </p>
             )}
 
             {/* Content Preview */}
-            {article.content && (
+            {content && (
               <p className="text-gray-600 mb-3 italic">
-                {truncateText(stripMarkdown(article.content), 150)}
+                {truncateText(content, 150)}
               </p>
             )}
 
@@ -133,16 +137,16 @@ const ArticleCard: React.FC<ArticleCardProps> = ({ article, viewMode, onArticleC
           <span className="text-blue-600">{domain}</span>
         </div>
 
-        {article.notes && (
+        {notes && (
           <p className="text-gray-700 text-sm mb-3 flex-1">
-            {truncateText(article.notes, 120)}
+            {truncateText(notes, 120)}
           </p>
         )}
 
         {/* Content Preview */}
-        {article.content && (
+        {content && (
           <p className="text-gray-600 text-sm mb-3 flex-1 italic">
-            {truncateText(stripMarkdown(article.content), 100)}
+            {truncateText(content, 100)}
           </p>
         )}
 
@@ -225,15 +229,15 @@ const ArticleCard: React.FC<ArticleCardProps> = ({ article, viewMode, onArticleC
 
       {/* Content */}
       <div className="p-4 flex-1 flex flex-col">
-        {article.notes && (
+        {notes && (
           <p className="text-gray-700 mb-3 flex-1">
-            {truncateText(article.notes, 300)}
+            {truncateText(notes, 300)}
           </p>
         )}
         
-        {article.content && (
+        {content && (
           <p className="text-gray-600 italic mb-4 text-sm">
-            {truncateText(stripMarkdown(article.content), 200)}
+            {truncateText(content, 200)}
           </p>
         )}
 
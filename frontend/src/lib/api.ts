@@ -83,8 +83,16 @@ export const articlesAPI = {
     date?: string;
     tag?: string;
     view?: 'public' | 'own';
+    fields?: string;  // 'summary' (default), 'all' or a comma-separated list
   }) => api.get('/articles', { params }),
 
+  searchArticles: (params: {
+    q: string;
+    page?: number;
+    per_page?: number;
+    view?: 'public' | 'own';
+  }) => api.get('/articles/search', { params }),
+
   getArticle: (id: number) => api.get(`/articles/${id}`),
 
   createArticle: (data: {
@@ -118,6 +126,7 @@ export const digestsAPI = {
     per_page?: number;
     user_id?: number;
     view?: 'public' | 'own';
+    fields?: string;  // 'summary' (default), 'all' or a comma-separated list
   }) => api.get('/digests', { params }),
 
   getDigest: (id: number) => api.get(`/digests/${id}`),
@@ -150,7 +159,8 @@ export const digestsAPI = {
     custom_title?: string;
   }) => api.post('/digests/generate-weekly', data),
 
-  getAvailableWeeks: () => api.get('/digests/available-weeks'),
+  getAvailableWeeks: (params?: { limit?: number; before?: string }) =>
+    api.get('/digests/available-weeks', { params }),
 };
 
 // Public Digests API (no authentication required)
@@ -200,6 +210,15 @@ export const usersAPI = {
   deactivateAccount: () => api.post('/users/deactivate'),
 };
 
+// Sync API
+export const syncAPI = {
+  getChanges: (params?: {
+    cursor?: string;
+    since?: string;
+    limit?: number;
+  }) => api.get('/sync/changes', { params }),
+};
+
 // Export API
 export const exportAPI = {
   exportUserData: async () => {
@@ -17,6 +17,8 @@ export interface Article {
   url: string;
   content?: string;
   notes?: string;
+  excerpt?: string;  // Plain-text preview of content; list endpoints return it instead of content
+  notes_excerpt?: string;
   tags?: string[] | string;  // Can be array from API or string from forms
   reading_date: string;
   is_public: boolean;
@@ -30,6 +32,7 @@ export interface Digest {
   id: number;
   title: string;
   content: string;
+  excerpt?: string;  // Returned by the list endpoint instead of content
   summary?: string;
   week_start: string;
   week_end: string;
@@ -72,6 +75,20 @@ export interface UsersResponse {
   pagination: PaginationInfo;
 }
 
+export interface SyncChange {
+  type: 'article' | 'digest';
+  id: number;
+  changed_at: string;
+  deleted: boolean;
+  record?: Article | Digest;
+}
+
+export interface SyncChangesResponse {
+  changes: SyncChange[];
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
 export type ViewMode = 'list' | 'card' | 'magazine';
 export type ViewType = 'public' | 'own';
 